@@ -1,10 +1,14 @@
 import sys
 import os
-import gc
+import importlib.util
 import hashlib
-import base64
 import re
 import html
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import requests as http_requests
 from flask import Flask, request, jsonify, make_response
 from dotenv import load_dotenv
@@ -19,12 +23,23 @@ load_dotenv()
 # Add src path
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
-from cnnClassifier.utils.common import decodeImage
+from cnnClassifier.utils.common import decode_base64_image
 from cnnClassifier.pipeline.predict import (
     PredictionPipeline,
     DiseasePredictor,
     EXTERNAL_LESION_RECOMMENDATIONS,
+    ImageTooLargeError,
+    tflite_artifact_path,
+    onnx_artifact_path,
+    uint8_artifact_path,
+    early_exit_artifact_path,
+    resolution_artifact_path,
 )
+from cnnClassifier.pipeline.backends import BACKENDS
+from cnnClassifier.pipeline.batching import BatchingPredictor
+from cnnClassifier.pipeline.cascade import CascadePredictor
+from cnnClassifier.pipeline.cache import PredictionCache
+from cnnClassifier.pipeline.model_manager import ModelManager
 import rag_engine
 
 # ---------------------- Flask Setup ----------------------
@@ -54,6 +69,9 @@ ALLOWED_DISEASES = {
 ALLOWED_SEVERITIES = {"mild", "moderate", "severe"}
 ALLOWED_AUDIO_MIMES = {"audio/webm", "audio/wav", "audio/mp4", "audio/ogg", "audio/mpeg"}
 MAX_IMAGE_PAYLOAD_BYTES = 10 * 1024 * 1024  # 10 MB
+MAX_BATCH_IMAGES = 200
+MAX_BATCH_PAYLOAD_BYTES = 150 * 1024 * 1024  # 150 MB per batch request
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "16"))
 
 
 def sanitize_string(value: str, max_length: int = 500) -> str:
@@ -66,17 +84,73 @@ def sanitize_string(value: str, max_length: int = 500) -> str:
     return value[:max_length].strip()
 
 
-def validate_base64_image(b64_data: str) -> bool:
-    """Validate that decoded base64 starts with JPEG or PNG magic bytes."""
+def validate_image_bytes(raw: bytes) -> bool:
+    """Validate that raw image bytes start with JPEG or PNG magic bytes."""
+    if raw[:2] == b"\xff\xd8":       # JPEG
+        return True
+    if raw[:4] == b"\x89PNG":        # PNG
+        return True
+    return False
+
+
+def validate_base64_image(b64_data: str) -> Optional[bytes]:
+    """
+    Decode a base64 image once and validate its magic bytes.
+    Returns the decoded bytes (so callers never decode twice), or None if invalid.
+    """
     try:
-        raw = base64.b64decode(b64_data[:100])  # only decode header
-        if raw[:2] == b"\xff\xd8":       # JPEG
-            return True
-        if raw[:4] == b"\x89PNG":        # PNG
-            return True
-        return False
+        raw = decode_base64_image(b64_data)
     except Exception:
-        return False
+        return None
+    return raw if validate_image_bytes(raw) else None
+
+
+RAW_IMAGE_CONTENT_TYPES = ("image/jpeg", "image/png")
+
+
+def read_image_upload():
+    """
+    Read the image of a single-image prediction request from any of:
+      • JSON  {"image": "<base64>"}                (current frontend)
+      • multipart/form-data with an "image" file field
+      • a raw image/jpeg or image/png request body
+    The binary forms avoid the ~33% base64 overhead, the JSON parse and the
+    base64 decode — bytes are read straight off the request stream.
+
+    Returns (image_bytes, error_response).
+    """
+    too_large = (jsonify({"error": "Image payload too large (max 10 MB)"}), 413)
+
+    if request.mimetype in RAW_IMAGE_CONTENT_TYPES:
+        if request.content_length and request.content_length > MAX_IMAGE_PAYLOAD_BYTES:
+            return None, too_large
+        raw = request.stream.read(MAX_IMAGE_PAYLOAD_BYTES + 1)
+    elif request.mimetype == "multipart/form-data":
+        upload = request.files.get("image")
+        if upload is None:
+            return None, (jsonify({"error": "No image provided"}), 400)
+        raw = upload.read(MAX_IMAGE_PAYLOAD_BYTES + 1)
+    else:
+        image = (request.get_json(silent=True) or {}).get("image")
+        if not image:
+            return None, (jsonify({"error": "No image provided"}), 400)
+        # Security: validate payload size
+        if len(image) > MAX_IMAGE_PAYLOAD_BYTES:
+            return None, too_large
+        # Security: validate magic bytes (decodes once, in memory)
+        raw = validate_base64_image(image)
+        if raw is None:
+            return None, (jsonify({"error": "Invalid image format. Only JPEG and PNG are accepted."}), 400)
+        return raw, None
+
+    if not raw:
+        return None, (jsonify({"error": "No image provided"}), 400)
+    if len(raw) > MAX_IMAGE_PAYLOAD_BYTES:
+        return None, too_large
+    # Security: validate magic bytes
+    if not validate_image_bytes(raw):
+        return None, (jsonify({"error": "Invalid image format. Only JPEG and PNG are accepted."}), 400)
+    return raw, None
 
 
 def sanitize_filename(filename: str) -> str:
@@ -125,6 +199,106 @@ translation_cache = LRUCache(maxsize=500)
 # ─── TTS cache (LRU, max 100 entries) + Bloom guard ───
 tts_cache = LRUCache(maxsize=100)
 
+# ─── Request threads per gunicorn worker (gunicorn.conf.py `threads`; sizes the /diagnose pool) ───
+GUNICORN_THREADS = max(1, int(os.getenv("GUNICORN_THREADS", "1")))
+
+# ─── Inference micro-batching (opt-in; useful with gunicorn --threads) ───
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+# ─── Compiled serving signature (XLA is opt-in; measure with benchmark_inference.py) ───
+INFERENCE_XLA = os.getenv("INFERENCE_XLA", "0") == "1"
+
+# ─── Model .h5 files the backend artifacts derive from — e.g. the distilled student or *.pruned.h5 ───
+COCCIDIOSIS_MODEL = os.getenv("COCCIDIOSIS_MODEL", os.path.join("artifacts", "training", "model.h5"))
+EXTERNAL_LESION_MODEL = os.getenv("EXTERNAL_LESION_MODEL", os.path.join("models", "external_lesion_model.h5"))
+
+# ─── Input resolution per model: 224 (default) or a variant trained with --img-size 160/192
+#     (serves foo.r160.h5 and its derived artifacts — export those with the same --img-size
+#     in convert_tflite.py / export_onnx.py / export_uint8.py; compare with benchmark_resolution.py) ───
+COCCIDIOSIS_RESOLUTION = int(os.getenv("COCCIDIOSIS_RESOLUTION", "224"))
+EXTERNAL_LESION_RESOLUTION = int(os.getenv("EXTERNAL_LESION_RESOLUTION", "224"))
+
+# ─── Confidence-gated cascade: fast model first, VGG16 only inside the band (evaluate_cascade.py) ───
+CASCADE_FAST_MODEL = os.getenv("CASCADE_FAST_MODEL", "")       # e.g. artifacts/training/student_model.h5
+CASCADE_BAND = tuple(float(v) for v in os.getenv("CASCADE_BAND", "0.0,0.9").split(","))
+
+# ─── Inference backend per model: "keras" (default), "tflite" (convert_tflite.py), "onnx" (export_onnx.py)
+#     or "early_exit" (coccidiosis only; train_coccidiosis.py --early-exit) ───
+COCCIDIOSIS_BACKEND = os.getenv("COCCIDIOSIS_BACKEND", "keras").lower()
+EXTERNAL_LESION_BACKEND = os.getenv("EXTERNAL_LESION_BACKEND", "keras").lower()
+TFLITE_VARIANT = os.getenv("TFLITE_VARIANT", "int8")          # "int8" or "fp16"
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "0")) or None
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0")) or None
+# keras backend: serve the uint8-input artifacts from export_uint8.py (rescaling runs in-graph)
+SERVING_UINT8 = os.getenv("SERVING_UINT8", "0") == "1"
+# early_exit backend: stop at the first exit head at least this confident (1.0+ = always run the full model)
+EARLY_EXIT_THRESHOLD = float(os.getenv("EARLY_EXIT_THRESHOLD", "0.9"))
+
+
+def predictor_options(h5_path: str, backend: str, resolution: int = 224) -> dict:
+    """Resolve the model artifact + DiseasePredictor kwargs for the configured backend and resolution."""
+    options = _backend_options(resolution_artifact_path(h5_path, resolution), backend)
+    return {**options, "image_size": (resolution, resolution)}
+
+
+def _backend_options(h5_path: str, backend: str) -> dict:
+    if backend == "tflite":
+        return {
+            "model_path": tflite_artifact_path(h5_path, TFLITE_VARIANT),
+            "backend": "tflite",
+            "num_threads": TFLITE_NUM_THREADS,
+        }
+    if backend == "onnx":
+        return {
+            "model_path": onnx_artifact_path(h5_path),
+            "backend": "onnx",
+            "num_threads": ONNX_NUM_THREADS,
+        }
+    if backend == "early_exit":
+        return {
+            "model_path": early_exit_artifact_path(h5_path),
+            "backend": "early_exit",
+            "exit_threshold": EARLY_EXIT_THRESHOLD,
+        }
+    if SERVING_UINT8:
+        return {
+            "model_path": uint8_artifact_path(h5_path),
+            "input_dtype": "uint8",
+            "jit_compile": INFERENCE_XLA,
+        }
+    return {"model_path": h5_path, "jit_compile": INFERENCE_XLA}
+
+
+# ─── Test-time augmentation for below-threshold predictions (0 = off, max 7) ───
+TTA_VARIANTS = int(os.getenv("TTA_VARIANTS", "0"))
+
+# ─── Content-hash prediction cache per model (size 0 disables) ───
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "256"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+
+
+def make_prediction_cache() -> Optional[PredictionCache]:
+    if PREDICTION_CACHE_SIZE <= 0:
+        return None
+    return PredictionCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+
+
+# ─── Model memory budget: LRU-evict models when loading one more would exceed it (0 = unlimited) ───
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+# MiniLM weights + torch runtime, before the first measured load (BM25-only retrieval costs ~nothing)
+RAG_EMBEDDER_ESTIMATE_MB = (
+    150.0 if rag_engine.RAG_RETRIEVER != "lexical" and importlib.util.find_spec("sentence_transformers") else 0.0
+)
+
+
+# ─── Eager warmup: load + warm all models in the background at startup ───
+EAGER_WARMUP = os.getenv("EAGER_WARMUP", "0") == "1"
+
+# ─── Copy-on-write model sharing (gunicorn.conf.py preload hooks) ───
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"
+
 
 # ---------------------- Model Wrapper ----------------------
 class ClientApp:
@@ -134,32 +308,252 @@ class ClientApp:
         self.filename = "inputImage.jpg"
         self.coccidiosis = None
         self.external_lesion = None
+        self._load_lock = threading.RLock()   # warmup thread vs. first requests
+        self.models = ModelManager(budget_mb=MODEL_MEMORY_BUDGET_MB)
+        self.models.register(
+            "rag", load=self._load_rag, unload=rag_engine.unload, estimate_mb=RAG_EMBEDDER_ESTIMATE_MB
+        )
+        self._rag_warmup = None
+        self.readiness = {
+            name: {"state": "pending"} for name in ("coccidiosis", "external_lesion", "rag")
+        }
+
+    @staticmethod
+    def _maybe_batched(predictor):
+        """Wrap a predictor in the micro-batching scheduler when enabled."""
+        if not INFERENCE_BATCHING:
+            return predictor
+        print(f"🧺 Micro-batching enabled (max {BATCH_MAX_SIZE} imgs, {BATCH_MAX_WAIT_MS} ms window)")
+        return BatchingPredictor(
+            predictor, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS
+        )
+
+    def _manage(self, name: str, predictor):
+        """Put a predictor under the memory-budgeted model manager (the only place it is loaded from)."""
+        predictor.managed = True
+        self.models.register(
+            name, load=predictor.load, unload=predictor.unload, estimate_mb=predictor.estimated_memory_mb
+        )
+
+    def load_coccidiosis(self, pin: bool = False):
+        """Load coccidiosis model (lazy; may evict the least-recently-used model)."""
+        with self._load_lock:
+            self._load_coccidiosis()
+            self._acquire("coccidiosis", self.coccidiosis, pin)
 
-    def load_coccidiosis(self):
-        """Load coccidiosis model (lazy)."""
+    def _load_coccidiosis(self):
         if self.coccidiosis is None:
             print("🔄 Loading coccidiosis model...")
-            self.coccidiosis = PredictionPipeline(self.filename)
-            print("✅ Coccidiosis model ready.")
-
-    def load_external_lesion(self):
-        """Load external lesion model (lazy)."""
+            pipeline = PredictionPipeline(
+                self.filename,
+                cache=make_prediction_cache(),
+                tta_variants=TTA_VARIANTS,
+                **predictor_options(COCCIDIOSIS_MODEL, COCCIDIOSIS_BACKEND, COCCIDIOSIS_RESOLUTION),
+            )
+            predictor = pipeline.predictor
+            if CASCADE_FAST_MODEL:
+                print(f"🪜 Cascade enabled: {CASCADE_FAST_MODEL} first, escalating band {CASCADE_BAND}")
+                fast = DiseasePredictor(
+                    class_names=predictor.class_names,
+                    recommendations=predictor.recommendations,
+                    confidence_threshold=predictor.confidence_threshold,
+                    **predictor_options(CASCADE_FAST_MODEL, COCCIDIOSIS_BACKEND, COCCIDIOSIS_RESOLUTION),
+                )
+                predictor = CascadePredictor(fast, predictor, band=CASCADE_BAND)
+            self._manage("coccidiosis", predictor)
+            self.coccidiosis = self._maybe_batched(predictor)
+
+    def load_external_lesion(self, pin: bool = False):
+        """Load external lesion model (lazy; may evict the least-recently-used model)."""
+        with self._load_lock:
+            self._load_external_lesion()
+            self._acquire("external_lesion", self.external_lesion, pin)
+
+    def _load_external_lesion(self):
         if self.external_lesion is None:
-            model_path = os.path.join("models", "external_lesion_model.h5")
-            print(f"🔄 Loading external lesion model from {model_path}...")
-            self.external_lesion = DiseasePredictor(
-                model_path=model_path,
+            options = predictor_options(
+                EXTERNAL_LESION_MODEL, EXTERNAL_LESION_BACKEND, EXTERNAL_LESION_RESOLUTION
+            )
+            print(f"🔄 Loading external lesion model from {options['model_path']}...")
+            predictor = DiseasePredictor(
                 class_names=["Bumblefoot", "Fowlpox", "Healthy"],
                 recommendations=EXTERNAL_LESION_RECOMMENDATIONS,
-                image_size=(224, 224),
                 confidence_threshold=0.6,
+                cache=make_prediction_cache(),
+                tta_variants=TTA_VARIANTS,
+                **options,
+            )
+            self._manage("external_lesion", predictor)
+            self.external_lesion = self._maybe_batched(predictor)
+
+    def _acquire(self, name: str, predictor, pin: bool = False):
+        if not predictor.is_available:   # before anything gets evicted
+            raise FileNotFoundError(
+                f"Model not found at {predictor.model_path}. Please train the model first."
             )
-            self.external_lesion.load()
-            print("✅ External lesion model ready.")
+        self.models.acquire(name, pin=pin)
+
+    def load_rag(self, pin: bool = False):
+        """Make sure the RAG embedder is resident (may evict a disease model)."""
+        self.models.acquire("rag", pin=pin)
+
+    def release(self, *names: str):
+        """Unpin models loaded with pin=True so the model manager may evict them again."""
+        for name in names:
+            self.models.release(name)
+
+    @contextmanager
+    def serving(self, name: str):
+        """Load `name` and pin it for one request, so it is never evicted mid-request."""
+        loaders = {
+            "coccidiosis": self.load_coccidiosis,
+            "external_lesion": self.load_external_lesion,
+            "rag": self.load_rag,
+        }
+        loaders[name](pin=True)
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    def _load_rag(self):
+        self._rag_warmup = rag_engine.warmup()
+
+    def _warm_rag(self) -> dict:
+        self._rag_warmup = None
+        with self.serving("rag"):
+            return self._rag_warmup or rag_engine.warmup()
+
+    # ── Eager warmup / readiness ──
+
+    def _warm_component(self, name: str, warm):
+        """Run one component's load+warmup, recording state and timings."""
+        self.readiness[name] = {"state": "loading"}
+        try:
+            self.readiness[name] = {"state": "ready", **warm()}
+            print(f"✅ {name} warm: {self.readiness[name]}")
+        except Exception as e:
+            print(f"⚠️ {name} warmup failed: {e}")
+            self.readiness[name] = {"state": "failed", "error": str(e)}
+
+    def _warm_predictor(self, load, attr: str) -> dict:
+        load(pin=True)
+        predictor = getattr(self, attr)
+        try:
+            predictor.warmup()
+        finally:
+            self.release(attr)
+        return {
+            "load_seconds": round(predictor.load_seconds or 0.0, 3),
+            "warmup_seconds": round(predictor.warmup_seconds or 0.0, 3),
+        }
+
+    def warmup_all(self):
+        """Load both disease models and the RAG embedder, then run dummy inferences."""
+        start = time.perf_counter()
+        self._warm_component("coccidiosis", lambda: self._warm_predictor(self.load_coccidiosis, "coccidiosis"))
+        self._warm_component("external_lesion", lambda: self._warm_predictor(self.load_external_lesion, "external_lesion"))
+        self._warm_component("rag", self._warm_rag)
+        print(f"🔥 Warmup finished in {time.perf_counter() - start:.1f}s")
+
+    # ── gunicorn --preload support (see gunicorn.conf.py) ──
+
+    def preload_shared(self):
+        """
+        Called in the gunicorn master before forking. Loads everything that is
+        safe to inherit so workers share those pages copy-on-write:
+          • RAG knowledge base, chunk embeddings and the MiniLM weights
+          • TFLite / ONNX predictors configured with ONE thread (no thread pools)
+        Keras/TF predictors are NOT fork-safe (TF's runtime thread pools don't
+        survive fork) and are loaded per worker after the fork instead.
+        """
+        print("📦 Preloading shared models in gunicorn master...")
+        self._warm_component("rag", self._warm_rag)
+
+        configs = {
+            "coccidiosis": (self.load_coccidiosis, COCCIDIOSIS_MODEL, COCCIDIOSIS_BACKEND),
+            "external_lesion": (self.load_external_lesion, EXTERNAL_LESION_MODEL, EXTERNAL_LESION_BACKEND),
+        }
+        for name, (load, model_path, backend) in configs.items():
+            # Same thread setting the predictor gets; the backend class owns the fork-safety rule
+            threads = _backend_options(model_path, backend).get("num_threads")
+            if backend in BACKENDS and BACKENDS[backend].is_fork_safe(threads):
+                self._warm_component(name, lambda load=load, name=name: self._warm_predictor(load, name))
+            else:
+                print(f"ℹ️ {name} ({backend}, threads={threads}) is not fork-safe — loading per worker")
+
+    def after_fork(self):
+        """Called in each worker right after fork: reset thread state, then warm the rest."""
+        self._load_lock = threading.RLock()   # a lock held at fork time would never release
+        self.models.reset_lock()
+
+        # Configure TF threading before this worker first touches the TF runtime
+        tf_threads = int(os.getenv("TF_NUM_THREADS", "0"))
+        if tf_threads:
+            try:
+                import tensorflow as tf
+                tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+                tf.config.threading.set_inter_op_parallelism_threads(1)
+            except RuntimeError as e:
+                print(f"⚠️ Could not set TF threads after fork: {e}")
+
+        # torch re-creates its intra-op pool lazily after fork; keep it small per worker
+        torch_threads = int(os.getenv("TORCH_NUM_THREADS", "1"))
+        try:
+            import torch
+            torch.set_num_threads(torch_threads)
+        except ImportError:
+            pass
+
+        if EAGER_WARMUP:
+            self.start_background_warmup()
+
+    def start_background_warmup(self):
+        threading.Thread(target=self.warmup_all, name="model-warmup", daemon=True).start()
+
+    @property
+    def is_ready(self) -> bool:
+        """Every component loaded and warmed up (a failed component keeps the instance unready)."""
+        return all(c["state"] == "ready" for c in self.readiness.values())
+
+    @property
+    def has_failed(self) -> bool:
+        return any(c["state"] == "failed" for c in self.readiness.values())
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of each loaded model's prediction cache."""
+        stats = {}
+        for name, predictor in (("coccidiosis", self.coccidiosis), ("external_lesion", self.external_lesion)):
+            if predictor is not None and predictor.cache is not None:
+                stats[name] = predictor.cache.stats()
+        return stats
+
+    def cascade_stats(self) -> dict:
+        """Escalation counters of the coccidiosis cascade (empty if not enabled/loaded)."""
+        if self.coccidiosis is None or not CASCADE_FAST_MODEL:
+            return {}
+        return self.coccidiosis.cascade_stats()
+
+    def early_exit_stats(self) -> dict:
+        """Per-exit counts and early-exit rate of the coccidiosis model (empty if not enabled/loaded)."""
+        if self.coccidiosis is None or COCCIDIOSIS_BACKEND != "early_exit":
+            return {}
+        return self.coccidiosis.backend_stats()
+
+    def batching_stats(self) -> dict:
+        """Batch-size / queue-wait histograms per loaded model (empty if batching is off)."""
+        stats = {}
+        for name, predictor in (("coccidiosis", self.coccidiosis), ("external_lesion", self.external_lesion)):
+            if isinstance(predictor, BatchingPredictor):
+                stats[name] = predictor.stats()
+        return stats
 
 
 # Create global instance
 clApp = ClientApp()
+if EAGER_WARMUP and not PRELOAD_MODELS:
+    # With PRELOAD_MODELS the warmup runs per worker from the post_fork hook
+    clApp.start_background_warmup()
 
 
 # ---------------------- Routes ----------------------
@@ -175,28 +569,19 @@ def trainRoute():
 def predictRoute():
     """Coccidiosis prediction (existing endpoint — backward compatible)."""
     try:
-        image = request.json.get("image")
-        if not image:
-            return jsonify({"error": "No image provided"}), 400
-
-        # Security: validate payload size
-        if len(image) > MAX_IMAGE_PAYLOAD_BYTES:
-            return jsonify({"error": "Image payload too large (max 10 MB)"}), 413
+        # JSON base64, multipart or raw image body (see read_image_upload)
+        image_bytes, error = read_image_upload()
+        if error:
+            return error
 
-        # Security: validate magic bytes
-        if not validate_base64_image(image):
-            return jsonify({"error": "Invalid image format. Only JPEG and PNG are accepted."}), 400
-
-        clApp.load_coccidiosis()
-
-        decodeImage(image, clApp.filename)
-        result = clApp.coccidiosis.predict()
-
-        # Free memory after prediction
-        gc.collect()
+        with clApp.serving("coccidiosis"):
+            result = clApp.coccidiosis.predict_bytes(image_bytes)
 
         return jsonify(result)
 
+    except ImageTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+
     except Exception as e:
         print("❌ Coccidiosis prediction error:", e)
         return jsonify({"error": str(e)}), 500
@@ -207,25 +592,13 @@ def predictRoute():
 def predictExternalLesion():
     """External lesion prediction (Fowlpox / Bumblefoot / Healthy)."""
     try:
-        image = request.json.get("image")
-        if not image:
-            return jsonify({"error": "No image provided"}), 400
+        # JSON base64, multipart or raw image body (see read_image_upload)
+        image_bytes, error = read_image_upload()
+        if error:
+            return error
 
-        # Security: validate payload size
-        if len(image) > MAX_IMAGE_PAYLOAD_BYTES:
-            return jsonify({"error": "Image payload too large (max 10 MB)"}), 413
-
-        # Security: validate magic bytes
-        if not validate_base64_image(image):
-            return jsonify({"error": "Invalid image format. Only JPEG and PNG are accepted."}), 400
-
-        clApp.load_external_lesion()
-
-        decodeImage(image, clApp.filename)
-        result = clApp.external_lesion.predict(clApp.filename)
-
-        # Free memory after prediction
-        gc.collect()
+        with clApp.serving("external_lesion"):
+            result = clApp.external_lesion.predict_bytes(image_bytes)
 
         return jsonify(result)
 
@@ -238,11 +611,217 @@ def predictExternalLesion():
             "recommendation": "The external lesion detection model has not been trained yet.",
         }), 503
 
+    except ImageTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+
     except Exception as e:
         print("❌ External lesion prediction error:", e)
         return jsonify({"error": str(e)}), 500
 
 
+# ---------------------- Combined Diagnosis ----------------------
+
+# Both disease models run side by side for every request thread; threads are spawned lazily (fork-safe)
+diagnose_pool = ThreadPoolExecutor(max_workers=2 * GUNICORN_THREADS, thread_name_prefix="diagnose")
+
+
+def _timed_prediction(predictor, cache_key, img_array) -> dict:
+    """Run one model on an already-preprocessed array and cache the result, with timing."""
+    start = time.perf_counter()
+    result = predictor.predict_array(img_array)
+    if cache_key is not None:
+        predictor.cache.put(cache_key, result)
+    return {**result, "latency_ms": round((time.perf_counter() - start) * 1000.0, 2)}
+
+
+@app.route("/diagnose", methods=["POST", "OPTIONS"])
+@limiter.limit("15 per minute")
+def diagnoseRoute():
+    """
+    Full checkup: decode + preprocess the image ONCE, then run the coccidiosis
+    and external-lesion models concurrently. Latency ≈ the slower model, not the sum.
+    Models with a cached result for this image are answered without preprocessing.
+    """
+    try:
+        total_start = time.perf_counter()
+        # JSON base64, multipart or raw image body (see read_image_upload)
+        image_bytes, error = read_image_upload()
+        if error:
+            return error
+        decode_ms = (time.perf_counter() - total_start) * 1000.0
+
+        predictors = {}
+        response = {}
+        try:
+            # Pinned until the response is built: loading one model never evicts the other mid-request
+            for name, load in (("coccidiosis", clApp.load_coccidiosis), ("external_lesion", clApp.load_external_lesion)):
+                try:
+                    load(pin=True)
+                    predictors[name] = getattr(clApp, name)
+                except FileNotFoundError as e:
+                    print(f"⚠️ {name} model not available:", e)
+                    response[name] = {"error": f"{name} model not yet available."}
+
+            # Cache hits are answered straight away; only the misses need the image preprocessed
+            pending = {}
+            for name, predictor in predictors.items():
+                start = time.perf_counter()
+                cache_key = predictor.cache_key(image_bytes)
+                result = predictor.cache.get(cache_key) if cache_key is not None else None
+                if result is None:
+                    pending[name] = cache_key
+                else:
+                    response[name] = {**result, "latency_ms": round((time.perf_counter() - start) * 1000.0, 2)}
+
+            # Preprocess once per distinct input size/dtype (shared unless *_RESOLUTION differ)
+            start = time.perf_counter()
+            arrays = {}
+            for name in pending:
+                predictor = predictors[name]
+                key = (predictor.image_size, predictor.input_dtype)
+                if key not in arrays:
+                    arrays[key] = predictor.preprocess_bytes(image_bytes)
+            preprocess_ms = (time.perf_counter() - start) * 1000.0
+
+            futures = {
+                name: diagnose_pool.submit(
+                    _timed_prediction, predictors[name], cache_key,
+                    arrays[(predictors[name].image_size, predictors[name].input_dtype)],
+                )
+                for name, cache_key in pending.items()
+            }
+            for name, future in futures.items():
+                response[name] = future.result()
+
+            response["timing"] = {
+                "decode_ms": round(decode_ms, 2),
+                "preprocess_ms": round(preprocess_ms, 2),
+                **{f"{name}_ms": r["latency_ms"] for name, r in response.items() if "latency_ms" in r},
+                "total_ms": round((time.perf_counter() - total_start) * 1000.0, 2),
+            }
+            return jsonify(response)
+        finally:
+            clApp.release(*predictors)
+
+    except ImageTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+
+    except Exception as e:
+        print("❌ Diagnosis error:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+# ---------------------- Bulk Prediction ----------------------
+
+def _read_batch_images():
+    """
+    Collect images for a batch request from either:
+      • JSON  {"images": ["<base64>", ...]}
+      • multipart/form-data with one or more "images" file fields
+
+    Returns (items, error_response). Each item is {"name", "bytes", "error"}.
+    """
+    if request.content_length and request.content_length > MAX_BATCH_PAYLOAD_BYTES:
+        return None, (jsonify({"error": "Batch payload too large (max 150 MB)"}), 413)
+
+    items = []
+    if request.files:
+        for upload in request.files.getlist("images"):
+            raw = upload.read(MAX_IMAGE_PAYLOAD_BYTES + 1)
+            item = {"name": sanitize_filename(upload.filename), "bytes": None, "error": None}
+            if len(raw) > MAX_IMAGE_PAYLOAD_BYTES:
+                item["error"] = "Image too large (max 10 MB)"
+            elif not validate_image_bytes(raw):
+                item["error"] = "Invalid image format. Only JPEG and PNG are accepted."
+            else:
+                item["bytes"] = raw
+            items.append(item)
+    else:
+        images = (request.get_json(silent=True) or {}).get("images")
+        if not isinstance(images, list):
+            return None, (jsonify({"error": "Expected a list of base64 images under 'images'"}), 400)
+        for image in images:
+            item = {"name": None, "bytes": None, "error": None}
+            if not isinstance(image, str) or not image:
+                item["error"] = "No image provided"
+            elif len(image) > MAX_IMAGE_PAYLOAD_BYTES:
+                item["error"] = "Image payload too large (max 10 MB)"
+            else:
+                item["bytes"] = validate_base64_image(image)
+                if item["bytes"] is None:
+                    item["error"] = "Invalid image format. Only JPEG and PNG are accepted."
+            items.append(item)
+
+    if not items:
+        return None, (jsonify({"error": "No images provided"}), 400)
+    if len(items) > MAX_BATCH_IMAGES:
+        return None, (jsonify({"error": f"Too many images (max {MAX_BATCH_IMAGES} per request)"}), 413)
+    return items, None
+
+
+def _predict_batch(predictor, items: list) -> dict:
+    """Run valid items through the model in chunks; report failures per item, in order."""
+    valid = [i for i, item in enumerate(items) if item["error"] is None]
+    predictions = predictor.predict_many(
+        [items[i]["bytes"] for i in valid], chunk_size=BATCH_CHUNK_SIZE
+    )
+
+    results = [{"index": i, "error": item["error"]} for i, item in enumerate(items)]
+    for i, prediction in zip(valid, predictions):
+        results[i] = {"index": i, **prediction}
+    for i, item in enumerate(items):
+        if item["name"]:
+            results[i]["filename"] = item["name"]
+
+    failed = sum(1 for r in results if "error" in r)
+    return {
+        "results": results,
+        "count": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
+
+
+@app.route("/predict/batch", methods=["POST", "OPTIONS"])
+@limiter.limit("5 per minute")
+def predictBatchRoute():
+    """Bulk coccidiosis prediction (JSON list of base64 images or multipart upload)."""
+    try:
+        items, error = _read_batch_images()
+        if error:
+            return error
+
+        with clApp.serving("coccidiosis"):
+            return jsonify(_predict_batch(clApp.coccidiosis, items))
+
+    except Exception as e:
+        print("❌ Coccidiosis batch prediction error:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/predict/external-lesion/batch", methods=["POST", "OPTIONS"])
+@limiter.limit("5 per minute")
+def predictExternalLesionBatch():
+    """Bulk external lesion prediction (JSON list of base64 images or multipart upload)."""
+    try:
+        items, error = _read_batch_images()
+        if error:
+            return error
+
+        with clApp.serving("external_lesion"):
+            return jsonify(_predict_batch(clApp.external_lesion, items))
+
+    except FileNotFoundError as e:
+        print("⚠️ External lesion model not found:", e)
+        return jsonify({
+            "error": "External lesion model not yet available. Please train the model first.",
+        }), 503
+
+    except Exception as e:
+        print("❌ External lesion batch prediction error:", e)
+        return jsonify({"error": str(e)}), 500
+
+
 # ---------------------- RAG Treatment Plan Generator ----------------------
 
 @app.route("/generate-treatment", methods=["POST", "OPTIONS"])
@@ -273,7 +852,8 @@ def generate_treatment():
             "language": sanitize_string(data.get("language", "en-US"), max_length=10),
         }
 
-        result = rag_engine.generate_treatment_plan(disease, user_context)
+        with clApp.serving("rag"):
+            result = rag_engine.generate_treatment_plan(disease, user_context)
         return jsonify(result)
 
     except Exception as e:
@@ -592,22 +1172,51 @@ def ttsRoute():
 
 @app.route("/health", methods=["GET"])
 def health():
-    """Health check endpoint."""
-    external_model_path = os.path.join("models", "external_lesion_model.h5")
+    """
+    Health check endpoint.
+    With EAGER_WARMUP=1 it returns 503 until every model has warmed up, and
+    keeps returning 503 ("failed") if one failed to load, so the load
+    balancer only routes traffic to instances that can serve it.
+    """
+    ready = clApp.is_ready if EAGER_WARMUP else True
+    if ready:
+        status = "ok"
+    elif clApp.has_failed:
+        status = "failed"
+    else:
+        status = "warming_up"
     return jsonify({
-        "status": "ok",
+        "status": status,
+        "ready": ready,
+        "readiness": clApp.readiness,
         "models": {
-            "coccidiosis": os.path.isfile(
-                os.path.join("artifacts", "training", "model.h5")
-            ),
-            "external_lesion": os.path.isfile(external_model_path),
+            "coccidiosis": os.path.isfile(COCCIDIOSIS_MODEL),
+            "external_lesion": os.path.isfile(EXTERNAL_LESION_MODEL),
+        },
+        "prediction_cache": {
+            "enabled": PREDICTION_CACHE_SIZE > 0,
+            **clApp.cache_stats(),
+        },
+        "batching": {
+            "enabled": INFERENCE_BATCHING,
+            **clApp.batching_stats(),
+        },
+        "early_exit": {
+            "enabled": COCCIDIOSIS_BACKEND == "early_exit",
+            **clApp.early_exit_stats(),
+        },
+        "model_memory": clApp.models.stats(),
+        "cascade": {
+            "enabled": bool(CASCADE_FAST_MODEL),
+            **clApp.cascade_stats(),
         },
+        "rag_query_cache": rag_engine.query_cache_stats(),
         "sarvam": {
             "translate_configured": bool(SARVAM_TRANSLATE_KEY),
             "stt_configured": bool(SARVAM_STT_KEY),
             "translation_cache_size": len(translation_cache),
         },
-    }), 200
+    }), 200 if ready else 503
 
 
 # ---------------------- Run Server ----------------------
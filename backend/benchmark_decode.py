@@ -0,0 +1,118 @@
+"""
+Image Decode Benchmark — full decode + resize vs. JPEG draft-mode decoding
+
+For several phone-camera resolutions, encodes a synthetic JPEG and times
+the preprocessing stage two ways:
+  - full:   keras load_img(target_size=224x224) — decodes every pixel, then resizes
+  - draft:  decode_image() — libjpeg DCT-domain scaling to the nearest
+            1/2, 1/4 or 1/8 size that is still >= 224, then resizes
+
+Also reports the mean absolute difference between the two 224x224 arrays
+(both /255.0), so the accuracy cost of the cheaper decode is visible.
+
+Usage:
+    cd backend
+    python benchmark_decode.py [--runs 10]
+
+Output:
+    Per-resolution timing table printed to stdout
+    models/decode_benchmark.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from PIL import Image
+from tensorflow.keras.preprocessing import image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import decode_image
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR     = os.path.dirname(__file__)
+OUTPUT_PATH  = os.path.join(BASE_DIR, "models", "decode_benchmark.json")
+IMG_SIZE     = (224, 224)
+RESOLUTIONS = {
+    "VGA 0.3MP":  (640, 480),
+    "FHD 2MP":    (1920, 1080),
+    "12MP":       (4000, 3000),
+    "50MP":       (8160, 6120),
+}
+
+
+def synthetic_jpeg(width: int, height: int, quality: int = 90) -> bytes:
+    """Smooth gradients + noise, so the JPEG has photo-like entropy."""
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 256, size=(height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    img = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def full_decode(data: bytes) -> np.ndarray:
+    img = image.load_img(io.BytesIO(data), target_size=IMG_SIZE)
+    return image.img_to_array(img) / 255.0
+
+
+def draft_decode(data: bytes) -> np.ndarray:
+    return image.img_to_array(decode_image(io.BytesIO(data), IMG_SIZE)) / 255.0
+
+
+def time_decode(fn, data: bytes, runs: int) -> dict:
+    fn(data)   # warm up
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(data)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    arr = np.asarray(latencies)
+    return {
+        "mean_ms": round(float(arr.mean()), 2),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+    }
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    report = {}
+    for label, (width, height) in RESOLUTIONS.items():
+        print(f"\n[BENCH] {label} ({width}x{height})")
+        data = synthetic_jpeg(width, height)
+        draft_img = Image.open(io.BytesIO(data))
+        draft_img.draft("RGB", (IMG_SIZE[1], IMG_SIZE[0]))
+
+        full = time_decode(full_decode, data, args.runs)
+        draft = time_decode(draft_decode, data, args.runs)
+        diff = float(np.abs(full_decode(data) - draft_decode(data)).mean())
+        report[label] = {
+            "width": width,
+            "height": height,
+            "jpeg_kb": round(len(data) / 1024, 1),
+            "draft_decoded_size": list(draft_img.size),
+            "full": full,
+            "draft": draft,
+            "speedup": round(full["mean_ms"] / draft["mean_ms"], 2),
+            "mean_abs_diff": round(diff, 4),
+        }
+        print(f"   full  {full['mean_ms']:8.2f} ms   draft {draft['mean_ms']:8.2f} ms "
+              f"(decoded at {draft_img.size[0]}x{draft_img.size[1]})   "
+              f"x{report[label]['speedup']}   |Δ|={diff:.4f}")
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Report saved to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Inference Latency Benchmark — model.predict() vs compiled serving function
+
+Compares, for each .h5 model shipped with the backend:
+  - keras:    DiseasePredictor with model.predict()  (the old path)
+  - traced:   DiseasePredictor with the traced tf.function serving signature
+  - xla:      same traced function with jit_compile=True
+
+Usage:
+    cd backend
+    python benchmark_inference.py [--runs 50] [--batch 1]
+
+Output:
+    Per-model latency table (mean / p50 / p95 in ms) printed to stdout
+    models/inference_benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import (
+    DiseasePredictor,
+    COCCIDIOSIS_RECOMMENDATIONS,
+    EXTERNAL_LESION_RECOMMENDATIONS,
+)
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR     = os.path.dirname(__file__)
+OUTPUT_PATH  = os.path.join(BASE_DIR, "models", "inference_benchmark.json")
+MODELS = {
+    "coccidiosis": dict(
+        model_path=os.path.join(BASE_DIR, "artifacts", "training", "model.h5"),
+        class_names=["Coccidiosis", "Healthy"],
+        recommendations=COCCIDIOSIS_RECOMMENDATIONS,
+    ),
+    "external_lesion": dict(
+        model_path=os.path.join(BASE_DIR, "models", "external_lesion_model.h5"),
+        class_names=["Bumblefoot", "Fowlpox", "Healthy"],
+        recommendations=EXTERNAL_LESION_RECOMMENDATIONS,
+    ),
+}
+VARIANTS = {
+    "keras":  dict(use_compiled=False),
+    "traced": dict(use_compiled=True, jit_compile=False),
+    "xla":    dict(use_compiled=True, jit_compile=True),
+}
+
+
+def summarize(latencies_ms: list) -> dict:
+    arr = np.asarray(latencies_ms)
+    return {
+        "mean_ms": round(float(arr.mean()), 2),
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p95_ms": round(float(np.percentile(arr, 95)), 2),
+    }
+
+
+def time_variant(spec: dict, variant: dict, runs: int, batch_size: int, warmup: int = 3) -> dict:
+    predictor = DiseasePredictor(image_size=(224, 224), **spec, **variant)
+
+    start = time.perf_counter()
+    predictor.load()
+    load_s = time.perf_counter() - start
+
+    batch = np.random.rand(batch_size, 224, 224, 3).astype(np.float32)
+    for _ in range(warmup):
+        predictor._run_model(batch)
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predictor._run_model(batch)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+
+    return {"load_s": round(load_s, 2), **summarize(latencies)}
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"[BENCH] Inference latency — batch={args.batch}, runs={args.runs}")
+    print("=" * 60)
+
+    report = {}
+    for name, spec in MODELS.items():
+        if not os.path.isfile(spec["model_path"]):
+            print(f"[SKIP] {name}: model not found at {spec['model_path']}")
+            continue
+
+        report[name] = {}
+        for variant_name, variant in VARIANTS.items():
+            try:
+                report[name][variant_name] = time_variant(spec, variant, args.runs, args.batch)
+            except Exception as e:
+                print(f"[WARN] {name}/{variant_name} failed: {e}")
+                continue
+            r = report[name][variant_name]
+            print(f"   {name:16s} {variant_name:7s} mean={r['mean_ms']:8.2f} ms  "
+                  f"p50={r['p50_ms']:8.2f} ms  p95={r['p95_ms']:8.2f} ms  (load {r['load_s']} s)")
+
+        if "keras" in report[name] and "traced" in report[name]:
+            speedup = report[name]["keras"]["p50_ms"] / max(report[name]["traced"]["p50_ms"], 1e-6)
+            report[name]["traced_speedup_p50"] = round(speedup, 2)
+            print(f"   {name:16s} traced vs keras p50 speed-up: {speedup:.2f}x")
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump({"batch_size": args.batch, "runs": args.runs, "models": report}, f, indent=2)
+    print(f"\n[OK] Benchmark saved to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
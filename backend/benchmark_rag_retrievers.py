@@ -0,0 +1,151 @@
+"""
+RAG Retriever Benchmark — lexical-only (BM25) vs. dense vs. hybrid deployments
+
+Starts one fresh Python process per RAG_RETRIEVER mode, so each sees only the
+memory its own retriever pulls in, and measures in it:
+
+  - RSS before / after rag_engine.warmup()   (sentence-transformers + torch for dense)
+  - warmup time                              (model load, embeddings, pre-encoding)
+  - retrieve() p50 / p95 per query, uncached (distinct symptoms → query encoded)
+    and cached (disease × severity queries pre-encoded by warmup)
+  - BM25 index and chunk-embedding sizes
+
+    lexical   BM25 over title, content and medications (rag_lexical.py), no torch
+    dense     MiniLM embeddings only
+    hybrid    dense + BM25 fused by reciprocal rank (production default)
+
+dense and hybrid are reported as unavailable when sentence-transformers is
+not installed.
+
+Usage:
+    cd backend
+    python benchmark_rag_retrievers.py [--modes lexical,dense,hybrid] [--runs 200]
+
+Output:
+    Per-mode table printed to stdout
+    models/rag_retriever_benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_PATH = os.path.join(BASE_DIR, "models", "rag_retriever_benchmark.json")
+MODES       = ["lexical", "dense", "hybrid"]
+QUERIES = [
+    ("coccidiosis", {"severity": "severe", "symptoms": "bloody droppings, lethargy"}),
+    ("fowlpox", {"severity": "moderate", "symptoms": "wart-like scabs on comb"}),
+    ("bumblefoot", {"severity": "mild", "symptoms": "swollen footpad"}),
+    ("coryza", {"severity": "moderate", "symptoms": "facial swelling, nasal discharge"}),
+]
+
+
+def _percentiles(timings: list) -> dict:
+    import numpy as np
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+    }
+
+
+def run_worker(runs: int) -> dict:
+    """Measure the retriever selected by RAG_RETRIEVER in this (fresh) process."""
+    sys.path.append(os.path.join(BASE_DIR, "src"))
+    from cnnClassifier.utils.common import get_rss_mb
+
+    rss_start = get_rss_mb()
+    import rag_engine
+
+    start = time.perf_counter()
+    warmup = rag_engine.warmup()
+    warmup_seconds = time.perf_counter() - start
+    rss_loaded = get_rss_mb()
+
+    embeddings = rag_engine._embeddings
+    result = {
+        "retriever": warmup["retriever"],
+        "available": warmup["retriever"] == rag_engine.RAG_RETRIEVER,
+        "warmup_seconds": round(warmup_seconds, 3),
+        "rss_start_mb": round(rss_start, 1),
+        "rss_loaded_mb": round(rss_loaded, 1),
+        "rss_delta_mb": round(rss_loaded - rss_start, 1),
+        "bm25_index_kb": round(rag_engine._kb_index["bm25"].nbytes / 1024, 1),
+        "embeddings_kb": round(embeddings.nbytes / 1024, 1) if embeddings is not None else 0.0,
+    }
+
+    # Uncached: every call has unseen symptoms text, so dense modes encode the query
+    uncached = []
+    for i in range(runs):
+        disease, ctx = QUERIES[i % len(QUERIES)]
+        ctx = {**ctx, "symptoms": f"{ctx['symptoms']} (observation {i})"}
+        start = time.perf_counter()
+        rag_engine.retrieve(disease, ctx)
+        uncached.append((time.perf_counter() - start) * 1000.0)
+
+    # Cached: no symptoms → the disease × severity query pre-encoded by warmup()
+    cached = []
+    for i in range(runs):
+        disease, ctx = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        rag_engine.retrieve(disease, {"severity": ctx["severity"]})
+        cached.append((time.perf_counter() - start) * 1000.0)
+
+    result["uncached"] = _percentiles(uncached)
+    result["cached"] = _percentiles(cached)
+    result["rss_after_queries_mb"] = round(get_rss_mb(), 1)
+    return result
+
+
+def run_mode(mode: str, runs: int) -> dict:
+    env = {**os.environ, "RAG_RETRIEVER": mode, "PYTHONUNBUFFERED": "1"}
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", "--runs", str(runs)],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr.strip())
+        return {"retriever": mode, "available": False, "error": proc.stderr.strip().splitlines()[-1:]}
+    # rag_engine prints progress; the result is the last line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated RAG_RETRIEVER modes")
+    parser.add_argument("--runs", type=int, default=200, help="retrieve() calls per measurement")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.runs)))
+        return
+
+    results = {}
+    for mode in args.modes.split(","):
+        print(f"[BENCH] RAG_RETRIEVER={mode}")
+        results[mode] = run_mode(mode, args.runs)
+
+    print(f"\n   {'mode':>8} {'RSS Δ MB':>9} {'warmup s':>9} {'uncached p50':>13} {'p95':>8} "
+          f"{'cached p50':>11} {'p95':>8}")
+    for mode, r in results.items():
+        if not r.get("available"):
+            print(f"   {mode:>8}   unavailable (sentence-transformers not installed?)")
+            continue
+        print(f"   {mode:>8} {r['rss_delta_mb']:>9.1f} {r['warmup_seconds']:>9.3f} "
+              f"{r['uncached']['p50_ms']:>10.3f} ms {r['uncached']['p95_ms']:>5.3f} ms "
+              f"{r['cached']['p50_ms']:>8.3f} ms {r['cached']['p95_ms']:>5.3f} ms")
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump({"queries": len(QUERIES), "runs": args.runs, "results": results}, f, indent=2)
+    print(f"\n[OK] Results saved to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Resolution Benchmark — accuracy vs. CPU latency at 160 / 192 / 224
+
+Loads every resolution variant trained with `--img-size` (model.r160.h5,
+model.r192.h5, and the production 224 model) through DiseasePredictor and
+measures, per model and resolution:
+
+  - validation accuracy   (same split as convert_tflite.py, resized to that resolution)
+  - p50 / p95 latency     single image, CPU
+  - load time, file size
+
+and names the cheapest variant whose accuracy stays within --max-drop of 224.
+
+Serve a chosen variant with:
+    COCCIDIOSIS_RESOLUTION=160
+    EXTERNAL_LESION_RESOLUTION=192
+
+Usage:
+    cd backend
+    python train_coccidiosis.py --img-size 160      # (and 192) to produce the variants
+    python benchmark_resolution.py [--model coccidiosis|external_lesion|all] [--max-drop 0.01]
+
+Output:
+    Per-resolution table printed to stdout
+    models/resolution_report.json
+"""
+
+import os
+import sys
+import gc
+import json
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import DiseasePredictor, resolution_artifact_path
+from convert_tflite import MODELS, validation_generator, accuracy, latency_ms
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(__file__)
+RESOLUTIONS = [160, 192, 224]
+REPORT_PATH = os.path.join(BASE_DIR, "models", "resolution_report.json")
+
+
+def measure(spec: dict, resolution: int) -> dict:
+    gc.collect()
+    predictor = DiseasePredictor(
+        model_path=resolution_artifact_path(spec["model_path"], resolution),
+        class_names=spec["class_names"],
+        recommendations=spec["recommendations"],
+        image_size=(resolution, resolution),
+    )
+    predictor.load()
+    result = {
+        "resolution": resolution,
+        "model_path": predictor.model_path,
+        "file_mb": round(os.path.getsize(predictor.model_path) / (1024 * 1024), 2),
+        "load_seconds": round(predictor.load_seconds, 3),
+        **latency_ms(predictor),
+    }
+    try:
+        result["accuracy"] = round(accuracy(predictor, validation_generator(spec, (resolution, resolution))), 4)
+    except (FileNotFoundError, OSError) as e:
+        print(f"[WARN] Validation data unavailable ({e}) — skipping accuracy")
+    del predictor
+    return result
+
+
+def recommend(rows: list, max_drop: float):
+    """Lowest-latency resolution whose accuracy is within `max_drop` of the 224 model."""
+    baseline = next((r for r in rows if r["resolution"] == 224 and "accuracy" in r), None)
+    if baseline is None:
+        return None
+    eligible = [r for r in rows if "accuracy" in r and baseline["accuracy"] - r["accuracy"] <= max_drop]
+    return min(eligible, key=lambda r: r["p50_ms"])["resolution"]
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=[*MODELS, "all"], default="all")
+    parser.add_argument("--max-drop", type=float, default=0.01,
+                        help="Accuracy loss vs. 224 tolerated for the recommendation")
+    args = parser.parse_args()
+
+    names = list(MODELS) if args.model == "all" else [args.model]
+    report = {}
+    for name in names:
+        spec = MODELS[name]
+        rows = []
+        for resolution in RESOLUTIONS:
+            path = resolution_artifact_path(spec["model_path"], resolution)
+            if not os.path.isfile(path):
+                print(f"[SKIP] {name} @ {resolution}: {path} not found")
+                continue
+            print(f"[BENCH] {name} @ {resolution}x{resolution}: {path}")
+            rows.append(measure(spec, resolution))
+        if not rows:
+            continue
+
+        report[name] = {"variants": rows, "recommended_resolution": recommend(rows, args.max_drop)}
+        print(f"\n   {name}")
+        print(f"   {'res':>5} {'accuracy':>9} {'p50 ms':>8} {'p95 ms':>8} {'load s':>7} {'MB':>7}")
+        for r in rows:
+            acc = f"{r['accuracy']:.4f}" if "accuracy" in r else "n/a"
+            print(f"   {r['resolution']:>5} {acc:>9} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+                  f"{r['load_seconds']:>7.3f} {r['file_mb']:>7.2f}")
+        if report[name]["recommended_resolution"] is not None:
+            print(f"   → cheapest within {args.max_drop:.1%} of 224: {report[name]['recommended_resolution']}")
+        print()
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
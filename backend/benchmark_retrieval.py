@@ -0,0 +1,227 @@
+"""
+RAG Retrieval Benchmark — vectorised retrieve() vs. the previous per-chunk loop
+
+Grows the knowledge base synthetically (the 47 real chunks replicated with
+clustered unit-norm 384-d embeddings, MiniLM's size, drawn around random
+"topic" centres the way real text embeddings cluster) and times retrieve()
+at each size:
+  - vectorised:  precomputed disease/severity masks + priority-boost vector,
+                 one matrix–vector product, argpartition top-k (rag_engine.retrieve)
+  - legacy:      list filters, all_chunks.index(c) per chunk, np.dot per chunk,
+                 Python sort (the previous implementation; O(n²), so only run
+                 up to --legacy-max chunks)
+
+Query encoding is replaced by a fixed query vector so only retrieval is timed;
+where both run, the two implementations must return the same chunks.
+
+With --ann, the disease-partitioned IVF index (rag_index.py) is built at each
+size and, per --nprobe value, its latency and recall@k against brute force
+are measured over --recall-queries random queries.
+
+Usage:
+    cd backend
+    python benchmark_retrieval.py [--sizes 47,1000,10000,100000] [--runs 50] [--legacy-max 5000]
+                                  [--ann] [--nprobe 4,8,16,32] [--recall-queries 200]
+
+Output:
+    Per-size table printed to stdout
+    models/retrieval_benchmark.json
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+
+import rag_engine
+from rag_index import IVFIndex
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(__file__)
+OUTPUT_PATH = os.path.join(BASE_DIR, "models", "retrieval_benchmark.json")
+EMBED_DIM   = 384
+TOPICS      = 256      # synthetic embedding clusters
+TOP_K       = 8
+QUERIES = [
+    ("coccidiosis", {"severity": "severe", "symptoms": "bloody droppings"}),
+    ("fowlpox", {"severity": "moderate"}),
+    ("bumblefoot", {"severity": "mild"}),
+]
+
+
+class FixedQueryEncoder:
+    """Stands in for MiniLM: returns one precomputed unit vector per query."""
+
+    def __init__(self, dim: int, seed: int = 1):
+        vec = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+        self.vector = vec / np.linalg.norm(vec)
+
+    def encode(self, texts, normalize_embeddings=True):
+        return np.tile(self.vector, (len(texts), 1))
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=-1, keepdims=True)).astype(np.float32)
+
+
+def topic_centres(seed: int = 0) -> np.ndarray:
+    return _unit(np.random.default_rng(seed).standard_normal((TOPICS, EMBED_DIM)))
+
+
+def clustered_vectors(centres: np.ndarray, count: int, rng: np.random.Generator, noise: float = 0.06):
+    topics = rng.integers(0, len(centres), count)
+    return _unit(centres[topics] + noise * rng.standard_normal((count, EMBED_DIM)))
+
+
+def synthetic_kb(base_chunks: list, size: int, seed: int = 0):
+    """`size` chunks cycling through the real ones, plus clustered unit embeddings."""
+    chunks = [
+        {**base_chunks[i % len(base_chunks)], "id": f"{base_chunks[i % len(base_chunks)]['id']}_{i}"}
+        for i in range(size)
+    ]
+    embeddings = clustered_vectors(topic_centres(), size, np.random.default_rng(seed))
+    return chunks, embeddings
+
+
+def legacy_retrieve(chunks, embeddings, model, disease, user_context, top_k=8):
+    """The previous retrieve() scoring path, kept for comparison."""
+    target_disease = disease.lower().strip()
+    filtered = [c for c in chunks if c["disease"] in (target_disease, "general", "healthy")]
+    severity = user_context.get("severity", "moderate").lower()
+    filtered = [c for c in filtered if severity in c.get("severity_applies", ["moderate"])]
+
+    symptoms = user_context.get("symptoms", "")
+    query_emb = model.encode([f"{disease} treatment for {severity} case. {symptoms}".strip()])
+    filtered_indices = [chunks.index(c) for c in filtered]
+    similarities = []
+    for idx, chunk in zip(filtered_indices, filtered):
+        sim = float(np.dot(query_emb[0], embeddings[idx]))
+        priority_boost = 1.0 + (0.1 * (6 - chunk.get("priority", 3)))
+        similarities.append((sim * priority_boost, chunk))
+    similarities.sort(key=lambda x: x[0], reverse=True)
+    return [c for _, c in similarities[:top_k]]
+
+
+def time_ms(fn, runs: int) -> dict:
+    fn()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+    }
+
+
+def benchmark_ann(embeddings, model, nprobes: list, num_queries: int, runs: int) -> dict:
+    """Build the IVF index over the current synthetic KB; latency + recall@k per nprobe."""
+    start = time.perf_counter()
+    index = IVFIndex.build(embeddings, rag_engine._kb_index["disease_masks"])
+    result = {
+        "build_seconds": round(time.perf_counter() - start, 2),
+        "index_mb": round(sum(a.nbytes for part in index.partitions.values() for a in part) / (1024 * 1024), 2),
+        "nprobe": {},
+    }
+
+    rng = np.random.default_rng(7)
+    queries = clustered_vectors(topic_centres(), num_queries, rng)
+    # Distinct query text per vector, so rag_engine's query-embedding cache keys stay unique
+    contexts = [
+        (QUERIES[i % len(QUERIES)][0], {**QUERIES[i % len(QUERIES)][1], "symptoms": f"synthetic query {i}"})
+        for i in range(num_queries)
+    ]
+
+    def run_all(ann: bool):
+        rag_engine.RAG_ANN = "1" if ann else "0"
+        rag_engine._ann_index = index if ann else None
+        ids = []
+        for vector, (disease, ctx) in zip(queries, contexts):
+            model.vector = vector
+            ids.append([c["id"] for c in rag_engine.retrieve(disease, ctx, top_k=TOP_K)])
+        return ids
+
+    exact = run_all(ann=False)
+    for nprobe in nprobes:
+        rag_engine.RAG_ANN_NPROBE = nprobe
+        approx = run_all(ann=True)
+        recall = np.mean([len(set(a) & set(e)) / max(len(e), 1) for a, e in zip(approx, exact)])
+        timing = time_ms(lambda: [rag_engine.retrieve(d, ctx) for d, ctx in QUERIES], runs)
+        result["nprobe"][nprobe] = {
+            f"recall_at_{TOP_K}": round(float(recall), 4),
+            **{k: round(v / len(QUERIES), 4) for k, v in timing.items()},
+        }
+    rag_engine.RAG_ANN = "0"
+    rag_engine._ann_index = None
+    return result
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="47,1000,10000,100000", help="Comma-separated chunk counts")
+    parser.add_argument("--runs", type=int, default=50, help="Repetitions per size (a tenth above --legacy-max)")
+    parser.add_argument("--legacy-max", type=int, default=5000, help="Largest size the O(n²) legacy path runs at")
+    parser.add_argument("--ann", action="store_true", help="Also benchmark the IVF index (latency + recall@k)")
+    parser.add_argument("--nprobe", default="4,8,16,32", help="Comma-separated IVF lists probed per partition")
+    parser.add_argument("--recall-queries", type=int, default=200)
+    args = parser.parse_args()
+
+    base_chunks = list(rag_engine._load_knowledge_base())
+    model = FixedQueryEncoder(EMBED_DIM)
+    rag_engine._embed_model = model
+    rag_engine.RAG_ANN = "0"      # brute force unless benchmarking the index explicitly
+    rag_engine.RAG_RETRIEVER = "dense"    # dense scoring only; BM25 fusion is benchmark_rag_retrievers.py
+
+    results = []
+    print(f"   {'chunks':>8} {'vectorised p50':>15} {'p95':>9} {'legacy p50':>12} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        chunks, embeddings = synthetic_kb(base_chunks, size)
+        rag_engine._knowledge_base = chunks
+        rag_engine._set_kb_index(chunks)
+        rag_engine._embeddings = embeddings
+
+        row = {"chunks": size, "vectorised": {}, "legacy": None}
+        # Fewer repetitions beyond --legacy-max so the largest sizes finish in bounded time
+        runs = max(1, args.runs // 10) if size > args.legacy_max else args.runs
+        row["vectorised"] = time_ms(
+            lambda: [rag_engine.retrieve(d, ctx) for d, ctx in QUERIES], runs
+        )
+        if size <= args.legacy_max:
+            row["legacy"] = time_ms(
+                lambda: [legacy_retrieve(chunks, embeddings, model, d, ctx) for d, ctx in QUERIES], args.runs
+            )
+            row["same_results"] = all(
+                [c["id"] for c in rag_engine.retrieve(d, ctx)]
+                == [c["id"] for c in legacy_retrieve(chunks, embeddings, model, d, ctx)]
+                for d, ctx in QUERIES
+            )
+        # Per query, not per batch of QUERIES
+        for key in ("vectorised", "legacy"):
+            if row[key] is not None:
+                row[key] = {k: round(v / len(QUERIES), 4) for k, v in row[key].items()}
+        results.append(row)
+
+        legacy = f"{row['legacy']['p50_ms']:.3f} ms" if row["legacy"] else "skipped"
+        speedup = f"{row['legacy']['p50_ms'] / row['vectorised']['p50_ms']:.0f}x" if row["legacy"] else ""
+        print(f"   {size:>8} {row['vectorised']['p50_ms']:>12.3f} ms {row['vectorised']['p95_ms']:>6.3f} ms "
+              f"{legacy:>12} {speedup:>8}")
+
+        if args.ann:
+            row["ann"] = benchmark_ann(
+                embeddings, model, [int(n) for n in args.nprobe.split(",")], args.recall_queries, args.runs
+            )
+            for nprobe, r in row["ann"]["nprobe"].items():
+                print(f"   {'':>8}   IVF nprobe={nprobe:<3} p50 {r['p50_ms']:.3f} ms  "
+                      f"recall@{TOP_K} {r[f'recall_at_{TOP_K}']:.3f}")
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump({"embedding_dim": EMBED_DIM, "queries": len(QUERIES), "results": results}, f, indent=2)
+    print(f"\n[OK] Results saved to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
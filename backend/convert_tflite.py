@@ -0,0 +1,268 @@
+"""
+TFLite Conversion Tool — float16 + post-training INT8 artifacts
+
+Converts each Keras .h5 model served by DiseasePredictor into:
+  - <model>.fp16.tflite   float16 weights (≈2x smaller, near-identical accuracy)
+  - <model>.int8.tflite   full INT8 weights + activations, calibrated with a
+                          representative dataset drawn from the training folders
+
+Then compares every artifact against the Keras baseline on the validation
+split: accuracy delta, single-image CPU latency, file size and RSS growth.
+Use the report to pick COCCIDIOSIS_BACKEND / EXTERNAL_LESION_BACKEND and
+TFLITE_VARIANT per model.
+
+Usage:
+    cd backend
+    python convert_tflite.py [--model coccidiosis|external_lesion|all]
+                             [--calibration-images 200] [--threads 2] [--img-size 160|192|224]
+
+--img-size 160/192 converts the model.r<size>.h5 variants written by the
+training scripts' --img-size (calibration and validation at that size).
+
+Datasets expected at (same as the training scripts):
+    backend/Coccidiosis/                              (cocci/, healthy/)
+    backend/Poultry Disease Detection.v9i.folder/     (train/, valid/)
+
+Output:
+    artifacts/training/model.{fp16,int8}.tflite
+    models/external_lesion_model.{fp16,int8}.tflite
+    models/tflite_report.json
+    (--img-size 160: model.r160.{fp16,int8}.tflite, models/tflite_report_r160.json)
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+from tensorflow.keras.preprocessing import image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import (
+    DiseasePredictor,
+    COCCIDIOSIS_RECOMMENDATIONS,
+    EXTERNAL_LESION_RECOMMENDATIONS,
+    resolution_artifact_path,
+    tflite_artifact_path,
+)
+from cnnClassifier.utils.common import get_rss_mb
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(__file__)
+IMG_SIZE    = (224, 224)
+RESOLUTIONS = [160, 192, 224]   # --img-size variants (see train_coccidiosis.py)
+BATCH_SIZE  = 16
+REPORT_PATH = os.path.join(BASE_DIR, "models", "tflite_report.json")
+LESION_ROOT = os.path.join(BASE_DIR, "Poultry Disease Detection.v9i.folder")
+
+MODELS = {
+    "coccidiosis": dict(
+        model_path=os.path.join(BASE_DIR, "artifacts", "training", "model.h5"),
+        class_names=["Coccidiosis", "Healthy"],
+        recommendations=COCCIDIOSIS_RECOMMENDATIONS,
+        calibration_dir=os.path.join(BASE_DIR, "Coccidiosis"),
+        # Same 85/15 split as train_coccidiosis.py
+        validation=dict(
+            directory=os.path.join(BASE_DIR, "Coccidiosis"),
+            datagen_kwargs=dict(validation_split=0.15),
+            flow_kwargs=dict(subset="validation"),
+        ),
+    ),
+    "external_lesion": dict(
+        model_path=os.path.join(BASE_DIR, "models", "external_lesion_model.h5"),
+        class_names=["Bumblefoot", "Fowlpox", "Healthy"],
+        recommendations=EXTERNAL_LESION_RECOMMENDATIONS,
+        calibration_dir=os.path.join(LESION_ROOT, "train"),
+        validation=dict(
+            directory=os.path.join(LESION_ROOT, "valid"),
+            datagen_kwargs=dict(),
+            flow_kwargs=dict(classes=["Bumblefoot", "Fowlpox", "Healthy"]),
+        ),
+    ),
+}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+# ─── Representative Dataset ──────────────────────────────
+def representative_dataset(root: str, num_images: int, image_size: tuple = IMG_SIZE):
+    """
+    Yield calibration samples preprocessed exactly like serving
+    (resize + /255.0), sampled evenly across the class sub-folders.
+    """
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        paths += [os.path.join(dirpath, f) for f in filenames if f.lower().endswith(IMAGE_EXTENSIONS)]
+    if not paths:
+        raise FileNotFoundError(f"No calibration images found under {root}")
+
+    random.Random(42).shuffle(paths)
+    print(f"   Calibrating with {min(num_images, len(paths))} images from {root}")
+
+    def generator():
+        for path in paths[:num_images]:
+            img = image.load_img(path, target_size=image_size)
+            arr = image.img_to_array(img) / 255.0
+            yield [np.expand_dims(arr, axis=0).astype(np.float32)]
+
+    return generator
+
+
+# ─── Conversion ───────────────────────────────────────────
+def convert(keras_model, variant: str, calibration=None) -> bytes:
+    """Convert a Keras model to a float16 or INT8 TFLite flatbuffer."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        # Float I/O keeps the DiseasePredictor contract; everything inside is INT8
+        converter.representative_dataset = calibration
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    else:
+        raise ValueError(f"Unknown TFLite variant: {variant}")
+    return converter.convert()
+
+
+# ─── Evaluation ───────────────────────────────────────────
+def validation_generator(spec: dict, image_size: tuple = IMG_SIZE):
+    val = spec["validation"]
+    datagen = ImageDataGenerator(rescale=1.0 / 255, **val["datagen_kwargs"])
+    return datagen.flow_from_directory(
+        val["directory"],
+        target_size=image_size,
+        batch_size=BATCH_SIZE,
+        class_mode="categorical",
+        interpolation="bilinear",
+        shuffle=False,
+        **val["flow_kwargs"],
+    )
+
+
+def accuracy(predictor: DiseasePredictor, val_gen) -> float:
+    val_gen.reset()
+    correct = total = 0
+    for _ in range(len(val_gen)):
+        x, y = next(val_gen)
+        probs = predictor._run_model(x.astype(np.float32))
+        correct += int(np.sum(np.argmax(probs, axis=1) == np.argmax(y, axis=1)))
+        total += len(y)
+    return correct / max(total, 1)
+
+
+def latency_ms(predictor: DiseasePredictor, runs: int = 50, sample: np.ndarray = None) -> dict:
+    """p50 / p95 single-batch latency; `sample` defaults to one random float32 image."""
+    if sample is None:
+        sample = np.random.rand(1, *predictor.image_size, 3).astype(np.float32)
+    for _ in range(3):
+        predictor._run_model(sample)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predictor._run_model(sample)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 2),
+        "p95_ms": round(float(np.percentile(timings, 95)), 2),
+    }
+
+
+def measure(spec: dict, val_gen, image_size: tuple = IMG_SIZE, **predictor_kwargs) -> dict:
+    """Load one artifact through DiseasePredictor and measure it."""
+    gc.collect()
+    rss_before = get_rss_mb()
+    predictor = DiseasePredictor(
+        class_names=spec["class_names"],
+        recommendations=spec["recommendations"],
+        image_size=image_size,
+        **predictor_kwargs,
+    )
+    predictor.load()
+    result = {
+        "file_mb": round(os.path.getsize(predictor.model_path) / (1024 * 1024), 2),
+        "rss_delta_mb": round(get_rss_mb() - rss_before, 1),
+        **latency_ms(predictor),
+    }
+    if val_gen is not None:
+        result["accuracy"] = round(accuracy(predictor, val_gen), 4)
+    del predictor
+    return result
+
+
+# ─── Main ─────────────────────────────────────────────────
+def process_model(name: str, spec: dict, calibration_images: int, threads: int, resolution: int = 224) -> dict:
+    model_path = resolution_artifact_path(spec["model_path"], resolution)
+    image_size = (resolution, resolution)
+    print(f"\n{'='*60}")
+    print(f"[CONVERT] {name}: {model_path} ({resolution}x{resolution})")
+    print(f"{'='*60}")
+
+    keras_model = tf.keras.models.load_model(model_path, compile=False)
+    artifacts = {}
+    for variant in ("fp16", "int8"):
+        calibration = None
+        if variant == "int8":
+            calibration = representative_dataset(spec["calibration_dir"], calibration_images, image_size)
+        out_path = tflite_artifact_path(model_path, variant)
+        with open(out_path, "wb") as f:
+            f.write(convert(keras_model, variant, calibration))
+        artifacts[variant] = out_path
+        print(f"[OK] {variant} model saved to {out_path}")
+    del keras_model
+    tf.keras.backend.clear_session()
+
+    try:
+        val_gen = validation_generator(spec, image_size)
+    except (FileNotFoundError, OSError) as e:
+        print(f"[WARN] Validation data unavailable ({e}) — skipping accuracy")
+        val_gen = None
+
+    report = {"keras": measure(spec, val_gen, image_size, model_path=model_path)}
+    for variant, path in artifacts.items():
+        report[variant] = measure(
+            spec, val_gen, image_size, model_path=path, backend="tflite", num_threads=threads
+        )
+        if val_gen is not None:
+            report[variant]["accuracy_delta"] = round(
+                report[variant]["accuracy"] - report["keras"]["accuracy"], 4
+            )
+
+    for variant, r in report.items():
+        acc = f"acc={r['accuracy']:.4f}" if "accuracy" in r else "acc=n/a"
+        print(f"   {variant:6s} {acc}  p50={r['p50_ms']:7.2f} ms  p95={r['p95_ms']:7.2f} ms  "
+              f"file={r['file_mb']:7.2f} MB  rss+={r['rss_delta_mb']:7.1f} MB")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=[*MODELS, "all"], default="all")
+    parser.add_argument("--calibration-images", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    parser.add_argument("--img-size", type=int, choices=RESOLUTIONS, default=224,
+                        help="Convert the model.r<size>.h5 variant at this input resolution")
+    args = parser.parse_args()
+
+    names = list(MODELS) if args.model == "all" else [args.model]
+    report = {}
+    for name in names:
+        model_path = resolution_artifact_path(MODELS[name]["model_path"], args.img_size)
+        if not os.path.isfile(model_path):
+            print(f"[SKIP] {name}: model not found at {model_path}")
+            continue
+        report[name] = process_model(name, MODELS[name], args.calibration_images, args.threads, args.img_size)
+
+    out_path = REPORT_PATH if args.img_size == 224 else REPORT_PATH.replace(".json", f"_r{args.img_size}.json")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Report saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
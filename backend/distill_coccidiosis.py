@@ -0,0 +1,264 @@
+"""
+Coccidiosis Detection — Knowledge Distillation (VGG16 teacher → MobileNetV2 student)
+
+The production VGG16 model (~15M params, ~15 GFLOPs per image) is used as a
+frozen teacher. A MobileNetV2 student (~2.4M params, ~0.3 GFLOPs) is trained on
+the same Coccidiosis/ dataset, generators and 85/15 split as
+train_coccidiosis.py, with the classic soft-label objective:
+
+    loss = ALPHA * CE(y_true, student)
+         + (1 - ALPHA) * T² * KL(softmax(teacher / T) || softmax(student / T))
+
+The student is exported with a softmax output so it is a drop-in replacement
+for PredictionPipeline — same input (224x224, /255.0), same class order.
+
+Usage:
+    cd backend
+    python distill_coccidiosis.py
+
+Deploy the student (if its accuracy holds up against the teacher's metrics):
+    COCCIDIOSIS_MODEL=artifacts/training/student_model.h5
+
+Output:
+    artifacts/training/student_model.h5
+    models/coccidiosis_student_metrics.json      (same format as coccidiosis_metrics.json)
+    models/coccidiosis_student_confusion_matrix.png
+    models/distillation_report.json              (teacher vs student size/accuracy)
+"""
+
+import os
+import json
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.applications import MobileNetV2
+from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout, Softmax
+from tensorflow.keras.models import Model
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import Callback, EarlyStopping, ReduceLROnPlateau
+
+from train_coccidiosis import (
+    IMG_SIZE, CLASS_NAMES, LEARNING_RATE, ARTIFACTS_DIR, OUTPUT_DIR,
+    MODEL_PATH as TEACHER_PATH,
+    create_generators, get_class_weights, unfreeze_layers, evaluate_model,
+)
+
+# ─── Config ───────────────────────────────────────────────
+EPOCHS_PHASE1   = 20       # Frozen student backbone
+EPOCHS_PHASE2   = 20       # Fine-tune top of the student backbone
+UNFREEZE_LAYERS = 40       # ≈ last 4 inverted-residual blocks of MobileNetV2
+TEMPERATURE     = 4.0
+ALPHA           = 0.3      # weight of the hard-label loss (1 - ALPHA on the teacher)
+STUDENT_PATH    = os.path.join(ARTIFACTS_DIR, "student_model.h5")
+REPORT_PATH     = os.path.join(OUTPUT_DIR, "distillation_report.json")
+
+
+# ─── Student ──────────────────────────────────────────────
+def build_student():
+    """MobileNetV2 + small head, producing logits (softmax is added at export)."""
+    base = MobileNetV2(
+        input_shape=(*IMG_SIZE, 3),
+        include_top=False,
+        weights="imagenet",
+    )
+    base.trainable = False   # freeze backbone first
+
+    x = base.output
+    x = GlobalAveragePooling2D()(x)
+    x = Dense(128, activation="relu")(x)
+    x = Dropout(0.3)(x)
+    logits = Dense(len(CLASS_NAMES), name="logits")(x)
+    return Model(inputs=base.input, outputs=logits, name="student")
+
+
+def export_student(student) -> Model:
+    """Student logits → probabilities, matching the teacher's output contract."""
+    probs = Softmax(name="probabilities")(student.output)
+    return Model(inputs=student.input, outputs=probs, name="coccidiosis_student")
+
+
+# ─── Distillation ─────────────────────────────────────────
+class Distiller(Model):
+    """Trains `student` against hard labels and the frozen `teacher`'s soft labels."""
+
+    def __init__(self, student, teacher, alpha=ALPHA, temperature=TEMPERATURE):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.teacher.trainable = False
+        self.alpha = alpha
+        self.temperature = temperature
+        self.hard_loss_fn = tf.keras.losses.CategoricalCrossentropy(from_logits=True, label_smoothing=0.1)
+        self.soft_loss_fn = tf.keras.losses.KLDivergence()
+        self.loss_tracker = tf.keras.metrics.Mean(name="loss")
+        self.accuracy_tracker = tf.keras.metrics.CategoricalAccuracy(name="accuracy")
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.accuracy_tracker]
+
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+
+    def _loss(self, y, student_logits, teacher_probs, sample_weight=None):
+        # The teacher ends in softmax; log-probabilities are its logits up to a constant
+        teacher_logits = tf.math.log(tf.clip_by_value(teacher_probs, 1e-7, 1.0))
+        t = self.temperature
+        soft = self.soft_loss_fn(
+            tf.nn.softmax(teacher_logits / t), tf.nn.softmax(student_logits / t),
+            sample_weight=sample_weight,
+        )
+        hard = self.hard_loss_fn(y, student_logits, sample_weight=sample_weight)
+        return self.alpha * hard + (1.0 - self.alpha) * (t ** 2) * soft
+
+    @staticmethod
+    def _unpack(data):
+        if len(data) == 3:
+            return data
+        x, y = data
+        return x, y, None
+
+    def train_step(self, data):
+        x, y, sample_weight = self._unpack(data)
+        teacher_probs = self.teacher(x, training=False)
+        with tf.GradientTape() as tape:
+            student_logits = self.student(x, training=True)
+            loss = self._loss(y, student_logits, teacher_probs, sample_weight)
+        variables = self.student.trainable_variables
+        self.optimizer.apply_gradients(zip(tape.gradient(loss, variables), variables))
+        self.loss_tracker.update_state(loss)
+        self.accuracy_tracker.update_state(y, student_logits)
+        return {m.name: m.result() for m in self.metrics}
+
+    def test_step(self, data):
+        x, y, sample_weight = self._unpack(data)
+        student_logits = self.student(x, training=False)
+        loss = self._loss(y, student_logits, self.teacher(x, training=False), sample_weight)
+        self.loss_tracker.update_state(loss)
+        self.accuracy_tracker.update_state(y, student_logits)
+        return {m.name: m.result() for m in self.metrics}
+
+
+class StudentCheckpoint(Callback):
+    """Save the exported student whenever val_accuracy improves (like ModelCheckpoint)."""
+
+    def __init__(self, student, path):
+        super().__init__()
+        self.student = student
+        self.path = path
+        self.best = -np.inf
+
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get("val_accuracy")
+        if current is not None and current > self.best:
+            print(f"\n   val_accuracy improved {self.best:.4f} → {current:.4f}, saving student to {self.path}")
+            self.best = current
+            export_student(self.student).save(self.path)
+
+
+def fit_phase(distiller, student, train_gen, val_gen, class_weights, epochs, learning_rate, lr_patience):
+    distiller.compile(optimizer=Adam(learning_rate=learning_rate))
+    distiller.fit(
+        train_gen,
+        epochs=epochs,
+        validation_data=val_gen,
+        class_weight=class_weights,
+        callbacks=[
+            EarlyStopping(
+                monitor="val_loss", patience=5,
+                restore_best_weights=True, verbose=1
+            ),
+            ReduceLROnPlateau(
+                monitor="val_loss", factor=0.5,
+                patience=lr_patience, min_lr=1e-8, verbose=1
+            ),
+            StudentCheckpoint(student, STUDENT_PATH),
+        ],
+    )
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    print("=" * 60)
+    print("[DISTILL] Coccidiosis — VGG16 teacher → MobileNetV2 student")
+    print("=" * 60)
+    print(f"   Teacher:  {TEACHER_PATH}")
+    print(f"   Student:  {STUDENT_PATH}")
+    print(f"   T={TEMPERATURE}  alpha={ALPHA}")
+    print()
+
+    if not os.path.isfile(TEACHER_PATH):
+        raise FileNotFoundError(f"Teacher model not found at {TEACHER_PATH} — run train_coccidiosis.py first.")
+    teacher = tf.keras.models.load_model(TEACHER_PATH, compile=False)
+
+    train_gen, val_gen = create_generators()
+    print(f"   Train samples: {train_gen.samples}")
+    print(f"   Val samples:   {val_gen.samples}")
+    class_weights = get_class_weights(train_gen)
+
+    student = build_student()
+    student.summary()
+    distiller = Distiller(student, teacher)
+
+    # ────────── PHASE 1: Frozen student backbone ──────────
+    print(f"\n{'='*60}")
+    print(f"[PHASE 1] Distilling into the student head (backbone frozen)")
+    print(f"          Epochs: {EPOCHS_PHASE1}")
+    print(f"{'='*60}")
+    fit_phase(distiller, student, train_gen, val_gen, class_weights,
+              EPOCHS_PHASE1, LEARNING_RATE * 10, lr_patience=3)
+
+    # ────────── PHASE 2: Fine-tune top of the student backbone ──────────
+    print(f"\n{'='*60}")
+    print(f"[PHASE 2] Fine-tuning last {UNFREEZE_LAYERS} student layers")
+    print(f"          Epochs: {EPOCHS_PHASE2}")
+    print(f"{'='*60}")
+    unfreeze_layers(student, UNFREEZE_LAYERS)
+    fit_phase(distiller, student, train_gen, val_gen, class_weights,
+              EPOCHS_PHASE2, LEARNING_RATE, lr_patience=2)
+
+    # Save final (best-restored) student
+    exported = export_student(student)
+    exported.save(STUDENT_PATH)
+    print(f"\n[OK] Student saved to {STUDENT_PATH}")
+
+    # Evaluate — same metrics JSON / confusion matrix as train_coccidiosis.py
+    metrics = evaluate_model(
+        exported, val_gen, output_name="coccidiosis_student",
+        title="Coccidiosis Detection — Distilled Student Confusion Matrix",
+    )
+    val_gen.reset()
+    teacher_probs = teacher.predict(val_gen, steps=len(val_gen))
+    teacher_accuracy = float(np.mean(np.argmax(teacher_probs, axis=1) == val_gen.classes[:len(teacher_probs)]))
+
+    report = {
+        "teacher": {
+            "path": TEACHER_PATH,
+            "params": int(teacher.count_params()),
+            "file_mb": round(os.path.getsize(TEACHER_PATH) / (1024 * 1024), 2),
+            "val_accuracy": round(teacher_accuracy, 4),
+        },
+        "student": {
+            "path": STUDENT_PATH,
+            "params": int(exported.count_params()),
+            "file_mb": round(os.path.getsize(STUDENT_PATH) / (1024 * 1024), 2),
+            "val_accuracy": round(metrics["accuracy"], 4),
+        },
+        "temperature": TEMPERATURE,
+        "alpha": ALPHA,
+    }
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Distillation report saved to {REPORT_PATH}")
+
+    print(f"\n{'='*60}")
+    print(f"[DONE] Distillation Complete!")
+    print(f"       Teacher accuracy: {teacher_accuracy:.4f}  ({report['teacher']['params']:,} params)")
+    print(f"       Student accuracy: {metrics['accuracy']:.4f}  ({report['student']['params']:,} params)")
+    for name, vals in metrics['per_class'].items():
+        print(f"       {name}: F1={vals['f1-score']:.4f}, Precision={vals['precision']:.4f}, Recall={vals['recall']:.4f}")
+    print(f"\n       Deploy with: COCCIDIOSIS_MODEL={os.path.relpath(STUDENT_PATH, os.path.dirname(__file__) or '.')}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
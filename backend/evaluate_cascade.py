@@ -0,0 +1,148 @@
+"""
+Cascade Evaluation — fast model + VGG16 escalation vs. always running VGG16
+
+Scores the coccidiosis validation split (same 85/15 split as
+train_coccidiosis.py) once with the fast model and once with the full VGG16
+PredictionPipeline model, then replays the confidence-gated cascade for a
+sweep of uncertainty bands:
+
+  - escalation rate   share of images the fast model hands to VGG16
+  - accuracy          cascade vs. fast-only vs. always-VGG16
+  - agreement         how often the cascade matches VGG16's answer
+  - est. latency      fast p50 + escalation rate × VGG16 p50 (per image)
+
+Pick a band and serve it with:
+    CASCADE_FAST_MODEL=artifacts/training/student_model.h5 CASCADE_BAND=0.0,0.9
+
+Usage:
+    cd backend
+    python evaluate_cascade.py [--fast PATH] [--full PATH] [--low 0.0] [--highs 0.7,0.8,0.9,0.95]
+
+Output:
+    Per-band table printed to stdout
+    models/cascade_report.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import DiseasePredictor, COCCIDIOSIS_RECOMMENDATIONS
+from convert_tflite import latency_ms
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR     = os.path.dirname(__file__)
+IMG_SIZE     = (224, 224)
+BATCH_SIZE   = 16
+DATASET_ROOT = os.path.join(BASE_DIR, "Coccidiosis")
+FAST_PATH    = os.path.join(BASE_DIR, "artifacts", "training", "student_model.h5")
+FULL_PATH    = os.path.join(BASE_DIR, "artifacts", "training", "model.h5")
+REPORT_PATH  = os.path.join(BASE_DIR, "models", "cascade_report.json")
+CLASS_NAMES  = ["Coccidiosis", "Healthy"]
+
+
+def load_predictor(model_path: str) -> DiseasePredictor:
+    predictor = DiseasePredictor(
+        model_path=model_path,
+        class_names=CLASS_NAMES,
+        recommendations=COCCIDIOSIS_RECOMMENDATIONS,
+        image_size=IMG_SIZE,
+    )
+    predictor.load()
+    return predictor
+
+
+def validation_generator():
+    datagen = ImageDataGenerator(rescale=1.0 / 255, validation_split=0.15)
+    return datagen.flow_from_directory(
+        DATASET_ROOT,
+        target_size=IMG_SIZE,
+        batch_size=BATCH_SIZE,
+        class_mode="categorical",
+        interpolation="bilinear",
+        subset="validation",
+        shuffle=False,
+    )
+
+
+def score(predictors: dict, val_gen) -> tuple:
+    """Run every predictor over the validation split → ({name: probs}, labels)."""
+    probs = {name: [] for name in predictors}
+    labels = []
+    for _ in range(len(val_gen)):
+        x, y = next(val_gen)
+        labels.append(np.argmax(y, axis=1))
+        for name, predictor in predictors.items():
+            probs[name].append(predictor._run_model(x.astype(np.float32)))
+    return {name: np.concatenate(p) for name, p in probs.items()}, np.concatenate(labels)
+
+
+def replay(fast_probs, full_probs, labels, low: float, high: float) -> dict:
+    """What the cascade would have answered for band [low, high]."""
+    confidence = fast_probs.max(axis=1)
+    escalate = (confidence >= low) & (confidence <= high)
+    preds = np.where(escalate, full_probs.argmax(axis=1), fast_probs.argmax(axis=1))
+    return {
+        "band": [low, high],
+        "escalation_rate": round(float(escalate.mean()), 4),
+        "accuracy": round(float((preds == labels).mean()), 4),
+        "agreement_with_full": round(float((preds == full_probs.argmax(axis=1)).mean()), 4),
+    }
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fast", default=FAST_PATH, help="First-stage model (.h5)")
+    parser.add_argument("--full", default=FULL_PATH, help="Full VGG16 model (.h5)")
+    parser.add_argument("--low", type=float, default=0.0)
+    parser.add_argument("--highs", default="0.6,0.7,0.8,0.9,0.95,0.99",
+                        help="Comma-separated upper band edges to sweep")
+    args = parser.parse_args()
+
+    for path in (args.fast, args.full):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Model not found at {path}")
+
+    predictors = {"fast": load_predictor(args.fast), "full": load_predictor(args.full)}
+    val_gen = validation_generator()
+    print(f"[EVAL] Scoring {val_gen.samples} validation images with both models...")
+    probs, labels = score(predictors, val_gen)
+
+    timings = {name: latency_ms(p) for name, p in predictors.items()}
+    latency = {name: t["p50_ms"] for name, t in timings.items()}
+    report = {
+        "samples": int(len(labels)),
+        "fast_model": args.fast,
+        "full_model": args.full,
+        "fast_only_accuracy": round(float((probs["fast"].argmax(1) == labels).mean()), 4),
+        "full_only_accuracy": round(float((probs["full"].argmax(1) == labels).mean()), 4),
+        **{f"{name}_{k}": v for name, t in timings.items() for k, v in t.items()},
+        "bands": [],
+    }
+    for high in (float(h) for h in args.highs.split(",")):
+        row = replay(probs["fast"], probs["full"], labels, args.low, high)
+        row["est_latency_ms"] = round(latency["fast"] + row["escalation_rate"] * latency["full"], 2)
+        report["bands"].append(row)
+
+    print(f"\n   always VGG16: accuracy {report['full_only_accuracy']:.4f}   {latency['full']:.2f} ms/img")
+    print(f"   fast only:    accuracy {report['fast_only_accuracy']:.4f}   {latency['fast']:.2f} ms/img\n")
+    print(f"   {'band':>14} {'escalated':>10} {'accuracy':>9} {'agree':>7} {'est ms':>8}")
+    for row in report["bands"]:
+        band = f"[{row['band'][0]:g}, {row['band'][1]:g}]"
+        print(f"   {band:>14} {row['escalation_rate']:>10.1%} {row['accuracy']:>9.4f} "
+              f"{row['agreement_with_full']:>7.1%} {row['est_latency_ms']:>8.2f}")
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
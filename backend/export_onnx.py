@@ -0,0 +1,134 @@
+"""
+ONNX Export Tool — Keras .h5 → ONNX for the ONNX Runtime backend
+
+Exports the models used by PredictionPipeline (coccidiosis, VGG16) and the
+external-lesion DiseasePredictor (MobileNetV2) to ONNX with a dynamic batch
+dimension, then checks output parity and CPU latency against Keras through
+the same DiseasePredictor code path the server uses.
+
+Serve an exported model with:
+    COCCIDIOSIS_BACKEND=onnx / EXTERNAL_LESION_BACKEND=onnx  [ONNX_NUM_THREADS=2]
+
+Usage:
+    cd backend
+    pip install tf2onnx onnxruntime
+    python export_onnx.py [--model coccidiosis|external_lesion|all] [--opset 17] [--img-size 160|192|224]
+
+--img-size 160/192 exports the model.r<size>.h5 variants written by the
+training scripts' --img-size (served with *_RESOLUTION=<size>).
+
+Output:
+    artifacts/training/model.onnx
+    models/external_lesion_model.onnx
+    models/onnx_report.json
+    (--img-size 160: model.r160.onnx, models/onnx_report_r160.json)
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import tensorflow as tf
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import DiseasePredictor, onnx_artifact_path, resolution_artifact_path
+from convert_tflite import MODELS, IMG_SIZE, RESOLUTIONS, latency_ms
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(__file__)
+REPORT_PATH = os.path.join(BASE_DIR, "models", "onnx_report.json")
+PARITY_ATOL = 1e-4
+
+
+# ─── Export ───────────────────────────────────────────────
+def export(model_path: str, opset: int, image_size: tuple = IMG_SIZE) -> str:
+    """Trace the Keras model and write it as ONNX with a dynamic batch dimension."""
+    import tf2onnx
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    spec = (tf.TensorSpec((None, *image_size, 3), tf.float32, name="input"),)
+
+    @tf.function(input_signature=spec)
+    def serve(batch):
+        return model(batch, training=False)
+
+    out_path = onnx_artifact_path(model_path)
+    tf2onnx.convert.from_function(serve, input_signature=spec, opset=opset, output_path=out_path)
+    print(f"[OK] ONNX model saved to {out_path}")
+    return out_path
+
+
+# ─── Verification ─────────────────────────────────────────
+def load_predictor(spec: dict, image_size: tuple = IMG_SIZE, **kwargs) -> DiseasePredictor:
+    predictor = DiseasePredictor(
+        class_names=spec["class_names"],
+        recommendations=spec["recommendations"],
+        image_size=image_size,
+        **kwargs,
+    )
+    predictor.load()
+    return predictor
+
+
+def verify(spec: dict, model_path: str, onnx_path: str, threads: int, image_size: tuple = IMG_SIZE) -> dict:
+    keras_predictor = load_predictor(spec, image_size, model_path=model_path)
+    onnx_predictor = load_predictor(spec, image_size, model_path=onnx_path, backend="onnx", num_threads=threads)
+
+    batch = np.random.rand(8, *image_size, 3).astype(np.float32)
+    keras_probs = keras_predictor._run_model(batch)
+    onnx_probs = onnx_predictor._run_model(batch)
+    max_diff = float(np.max(np.abs(keras_probs - onnx_probs)))
+
+    return {
+        "max_abs_diff": max_diff,
+        "argmax_agreement": float(np.mean(keras_probs.argmax(1) == onnx_probs.argmax(1))),
+        "parity_ok": max_diff <= PARITY_ATOL,
+        **{f"keras_{k}": v for k, v in latency_ms(keras_predictor).items()},
+        **{f"onnx_{k}": v for k, v in latency_ms(onnx_predictor).items()},
+        "onnx_file_mb": round(os.path.getsize(onnx_path) / (1024 * 1024), 2),
+    }
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=[*MODELS, "all"], default="all")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--threads", type=int, default=None, help="ONNX Runtime intra-op threads")
+    parser.add_argument("--img-size", type=int, choices=RESOLUTIONS, default=224,
+                        help="Export the model.r<size>.h5 variant at this input resolution")
+    args = parser.parse_args()
+
+    image_size = (args.img_size, args.img_size)
+    names = list(MODELS) if args.model == "all" else [args.model]
+    report = {}
+    for name in names:
+        spec = MODELS[name]
+        model_path = resolution_artifact_path(spec["model_path"], args.img_size)
+        if not os.path.isfile(model_path):
+            print(f"[SKIP] {name}: model not found at {model_path}")
+            continue
+
+        print(f"\n{'='*60}")
+        print(f"[EXPORT] {name}: {model_path} ({args.img_size}x{args.img_size})")
+        print(f"{'='*60}")
+        onnx_path = export(model_path, args.opset, image_size)
+        report[name] = verify(spec, model_path, onnx_path, args.threads, image_size)
+
+        r = report[name]
+        status = "OK" if r["parity_ok"] else "WARN"
+        print(f"[{status}] max |keras - onnx| = {r['max_abs_diff']:.2e}  "
+              f"(argmax agreement {r['argmax_agreement']:.0%})")
+        print(f"       p50 latency: keras {r['keras_p50_ms']} ms → onnx {r['onnx_p50_ms']} ms")
+
+    out_path = REPORT_PATH if args.img_size == 224 else REPORT_PATH.replace(".json", f"_r{args.img_size}.json")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Report saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+uint8 Serving Export — fold the /255.0 rescaling into the model graph
+
+Wraps each trained model as  uint8 image → Rescaling(1/255) → original model
+and saves it next to the original as foo.uint8.h5. The server then feeds the
+decoded uint8 pixel buffer directly (4x smaller than the float32 copy that
+img_to_array() / 255.0 produced) and the normalization runs inside the traced
+serving graph.
+
+A parity check compares the uint8 artifact against the current float32 path
+on the same decoded images (real images from the dataset folders when
+present, random pixels otherwise), plus p50 latency for both.
+
+Serve the exported models with:
+    SERVING_UINT8=1   (keras backend)
+
+Usage:
+    cd backend
+    python export_uint8.py [--model coccidiosis|external_lesion|all] [--samples 32] [--img-size 160|192|224]
+
+--img-size 160/192 wraps the model.r<size>.h5 variants written by the
+training scripts' --img-size (served with *_RESOLUTION=<size>).
+
+Output:
+    artifacts/training/model.uint8.h5
+    models/external_lesion_model.uint8.h5
+    models/uint8_report.json
+    (--img-size 160: model.r160.uint8.h5, models/uint8_report_r160.json)
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import numpy as np
+import tensorflow as tf
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import (
+    DiseasePredictor,
+    decode_image,
+    resolution_artifact_path,
+    uint8_artifact_path,
+)
+from convert_tflite import MODELS, IMG_SIZE, RESOLUTIONS, IMAGE_EXTENSIONS, latency_ms
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR    = os.path.dirname(__file__)
+REPORT_PATH = os.path.join(BASE_DIR, "models", "uint8_report.json")
+PARITY_ATOL = 1e-5
+
+
+# ─── Export ───────────────────────────────────────────────
+def build_uint8_model(model: tf.keras.Model, image_size: tuple = IMG_SIZE) -> tf.keras.Model:
+    """uint8 (N, H, W, 3) input → Rescaling(1/255) → the trained model."""
+    inputs = tf.keras.Input(shape=(*image_size, 3), dtype="uint8", name="image_uint8")
+    x = tf.keras.layers.Rescaling(1.0 / 255, name="rescale")(inputs)
+    outputs = model(x, training=False)
+    return tf.keras.Model(inputs, outputs, name=f"{model.name}_uint8")
+
+
+def export(model_path: str, image_size: tuple = IMG_SIZE) -> str:
+    model = tf.keras.models.load_model(model_path, compile=False)
+    out_path = uint8_artifact_path(model_path)
+    build_uint8_model(model, image_size).save(out_path)
+    print(f"[OK] uint8 serving model saved to {out_path}")
+    return out_path
+
+
+# ─── Verification ─────────────────────────────────────────
+def sample_pixels(sample_dir: str, count: int, image_size: tuple = IMG_SIZE) -> np.ndarray:
+    """Decode `count` images exactly like serving, as uint8 (N, H, W, 3)."""
+    paths = []
+    if os.path.isdir(sample_dir):
+        for dirpath, _, filenames in os.walk(sample_dir):
+            paths += [os.path.join(dirpath, f) for f in filenames if f.lower().endswith(IMAGE_EXTENSIONS)]
+    if not paths:
+        print(f"   No images under {sample_dir} — using random pixels")
+        return np.random.default_rng(0).integers(0, 256, size=(count, *image_size, 3), dtype=np.uint8)
+
+    random.Random(42).shuffle(paths)
+    print(f"   Checking parity on {min(count, len(paths))} images from {sample_dir}")
+    return np.stack([np.asarray(decode_image(p, image_size)) for p in paths[:count]])
+
+
+def verify(spec: dict, model_path: str, uint8_path: str, samples: int, image_size: tuple = IMG_SIZE) -> dict:
+    common = dict(class_names=spec["class_names"], recommendations=spec["recommendations"], image_size=image_size)
+    float_predictor = DiseasePredictor(model_path=model_path, **common)
+    uint8_predictor = DiseasePredictor(model_path=uint8_path, input_dtype="uint8", **common)
+    float_predictor.load()
+    uint8_predictor.load()
+
+    # Validation folders from convert_tflite.MODELS (Coccidiosis/, Poultry .../valid/)
+    pixels = sample_pixels(spec["validation"]["directory"], samples, image_size)
+    float_pixels = pixels.astype(np.float32) / 255.0
+    float_probs = float_predictor._run_model(float_pixels)
+    uint8_probs = uint8_predictor._run_model(pixels)
+    max_diff = float(np.max(np.abs(float_probs - uint8_probs)))
+
+    return {
+        "samples": int(len(pixels)),
+        "max_abs_diff": max_diff,
+        "argmax_agreement": float(np.mean(float_probs.argmax(1) == uint8_probs.argmax(1))),
+        "parity_ok": max_diff <= PARITY_ATOL,
+        "input_bytes_per_image": {"float32": int(pixels[0].size * 4), "uint8": int(pixels[0].size)},
+        **{f"float32_{k}": v for k, v in latency_ms(float_predictor, sample=float_pixels[:1]).items()},
+        **{f"uint8_{k}": v for k, v in latency_ms(uint8_predictor, sample=pixels[:1]).items()},
+    }
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=[*MODELS, "all"], default="all")
+    parser.add_argument("--samples", type=int, default=32, help="Images used for the parity check")
+    parser.add_argument("--img-size", type=int, choices=RESOLUTIONS, default=224,
+                        help="Export the model.r<size>.h5 variant at this input resolution")
+    args = parser.parse_args()
+
+    image_size = (args.img_size, args.img_size)
+    names = list(MODELS) if args.model == "all" else [args.model]
+    report = {}
+    for name in names:
+        spec = MODELS[name]
+        model_path = resolution_artifact_path(spec["model_path"], args.img_size)
+        if not os.path.isfile(model_path):
+            print(f"[SKIP] {name}: model not found at {model_path}")
+            continue
+
+        print(f"\n{'='*60}")
+        print(f"[EXPORT] {name}: {model_path} ({args.img_size}x{args.img_size})")
+        print(f"{'='*60}")
+        uint8_path = export(model_path, image_size)
+        report[name] = verify(spec, model_path, uint8_path, args.samples, image_size)
+
+        r = report[name]
+        status = "OK" if r["parity_ok"] else "WARN"
+        print(f"[{status}] max |float32 - uint8| = {r['max_abs_diff']:.2e}  "
+              f"(argmax agreement {r['argmax_agreement']:.0%})")
+        print(f"       p50 latency: float32 {r['float32_p50_ms']} ms → uint8 {r['uint8_p50_ms']} ms")
+
+    out_path = REPORT_PATH if args.img_size == 224 else REPORT_PATH.replace(".json", f"_r{args.img_size}.json")
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Report saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for the ChickTech backend.
+
+Default behaviour matches the old Procfile (`gunicorn app:app --bind
+0.0.0.0:$PORT --timeout 120`). Set PRELOAD_MODELS=1 to load the app — and
+every fork-safe model — once in the master so workers share the weight
+pages copy-on-write instead of each holding a private copy:
+
+    PRELOAD_MODELS=1 WEB_CONCURRENCY=4 \\
+    COCCIDIOSIS_BACKEND=tflite EXTERNAL_LESION_BACKEND=tflite TFLITE_NUM_THREADS=1 \\
+    gunicorn -c gunicorn.conf.py app:app
+
+GUNICORN_THREADS (default 1) serves that many requests concurrently per
+worker with the gthread worker class; /diagnose sizes its model pool to match.
+
+Keras backends still work in this mode but are loaded per worker after the
+fork (TensorFlow is not fork-safe). Measure the effect with
+measure_worker_memory.py.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+timeout = 120
+threads = max(1, int(os.getenv("GUNICORN_THREADS", "1")))
+preload_app = os.getenv("PRELOAD_MODELS", "0") == "1"
+
+
+def when_ready(server):
+    """Master: the app module is already imported (preload) — load shared models before forking."""
+    if preload_app:
+        import app
+        app.clApp.preload_shared()
+
+
+def post_fork(server, worker):
+    """Worker: reset per-process thread state inherited from the master."""
+    if preload_app:
+        import app
+        app.clApp.after_fork()
@@ -0,0 +1,133 @@
+"""
+Per-Worker Memory Measurement — with and without PRELOAD_MODELS
+
+Launches gunicorn (gunicorn.conf.py) twice — PRELOAD_MODELS=0 then =1 —
+with EAGER_WARMUP=1 so every worker has its models resident, waits until
+/health reports ready, and reads /proc/<pid>/smaps_rollup for the master
+and each worker:
+
+  - RSS   resident set (counts shared pages in every process)
+  - PSS   proportional share (shared pages divided among sharers)
+  - USS   unique/private memory (what each extra worker really costs)
+
+Linux only. Any extra environment (backends, threads) is passed through,
+so run it with the configuration you deploy, e.g.:
+
+    cd backend
+    COCCIDIOSIS_BACKEND=tflite EXTERNAL_LESION_BACKEND=tflite TFLITE_NUM_THREADS=1 \\
+        python measure_worker_memory.py --workers 3
+
+Output:
+    Per-process table printed to stdout
+    models/worker_memory.json
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import urllib.request
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR     = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_PATH  = os.path.join(BASE_DIR, "models", "worker_memory.json")
+READY_TIMEOUT_S = 600
+
+
+def smaps_rollup_mb(pid: int) -> dict:
+    """RSS / PSS / USS of one process in MB from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[0].endswith(":"):
+                fields[parts[0][:-1]] = int(parts[1])   # kB
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / 1024, 1),
+        "pss_mb": round(fields.get("Pss", 0) / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_until_ready(port: int, workers: int):
+    """Poll /health until several consecutive answers (hitting different workers) are 200."""
+    deadline = time.time() + READY_TIMEOUT_S
+    consecutive = 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as r:
+                consecutive = consecutive + 1 if r.status == 200 else 0
+        except Exception:
+            consecutive = 0
+        if consecutive >= workers * 3:
+            return
+        time.sleep(1)
+    raise TimeoutError("Workers did not become ready in time")
+
+
+def measure(preload: bool, workers: int, port: int) -> dict:
+    env = {
+        **os.environ,
+        "PRELOAD_MODELS": "1" if preload else "0",
+        "EAGER_WARMUP": "1",
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+    }
+    print(f"\n[RUN] PRELOAD_MODELS={env['PRELOAD_MODELS']} workers={workers}")
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=BASE_DIR, env=env,
+    )
+    try:
+        wait_until_ready(port, workers)
+        time.sleep(5)   # let lazily-loaded per-worker state settle
+        result = {"master": smaps_rollup_mb(master.pid), "workers": []}
+        for pid in child_pids(master.pid):
+            result["workers"].append({"pid": pid, **smaps_rollup_mb(pid)})
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=60)
+
+    ws = result["workers"]
+    result["avg_worker_uss_mb"] = round(sum(w["uss_mb"] for w in ws) / max(len(ws), 1), 1)
+    result["total_pss_mb"] = round(result["master"]["pss_mb"] + sum(w["pss_mb"] for w in ws), 1)
+
+    print(f"   master      rss={result['master']['rss_mb']:8.1f}  pss={result['master']['pss_mb']:8.1f}  uss={result['master']['uss_mb']:8.1f} MB")
+    for w in ws:
+        print(f"   worker {w['pid']:<5d}rss={w['rss_mb']:8.1f}  pss={w['pss_mb']:8.1f}  uss={w['uss_mb']:8.1f} MB")
+    print(f"   avg worker USS: {result['avg_worker_uss_mb']} MB   total PSS: {result['total_pss_mb']} MB")
+    return result
+
+
+# ─── Main ─────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    report = {
+        "before": measure(preload=False, workers=args.workers, port=args.port),
+        "after": measure(preload=True, workers=args.workers, port=args.port),
+    }
+    saved = report["before"]["avg_worker_uss_mb"] - report["after"]["avg_worker_uss_mb"]
+    report["uss_saved_per_worker_mb"] = round(saved, 1)
+    print(f"\n[RESULT] Unique memory saved per worker with preload: {saved:.1f} MB")
+
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[OK] Report saved to {OUTPUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Structured Pruning — smaller VGG16 / MobileNetV2 artifacts for faster cold starts
+
+Removes whole filters / units (ranked by L1 weight magnitude) from the late
+conv blocks and the hidden Dense layers of each trained model, then rebuilds
+the network with physically smaller layers: every consumer of a pruned tensor
+(BatchNorm, depthwise conv, the next conv/Dense kernel) is sliced to match.
+Unlike zeroing weights, this shrinks the .h5 file, the TFLite flatbuffer and
+the FLOPs. The pruned model is fine-tuned briefly with the training script's
+own generators, then exported and compared against the original.
+
+  coccidiosis      VGG16        block5_conv1..3 + Dense head
+  external_lesion  MobileNetV2  block_13..16 expand convs + Conv_1 + Dense head
+
+Serve the pruned models with:
+    COCCIDIOSIS_MODEL=artifacts/training/model.pruned.h5
+    EXTERNAL_LESION_MODEL=models/external_lesion_model.pruned.h5
+(the TFLite / ONNX / uint8 backends derive their artifacts from those paths)
+
+Usage:
+    cd backend
+    python prune_models.py [--model coccidiosis|external_lesion|all]
+                           [--conv-ratio 0.5] [--dense-ratio 0.5] [--epochs 3] [--threads 2]
+
+Output:
+    artifacts/training/model.pruned.h5 (+ .pruned.fp16.tflite)
+    models/external_lesion_model.pruned.h5 (+ .pruned.fp16.tflite)
+    models/pruning_report.json   (params, file size, load time, latency, accuracy — before/after)
+"""
+
+import os
+import sys
+import gc
+import json
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import BatchNormalization, Conv2D, Dense, DepthwiseConv2D, Flatten, Reshape
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import EarlyStopping
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import DiseasePredictor, pruned_artifact_path, tflite_artifact_path
+from convert_tflite import MODELS, IMG_SIZE, convert, validation_generator, accuracy, latency_ms
+
+# ─── Config ───────────────────────────────────────────────
+BASE_DIR        = os.path.dirname(__file__)
+REPORT_PATH     = os.path.join(BASE_DIR, "models", "pruning_report.json")
+FINETUNE_EPOCHS = 3
+FINETUNE_LR     = 1e-5
+
+# Conv layers whose output filters are pruned. Only layers whose output does
+# not feed a residual Add (MobileNetV2 expand convs, VGG16 convs, Conv_1).
+PRUNE_PLANS = {
+    "coccidiosis": dict(
+        conv_layers=["block5_conv1", "block5_conv2", "block5_conv3"],
+        conv_ratio=0.5,
+        dense_ratio=0.5,
+    ),
+    "external_lesion": dict(
+        conv_layers=[f"block_{i}_expand" for i in range(13, 17)] + ["Conv_1"],
+        conv_ratio=0.5,
+        dense_ratio=0.5,
+    ),
+}
+
+
+# ─── Pruning ──────────────────────────────────────────────
+def _kept_indices(kernel: np.ndarray, ratio: float) -> np.ndarray:
+    """Output filters/units to keep: the (1 - ratio) share with the largest L1 norm."""
+    n_out = kernel.shape[-1]
+    n_keep = max(1, int(round(n_out * (1.0 - ratio))))
+    norms = np.abs(kernel).reshape(-1, n_out).sum(axis=0)
+    return np.sort(np.argsort(norms)[-n_keep:])
+
+
+def prune_model(model: tf.keras.Model, targets: dict) -> tf.keras.Model:
+    """
+    Rebuild `model` with the output channels of each layer in `targets`
+    ({layer name: prune ratio}) removed, slicing every downstream layer that
+    consumes them. Raises ValueError if pruned channels reach a merge (Add)
+    or a reshape, where the channel mapping is no longer one-to-one.
+    """
+    kept = {}   # id(new tensor) → channel indices it carries
+
+    def call(layer, *args, **kwargs):
+        original = model.get_layer(layer.name)
+        tensors = tf.nest.flatten((args, kwargs))
+        in_keeps = [kept[id(t)] for t in tensors if id(t) in kept]
+        if not in_keeps and layer.name not in targets:
+            # clone_model re-creates layers from config; carry the trained weights over
+            outputs = layer(*args, **kwargs)
+            layer.set_weights(original.get_weights())
+            return outputs
+
+        if in_keeps and (len(tf.nest.flatten(args)) > 1 or isinstance(original, (Flatten, Reshape))):
+            raise ValueError(f"Pruned channels reach '{layer.name}' ({type(original).__name__}); "
+                             "only prune layers whose output is consumed channel-wise.")
+        in_keep = in_keeps[0] if in_keeps else None
+        weights = original.get_weights()
+        config = original.get_config()
+        out_keep = None
+
+        if isinstance(original, DepthwiseConv2D):
+            weights = [w[:, :, in_keep] if w.ndim == 4 else w[in_keep] for w in weights]
+            out_keep = in_keep
+        elif isinstance(original, (Conv2D, Dense)):
+            kernel, rest = weights[0], weights[1:]
+            if in_keep is not None:
+                kernel = np.take(kernel, in_keep, axis=-2)
+            if layer.name in targets:
+                out_keep = _kept_indices(kernel, targets[layer.name])
+                kernel = kernel[..., out_keep]
+                rest = [w[out_keep] for w in rest]
+                config["filters" if isinstance(original, Conv2D) else "units"] = len(out_keep)
+            weights = [kernel, *rest]
+        elif isinstance(original, BatchNormalization):
+            weights = [w[in_keep] for w in weights]
+            out_keep = in_keep
+        elif not weights:
+            out_keep = in_keep   # channel-wise op: activation, dropout, pooling, padding
+        else:
+            raise ValueError(f"Cannot slice pruned channels into '{layer.name}' ({type(original).__name__}).")
+
+        new_layer = type(original).from_config(config)
+        outputs = new_layer(*args, **kwargs)
+        new_layer.set_weights(weights)
+        if out_keep is not None:
+            kept[id(outputs)] = out_keep
+        return outputs
+
+    return tf.keras.models.clone_model(model, call_function=call)
+
+
+def prune_targets(model: tf.keras.Model, plan: dict) -> dict:
+    """{layer name: ratio} — the plan's conv layers plus every Dense except the classifier."""
+    targets = {name: plan["conv_ratio"] for name in plan["conv_layers"] if plan["conv_ratio"] > 0}
+    dense_layers = [layer for layer in model.layers if isinstance(layer, Dense)]
+    if plan["dense_ratio"] > 0:
+        targets.update({layer.name: plan["dense_ratio"] for layer in dense_layers[:-1]})
+    missing = [name for name in targets if name not in {layer.name for layer in model.layers}]
+    if missing:
+        raise ValueError(f"Layers not found in model: {missing}")
+    return targets
+
+
+# ─── Fine-tuning ──────────────────────────────────────────
+def training_generators(name: str):
+    """(train, validation) generators + class weights from the model's own training script."""
+    if name == "coccidiosis":
+        from train_coccidiosis import create_generators, get_class_weights
+        train_gen, val_gen = create_generators()
+    else:
+        from train_external_lesion import create_generators, get_class_weights
+        train_gen, val_gen, _ = create_generators()
+    return train_gen, val_gen, get_class_weights(train_gen)
+
+
+def fine_tune(model, targets: dict, name: str, epochs: int):
+    """Retrain from the first pruned layer onward (BatchNorm stays frozen, like unfreeze_layers)."""
+    names = [layer.name for layer in model.layers]
+    start = min(names.index(target) for target in targets)
+    for i, layer in enumerate(model.layers):
+        layer.trainable = i >= start and not isinstance(layer, BatchNormalization)
+
+    train_gen, val_gen, class_weights = training_generators(name)
+    model.compile(
+        optimizer=Adam(learning_rate=FINETUNE_LR),
+        loss=tf.keras.losses.CategoricalCrossentropy(label_smoothing=0.1),
+        metrics=["accuracy"],
+    )
+    model.fit(
+        train_gen,
+        epochs=epochs,
+        validation_data=val_gen,
+        class_weight=class_weights,
+        callbacks=[
+            EarlyStopping(
+                monitor="val_loss", patience=2,
+                restore_best_weights=True, verbose=1
+            ),
+        ],
+    )
+
+
+# ─── Measurement ──────────────────────────────────────────
+def measure(spec: dict, val_gen, params=None, **predictor_kwargs) -> dict:
+    """Load one artifact through DiseasePredictor: size, load time, latency, accuracy."""
+    gc.collect()
+    predictor = DiseasePredictor(
+        class_names=spec["class_names"],
+        recommendations=spec["recommendations"],
+        image_size=IMG_SIZE,
+        **predictor_kwargs,
+    )
+    predictor.load()
+    result = {
+        "file_mb": round(os.path.getsize(predictor.model_path) / (1024 * 1024), 2),
+        "load_seconds": round(predictor.load_seconds, 3),
+        **latency_ms(predictor),
+    }
+    if params is not None:
+        result["params"] = int(params)
+    if val_gen is not None:
+        result["accuracy"] = round(accuracy(predictor, val_gen), 4)
+    del predictor
+    return result
+
+
+# ─── Main ─────────────────────────────────────────────────
+def process_model(name: str, spec: dict, plan: dict, epochs: int, threads: int) -> dict:
+    print(f"\n{'='*60}")
+    print(f"[PRUNE] {name}: {spec['model_path']}")
+    print(f"{'='*60}")
+
+    model = tf.keras.models.load_model(spec["model_path"], compile=False)
+    targets = prune_targets(model, plan)
+    pruned = prune_model(model, targets)
+    original_params = model.count_params()
+    print(f"   Pruned {len(targets)} layers: {original_params:,} → {pruned.count_params():,} params")
+    del model
+
+    if epochs > 0:
+        fine_tune(pruned, targets, name, epochs)
+
+    pruned_path = pruned_artifact_path(spec["model_path"])
+    pruned.save(pruned_path)
+    print(f"[OK] Pruned model saved to {pruned_path}")
+    tflite_path = tflite_artifact_path(pruned_path, "fp16")
+    with open(tflite_path, "wb") as f:
+        f.write(convert(pruned, "fp16"))
+    print(f"[OK] Pruned fp16 TFLite model saved to {tflite_path}")
+    pruned_params = pruned.count_params()
+    del pruned
+    tf.keras.backend.clear_session()
+
+    try:
+        val_gen = validation_generator(spec)
+    except (FileNotFoundError, OSError) as e:
+        print(f"[WARN] Validation data unavailable ({e}) — skipping accuracy")
+        val_gen = None
+
+    report = {
+        "pruned_layers": targets,
+        "original": measure(spec, val_gen, params=original_params, model_path=spec["model_path"]),
+        "pruned": measure(spec, val_gen, params=pruned_params, model_path=pruned_path),
+        "pruned_fp16_tflite": measure(spec, val_gen, model_path=tflite_path, backend="tflite", num_threads=threads),
+    }
+    for variant, r in report.items():
+        if variant == "pruned_layers":
+            continue
+        acc = f"acc={r['accuracy']:.4f}" if "accuracy" in r else "acc=n/a"
+        print(f"   {variant:18s} {acc}  p50={r['p50_ms']:7.2f} ms  file={r['file_mb']:7.2f} MB  "
+              f"load={r['load_seconds']:6.3f} s")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=[*PRUNE_PLANS, "all"], default="all")
+    parser.add_argument("--conv-ratio", type=float, default=None, help="Share of filters removed per pruned conv")
+    parser.add_argument("--dense-ratio", type=float, default=None, help="Share of units removed per hidden Dense")
+    parser.add_argument("--epochs", type=int, default=FINETUNE_EPOCHS, help="Fine-tuning epochs (0 = none)")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    args = parser.parse_args()
+
+    names = list(PRUNE_PLANS) if args.model == "all" else [args.model]
+    report = {}
+    for name in names:
+        spec = MODELS[name]
+        if not os.path.isfile(spec["model_path"]):
+            print(f"[SKIP] {name}: model not found at {spec['model_path']}")
+            continue
+        plan = dict(PRUNE_PLANS[name])
+        if args.conv_ratio is not None:
+            plan["conv_ratio"] = args.conv_ratio
+        if args.dense_ratio is not None:
+            plan["dense_ratio"] = args.dense_ratio
+        report[name] = process_model(name, spec, plan, args.epochs, args.threads)
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[OK] Report saved to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,83 @@
 """
 RAG Engine for Dynamic Treatment Plan Generation.
 
-Uses sentence-transformers for retrieval and Google Gemini for generation,
-with OpenAI as secondary and template-based fallback when APIs are unavailable.
+Uses sentence-transformers + BM25 (reciprocal-rank fusion) for retrieval and
+Google Gemini for generation, with OpenAI as secondary and template-based
+fallback when APIs are unavailable. Without sentence-transformers (or with
+RAG_RETRIEVER=lexical) retrieval is BM25 alone (rag_lexical.py).
+
+Chunk embeddings are cached on disk next to the knowledge base, keyed by a
+hash of the chunk texts and the embedding model, and memory-mapped on load.
+For large knowledge bases an IVF index (rag_index.py), partitioned by
+disease, replaces brute-force scoring and is saved beside the KB as well.
+Prebuild both at image build time with:
+    python rag_engine.py --prebuild-embeddings
 """
 
 import os
 import json
+import time
+import re
 import hashlib
+import argparse
+import threading
 import numpy as np
 from typing import List, Dict, Any, Optional
 from cachetools import LRUCache
 
+from rag_index import IVFIndex
+from rag_lexical import BM25Index
+
 # ─── Globals (initialised lazily) ─────────────────────────────────────────────
 _knowledge_base: Optional[List[Dict]] = None
+_kb_index: Optional[Dict[str, Any]] = None
 _embeddings: Optional[np.ndarray] = None
+_embeddings_version: Optional[str] = None
+_ann_index: Optional[IVFIndex] = None
 _embed_model = None
+_embed_model_released = False    # unloaded by the model manager; only warmup() reloads it
 _gemini_model = None
 
 # LRU cache for generated plans (key: hash of disease + context)
 _plan_cache = LRUCache(maxsize=50)
 
+# LRU cache for query embeddings (key: normalized query text); disease × severity
+# queries without symptoms are pre-encoded by warmup()
+_query_cache = LRUCache(maxsize=int(os.getenv("RAG_QUERY_CACHE_SIZE", "512")))
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {"hits": 0, "misses": 0}
+
+# Common disease names → knowledge-base disease ids
+DISEASE_ALIASES = {
+    "coccidiosis": "coccidiosis",
+    "fowlpox": "fowlpox",
+    "bumblefoot": "bumblefoot",
+    "coryza": "coryza",
+    "newcastle": "newcastle",
+    "mareks": "mareks",
+    "marek's": "mareks",
+    "avian_influenza": "avian_influenza",
+    "bird_flu": "avian_influenza",
+    "healthy": "healthy",
+}
+
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+KB_PATH = os.path.join(os.path.dirname(__file__), "knowledge_base.json")
+# Sidecar embedding cache: <name>.npy (float32 matrix) + <name>.json (content key)
+EMBEDDINGS_CACHE_PATH = os.getenv(
+    "RAG_EMBEDDINGS_CACHE", os.path.join(os.path.dirname(__file__), "knowledge_base.embeddings.npy")
+)
+# "hybrid" = dense + BM25 fused by reciprocal rank, "dense" = embeddings only,
+# "lexical" = BM25 only (never loads sentence-transformers / torch)
+RAG_RETRIEVER = os.getenv("RAG_RETRIEVER", "hybrid").lower()
+RAG_RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+RAG_FUSION_DEPTH = int(os.getenv("RAG_FUSION_DEPTH", "50"))   # ranks taken from each retriever before fusion
+# Approximate nearest-neighbour search: "auto" enables it from RAG_ANN_MIN_CHUNKS chunks, "1"/"0" force it
+RAG_ANN = os.getenv("RAG_ANN", "auto").lower()
+RAG_ANN_MIN_CHUNKS = int(os.getenv("RAG_ANN_MIN_CHUNKS", "5000"))
+RAG_ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", "8"))      # IVF lists scanned per disease partition
+ANN_INDEX_PATH = os.getenv("RAG_ANN_INDEX", os.path.join(os.path.dirname(__file__), "knowledge_base.ann.npz"))
+
 # ─── Knowledge Base ──────────────────────────────────────────────────────────
 
 def _load_knowledge_base() -> List[Dict]:
@@ -29,47 +86,258 @@ def _load_knowledge_base() -> List[Dict]:
     if _knowledge_base is not None:
         return _knowledge_base
 
-    kb_path = os.path.join(os.path.dirname(__file__), "knowledge_base.json")
-    with open(kb_path, "r", encoding="utf-8") as f:
+    with open(KB_PATH, "r", encoding="utf-8") as f:
         data = json.load(f)
     _knowledge_base = data["chunks"]
+    _set_kb_index(_knowledge_base)
     print(f"📚 Loaded {len(_knowledge_base)} knowledge chunks")
     return _knowledge_base
 
 
+def _build_kb_index(chunks: List[Dict]) -> Dict[str, Any]:
+    """
+    Per-chunk arrays aligned with the chunk list, so retrieve() filters and
+    scores with vector ops instead of Python loops:
+      disease_masks   {disease: bool[n]}
+      severity_masks  {severity: bool[n]}  (chunks without severity_applies → "moderate")
+      priority        int[n]
+      priority_boost  float32[n]  (1 + 0.1 · (6 − priority))
+      bm25            BM25Index over title, content and medications
+    """
+    diseases = np.array([c["disease"] for c in chunks], dtype=object)
+    disease_masks = {d: diseases == d for d in set(diseases)}
+
+    applies = [c.get("severity_applies", ["moderate"]) for c in chunks]
+    severity_masks = {
+        s: np.array([s in a for a in applies], dtype=bool)
+        for s in {s for a in applies for s in a}
+    }
+
+    # Unset priority: 3 for the semantic boost, last for the priority-only fallback
+    boost_priority = np.array([c.get("priority", 3) for c in chunks], dtype=np.int32)
+    return {
+        "size": len(chunks),
+        "disease_masks": disease_masks,
+        "severity_masks": severity_masks,
+        "priority": np.array([c.get("priority", 99) for c in chunks], dtype=np.int32),
+        "priority_boost": (1.0 + 0.1 * (6 - boost_priority)).astype(np.float32),
+        "bm25": BM25Index.build(chunks),
+    }
+
+
+def _set_kb_index(chunks: List[Dict]) -> None:
+    global _kb_index
+    _kb_index = _build_kb_index(chunks)
+
+
 def _get_embed_model():
     """Lazily load the sentence-transformers model (22MB, CPU-friendly)."""
     global _embed_model
-    if _embed_model is not None:
+    if _embed_model is not None or RAG_RETRIEVER == "lexical":
         return _embed_model
+    if _embed_model_released:
+        raise RuntimeError("RAG embedder was unloaded — reload it with warmup() (via the model manager) first")
 
     try:
         from sentence_transformers import SentenceTransformer
-        _embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-        print("🧠 Loaded sentence-transformers model: all-MiniLM-L6-v2")
+        _embed_model = SentenceTransformer(EMBED_MODEL_NAME)
+        print(f"🧠 Loaded sentence-transformers model: {EMBED_MODEL_NAME}")
     except ImportError:
-        print("⚠️ sentence-transformers not installed — using keyword fallback")
+        print("⚠️ sentence-transformers not installed — using BM25 lexical retrieval")
         _embed_model = None
     return _embed_model
 
 
-def _compute_embeddings() -> Optional[np.ndarray]:
-    """Compute embeddings for all knowledge chunks (once at startup)."""
-    global _embeddings
-    if _embeddings is not None:
+def _chunk_texts(chunks: List[Dict]) -> List[str]:
+    return [f"{c['title']}. {c['content']}" for c in chunks]
+
+
+def _embeddings_key(texts: List[str]) -> str:
+    """Content key: changes whenever any chunk text or the embedding model changes."""
+    digest = hashlib.sha256(f"{EMBED_MODEL_NAME}|normalized".encode())
+    for text in texts:
+        digest.update(b"\x1e" + text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_meta_path() -> str:
+    return f"{os.path.splitext(EMBEDDINGS_CACHE_PATH)[0]}.json"
+
+
+def _load_cached_embeddings(key: str, count: int) -> Optional[np.ndarray]:
+    """Memory-map the sidecar .npy if its key matches the current chunks + model."""
+    try:
+        with open(_cache_meta_path(), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("key") != key or meta.get("chunks") != count:
+            return None
+        return np.load(EMBEDDINGS_CACHE_PATH, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached_embeddings(embeddings: np.ndarray, key: str) -> None:
+    """Write .npy then its key file, each atomically (workers may race on first start)."""
+    meta = {"key": key, "model": EMBED_MODEL_NAME, "chunks": int(embeddings.shape[0]), "dim": int(embeddings.shape[1])}
+    suffix = f".{os.getpid()}.tmp"
+    try:
+        with open(EMBEDDINGS_CACHE_PATH + suffix, "wb") as f:
+            np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32))
+        os.replace(EMBEDDINGS_CACHE_PATH + suffix, EMBEDDINGS_CACHE_PATH)
+        with open(_cache_meta_path() + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(_cache_meta_path() + suffix, _cache_meta_path())
+        print(f"💾 Saved chunk embeddings to {EMBEDDINGS_CACHE_PATH}")
+    except OSError as e:
+        print(f"⚠️ Could not write embedding cache ({e}) — keeping in-memory embeddings only")
+
+
+def _compute_embeddings(force: bool = False) -> Optional[np.ndarray]:
+    """
+    Chunk embeddings, memory-mapped from the sidecar cache when its key matches
+    the current knowledge base and model; otherwise encoded and written back.
+    """
+    global _embeddings, _embeddings_version
+    if _embeddings is not None and not force:
         return _embeddings
 
     model = _get_embed_model()
     if model is None:
         return None
 
-    chunks = _load_knowledge_base()
-    texts = [f"{c['title']}. {c['content']}" for c in chunks]
-    _embeddings = model.encode(texts, normalize_embeddings=True)
+    texts = _chunk_texts(_load_knowledge_base())
+    key = _embeddings_version = _embeddings_key(texts)
+    cached = None if force else _load_cached_embeddings(key, len(texts))
+    if cached is not None:
+        _embeddings = cached
+        print(f"✅ Loaded cached embeddings for {len(texts)} chunks (mmap)")
+        return _embeddings
+
+    _embeddings = model.encode(texts, normalize_embeddings=True).astype(np.float32)
     print(f"✅ Computed embeddings for {len(texts)} chunks")
+    _save_cached_embeddings(_embeddings, key)
     return _embeddings
 
 
+def _ann_enabled(num_chunks: int) -> bool:
+    return RAG_ANN == "1" or (RAG_ANN == "auto" and num_chunks >= RAG_ANN_MIN_CHUNKS)
+
+
+def _get_ann_index(force: bool = False) -> Optional[IVFIndex]:
+    """
+    Disease-partitioned IVF index over the chunk embeddings, loaded from
+    ANN_INDEX_PATH when it was built from the same embeddings, otherwise
+    built and saved. None when ANN is disabled or embeddings are unavailable.
+    """
+    global _ann_index
+    if _ann_index is not None and not force:
+        return _ann_index
+
+    chunks = _load_knowledge_base()
+    if not _ann_enabled(len(chunks)):
+        return None
+    embeddings = _compute_embeddings()
+    if embeddings is None:
+        return None
+
+    index = None if force else IVFIndex.load(ANN_INDEX_PATH, key=_embeddings_version)
+    if index is not None:
+        print(f"✅ Loaded ANN index for {index.size} chunks from {ANN_INDEX_PATH}")
+    else:
+        start = time.perf_counter()
+        index = IVFIndex.build(embeddings, _kb_index["disease_masks"], key=_embeddings_version)
+        print(f"✅ Built ANN index over {index.size} chunks in {time.perf_counter() - start:.1f}s")
+        tmp_path = f"{ANN_INDEX_PATH}.{os.getpid()}.tmp"
+        try:
+            index.save(tmp_path)
+            os.replace(tmp_path, ANN_INDEX_PATH)
+            print(f"💾 Saved ANN index to {ANN_INDEX_PATH}")
+        except OSError as e:
+            print(f"⚠️ Could not write ANN index ({e}) — keeping it in memory only")
+    _ann_index = index
+    return _ann_index
+
+
+def _normalize_query(text: str) -> str:
+    """Lower-case, single-spaced (MiniLM is uncased, so the embedding is unchanged)."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _build_query(disease: str, severity: str, symptoms: str = "") -> str:
+    return f"{disease} treatment for {severity} case. {symptoms}".strip()
+
+
+def _encode_queries(model, queries: List[str], track: bool = True) -> np.ndarray:
+    """Query embeddings (n, d), served from the LRU cache where possible; one encode() for the misses."""
+    keys = [_normalize_query(q) for q in queries]
+    with _query_cache_lock:
+        found = {k: _query_cache[k] for k in keys if k in _query_cache}
+        if track:
+            _query_cache_stats["hits"] += sum(k in found for k in keys)
+    missing = list(dict.fromkeys(k for k in keys if k not in found))
+    if missing:
+        encoded = np.asarray(model.encode(missing, normalize_embeddings=True), dtype=np.float32)
+        with _query_cache_lock:
+            if track:
+                _query_cache_stats["misses"] += len(missing)
+            for key, vector in zip(missing, encoded):
+                vector.setflags(write=False)
+                _query_cache[key] = found[key] = vector
+    return np.stack([found[k] for k in keys])
+
+
+def _preencode_queries(model) -> int:
+    """Encode every disease alias × severity query without symptoms (the common case)."""
+    severities = sorted(_kb_index["severity_masks"]) if _kb_index else ["mild", "moderate", "severe"]
+    queries = [_build_query(disease, severity) for disease in DISEASE_ALIASES for severity in severities]
+    _encode_queries(model, queries, track=False)
+    return len(queries)
+
+
+def query_cache_stats() -> Dict[str, Any]:
+    with _query_cache_lock:
+        return {"size": len(_query_cache), "max_size": _query_cache.maxsize, **_query_cache_stats}
+
+
+def warmup() -> Dict[str, Any]:
+    """
+    Eagerly load the knowledge base, embedding model and chunk embeddings,
+    then pre-encode the disease × severity queries so most requests never
+    run the transformer at all.
+    """
+    global _embed_model_released
+    _embed_model_released = False
+    start = time.perf_counter()
+    _load_knowledge_base()
+    model = _get_embed_model()
+    _compute_embeddings()
+    _get_ann_index()
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preencoded = _preencode_queries(model) if model is not None else 0
+    return {
+        "load_seconds": round(load_seconds, 3),
+        "warmup_seconds": round(time.perf_counter() - start, 3),
+        "semantic": model is not None,
+        "retriever": RAG_RETRIEVER if model is not None else "lexical",
+        "preencoded_queries": preencoded,
+    }
+
+
+def unload() -> None:
+    """
+    Release the embedding model and chunk embeddings (the model manager calls
+    this when evicting). Only the next warmup() reloads them; retrieve() raises
+    until then rather than loading MiniLM outside the manager's accounting.
+    """
+    global _embed_model, _embeddings, _ann_index, _embed_model_released
+    _embed_model_released = _embed_model is not None
+    _embed_model = None
+    _embeddings = None
+    _ann_index = None
+
+
 def _get_gemini_client():
     """Lazily initialise the Gemini client using the new google-genai SDK."""
     global _gemini_model
@@ -105,62 +373,90 @@ def retrieve(
     """
     Retrieve the most relevant knowledge chunks for a disease + context.
 
-    Uses semantic similarity if sentence-transformers is available,
-    otherwise falls back to metadata-based keyword filtering.
+    Chunks are filtered by disease and severity first, then ranked by
+    semantic similarity fused with BM25 (RAG_RETRIEVER=hybrid), semantic
+    similarity alone (dense), or BM25 alone — also the fallback when
+    sentence-transformers is unavailable.
     """
     chunks = _load_knowledge_base()
+    index = _kb_index
 
     # Filter by disease (include general chunks too)
     disease_lower = disease.lower().strip()
-    # Map common names
-    disease_map = {
-        "coccidiosis": "coccidiosis",
-        "fowlpox": "fowlpox",
-        "bumblefoot": "bumblefoot",
-        "coryza": "coryza",
-        "newcastle": "newcastle",
-        "mareks": "mareks",
-        "marek's": "mareks",
-        "avian_influenza": "avian_influenza",
-        "bird_flu": "avian_influenza",
-        "healthy": "healthy",
-    }
-    target_disease = disease_map.get(disease_lower, disease_lower)
-    filtered = [c for c in chunks if c["disease"] in (target_disease, "general", "healthy")]
+    target_disease = DISEASE_ALIASES.get(disease_lower, disease_lower)
+    none = np.zeros(index["size"], dtype=bool)
+    mask = none.copy()
+    for d in (target_disease, "general", "healthy"):
+        mask |= index["disease_masks"].get(d, none)
 
     # Filter by severity
     severity = user_context.get("severity", "moderate").lower()
-    filtered = [c for c in filtered if severity in c.get("severity_applies", ["moderate"])]
+    mask &= index["severity_masks"].get(severity, none)
+    candidates = np.flatnonzero(mask)
+    k = min(top_k, len(candidates))
+    if k == 0:
+        return []
 
-    # Try semantic retrieval
+    query = _build_query(disease, severity, user_context.get("symptoms", ""))
     embeddings = _compute_embeddings()
     model = _get_embed_model()
 
-    if embeddings is not None and model is not None:
-        # Build query from context
-        symptoms = user_context.get("symptoms", "")
-        query = f"{disease} treatment for {severity} case. {symptoms}".strip()
-        query_emb = model.encode([query], normalize_embeddings=True)
-
-        # Get indices of filtered chunks in the full list
-        all_chunks = _load_knowledge_base()
-        filtered_indices = [all_chunks.index(c) for c in filtered]
-
-        # Compute similarities for filtered chunks only
-        similarities = []
-        for idx, chunk in zip(filtered_indices, filtered):
-            sim = float(np.dot(query_emb[0], embeddings[idx]))
-            # Boost by priority (lower priority number = higher boost)
-            priority_boost = 1.0 + (0.1 * (6 - chunk.get("priority", 3)))
-            similarities.append((sim * priority_boost, chunk))
-
-        # Sort by similarity (descending) and take top_k
-        similarities.sort(key=lambda x: x[0], reverse=True)
-        return [c for _, c in similarities[:top_k]]
-    else:
-        # Fallback: sort by priority
-        filtered.sort(key=lambda c: c.get("priority", 99))
-        return filtered[:top_k]
+    if embeddings is None or model is None:
+        # Lexical only; chunks matching no query term follow in priority order
+        ranked = _lexical_ranking(index, query, mask, k)
+        if len(ranked) < k:
+            rest = candidates[~np.isin(candidates, ranked)]
+            rest = rest[np.argsort(index["priority"][rest], kind="stable")]
+            ranked = np.concatenate([ranked, rest[:k - len(ranked)]])
+        return [chunks[i] for i in ranked]
+
+    query_vec = _encode_queries(model, [query])[0].astype(embeddings.dtype, copy=False)
+    if RAG_RETRIEVER == "dense":
+        return [chunks[i] for i in _dense_ranking(index, embeddings, query_vec, mask, target_disease, k)]
+
+    depth = max(k, RAG_FUSION_DEPTH)
+    fused = _reciprocal_rank_fusion([
+        _dense_ranking(index, embeddings, query_vec, mask, target_disease, depth),
+        _lexical_ranking(index, query, mask, depth),
+    ])
+    return [chunks[i] for i in fused[:k]]
+
+
+def _dense_ranking(index, embeddings, query_vec, mask, target_disease, depth) -> np.ndarray:
+    """Top-`depth` chunk ids by priority-boosted cosine similarity (ANN index when enabled)."""
+    ann = _get_ann_index()
+    if ann is not None:
+        # Disease partitions → severity mask → nearest IVF lists → exact scores
+        partitions = list(dict.fromkeys((target_disease, "general", "healthy")))
+        return ann.search(embeddings, query_vec, partitions, mask, index["priority_boost"], depth, RAG_ANN_NPROBE)
+
+    # One matrix–vector product over all chunks, boosted by priority
+    # (lower priority number = higher boost), filtered chunks only
+    scores = (embeddings @ query_vec) * index["priority_boost"]
+    scores = np.where(mask, scores, -np.inf)
+    depth = min(depth, int(mask.sum()))
+
+    # Top-k in O(n), then order just those k (ties keep knowledge-base order)
+    top = np.argpartition(-scores, depth - 1)[:depth] if depth < len(scores) else np.arange(len(scores))
+    return top[np.lexsort((top, -scores[top]))][:depth]
+
+
+def _lexical_ranking(index, query: str, mask, depth: int) -> np.ndarray:
+    """Up to `depth` chunk ids with a positive priority-boosted BM25 score, best first."""
+    scores = index["bm25"].scores(query) * index["priority_boost"]
+    hits = np.flatnonzero(mask & (scores > 0))
+    if len(hits) > depth:
+        hits = hits[np.argpartition(-scores[hits], depth - 1)[:depth]]
+    return hits[np.lexsort((hits, -scores[hits]))]
+
+
+def _reciprocal_rank_fusion(rankings: List[np.ndarray]) -> List[int]:
+    """Σ 1 / (RAG_RRF_K + rank) over the rankings; ties keep knowledge-base order."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, i in enumerate(ranking.tolist(), start=1):
+            fused[i] = fused.get(i, 0.0) + 1.0 / (RAG_RRF_K + rank)
+    return sorted(fused, key=lambda i: (-fused[i], i))
 
 
 # ─── System Prompt (shared between Gemini and OpenAI) ─────────────────────────
@@ -446,3 +742,23 @@ def generate_treatment_plan(
 
     return result
 
+
+# ─── CLI ──────────────────────────────────────────────────────────────────────
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG engine utilities")
+    parser.add_argument("--prebuild-embeddings", action="store_true",
+                        help="Encode the knowledge base and write the sidecar embedding cache "
+                             "(and the ANN index when RAG_ANN applies)")
+    parser.add_argument("--force", action="store_true", help="Re-encode even if the cache is current")
+    args = parser.parse_args()
+
+    if args.prebuild_embeddings:
+        embeddings = _compute_embeddings(force=args.force)
+        if embeddings is None:
+            print("⚠️ sentence-transformers not installed — nothing to prebuild")
+        else:
+            print(f"✅ {EMBEDDINGS_CACHE_PATH}: {embeddings.shape[0]} x {embeddings.shape[1]}")
+            _get_ann_index(force=args.force)
+    else:
+        parser.print_help()
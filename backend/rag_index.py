@@ -0,0 +1,148 @@
+"""
+Approximate nearest-neighbour index for the RAG knowledge base (pure NumPy IVF).
+
+Chunks are partitioned by disease first, so metadata filtering happens before
+any vector search: a query only ever touches the partitions for its disease
+plus "general" / "healthy". Inside each partition an inverted-file index
+(spherical k-means, ≈√n lists) narrows scoring to the `nprobe` lists whose
+centroids are closest to the query. Small partitions are a single list, i.e.
+searched exactly.
+
+    index = IVFIndex.build(embeddings, {"coccidiosis": mask, ...}, key=...)
+    index.save("knowledge_base.ann.npz")
+    ids = index.search(embeddings, query, ["coccidiosis", "general"], severity_mask, boost, k=8)
+
+The index stores chunk ids and centroids only; vectors are read from the
+(memory-mapped) embedding matrix at query time.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+INDEX_VERSION = 1
+EXACT_PARTITION_SIZE = 1024     # partitions up to this size are scanned exactly
+KMEANS_ITERATIONS = 15
+KMEANS_SAMPLE_PER_LIST = 64     # k-means trains on at most this many points per list
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _nearest(x: np.ndarray, centroids: np.ndarray, block: int = 16384) -> np.ndarray:
+    """Index of the most similar centroid for every row of `x` (blocked to bound memory)."""
+    return np.concatenate([
+        np.argmax(x[i:i + block] @ centroids.T, axis=1) for i in range(0, len(x), block)
+    ])
+
+
+def _spherical_kmeans(x: np.ndarray, nlist: int, rng: np.random.Generator) -> np.ndarray:
+    sample = x[rng.choice(len(x), min(len(x), nlist * KMEANS_SAMPLE_PER_LIST), replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = _nearest(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~np.any(sums, axis=1)
+        # Re-seed empty lists from random sample points
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Per-partition inverted-file index over unit-norm chunk embeddings.
+
+    Args:
+        partitions:  {name: (centroids float32[nlist, d], offsets int64[nlist + 1], ids int32[n])}
+                     — list j of a partition holds ids[offsets[j]:offsets[j + 1]]
+        key:         Content key of the embeddings the index was built from
+    """
+
+    def __init__(self, partitions: Dict[str, tuple], key: str = ""):
+        self.partitions = partitions
+        self.key = key
+
+    @property
+    def size(self) -> int:
+        return sum(len(ids) for _, _, ids in self.partitions.values())
+
+    # ── Build / persist ──
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, partition_masks: Dict[str, np.ndarray],
+              key: str = "", seed: int = 0) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        partitions = {}
+        for name, mask in sorted(partition_masks.items()):
+            ids = np.flatnonzero(mask).astype(np.int32)
+            if len(ids) == 0:
+                continue
+            vectors = np.asarray(embeddings[ids], dtype=np.float32)
+            if len(ids) <= EXACT_PARTITION_SIZE:
+                centroids = _normalize(vectors.mean(axis=0, keepdims=True)).astype(np.float32)
+                assign = np.zeros(len(ids), dtype=np.int64)
+            else:
+                centroids = _spherical_kmeans(vectors, int(round(np.sqrt(len(ids)))), rng)
+                assign = _nearest(vectors, centroids)
+            order = np.argsort(assign, kind="stable")    # ids stay ascending within each list
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+            partitions[name] = (centroids, offsets.astype(np.int64), ids[order])
+        return cls(partitions, key=key)
+
+    def save(self, path: str) -> None:
+        arrays = {"version": np.array(INDEX_VERSION), "key": np.array(self.key), "names": np.array(list(self.partitions))}
+        for i, (centroids, offsets, ids) in enumerate(self.partitions.values()):
+            arrays.update({f"p{i}_centroids": centroids, f"p{i}_offsets": offsets, f"p{i}_ids": ids})
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str, key: Optional[str] = None) -> Optional["IVFIndex"]:
+        """The saved index, or None if it is missing, stale (`key` differs) or from another version."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION or (key is not None and str(data["key"]) != key):
+                    return None
+                partitions = {
+                    str(name): (data[f"p{i}_centroids"], data[f"p{i}_offsets"], data[f"p{i}_ids"])
+                    for i, name in enumerate(data["names"])
+                }
+                return cls(partitions, key=str(data["key"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    # ── Search ──
+
+    def candidates(self, query: np.ndarray, partitions: List[str], nprobe: int) -> np.ndarray:
+        """Chunk ids in the `nprobe` closest lists of each requested partition."""
+        found = []
+        for name in partitions:
+            if name not in self.partitions:
+                continue
+            centroids, offsets, ids = self.partitions[name]
+            if len(centroids) <= nprobe:
+                found.append(ids)
+                continue
+            lists = np.argpartition(-(centroids @ query), nprobe - 1)[:nprobe]
+            found.extend(ids[offsets[j]:offsets[j + 1]] for j in lists)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int32)
+
+    def search(self, embeddings: np.ndarray, query: np.ndarray, partitions: List[str],
+               mask: np.ndarray, boost: np.ndarray, k: int, nprobe: int = 8) -> np.ndarray:
+        """
+        Top-k chunk ids by boosted similarity among the probed lists of
+        `partitions`, restricted to `mask` (e.g. severity) before scoring.
+        """
+        ids = self.candidates(query, partitions, nprobe)
+        ids = np.unique(ids[mask[ids]])    # sorted, so ties keep knowledge-base order
+        if len(ids) == 0:
+            return ids
+        scores = (embeddings[ids] @ query) * boost[ids]
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(ids) else np.arange(len(ids))
+        top = top[np.lexsort((top, -scores[top]))]
+        return ids[top]
@@ -0,0 +1,117 @@
+"""
+BM25 lexical retriever for the RAG knowledge base (pure NumPy).
+
+An inverted index over each chunk's title, content and medications, built
+once when the knowledge base loads. Field weights make a hit in the title or
+the medication list count more than one in the body text (a simplified
+BM25F: weighted term frequencies and document lengths).
+
+    bm25 = BM25Index.build(chunks)
+    scores = bm25.scores("bloody droppings amprolium")   # float32[n_chunks]
+
+It needs no model and almost no memory, so it serves lightweight
+deployments without sentence-transformers / torch on its own, and is fused
+with dense retrieval (reciprocal-rank fusion) when embeddings exist.
+"""
+
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+import numpy as np
+
+FIELD_WEIGHTS = {"title": 2.0, "content": 1.0, "medications": 3.0}
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# English function words + the fixed words of rag_engine's query template
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or that the their them
+    this to was were will with case treatment
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _chunk_fields(chunk: Dict) -> Dict[str, str]:
+    return {
+        "title": chunk.get("title", ""),
+        "content": chunk.get("content", ""),
+        "medications": " ".join(chunk.get("medications", [])),
+    }
+
+
+class BM25Index:
+    """
+    BM25 over weighted fields, stored as CSR postings.
+
+    Args:
+        vocab:    {term: term id}
+        offsets:  int64[n_terms + 1] — postings of term t are [offsets[t], offsets[t + 1])
+        doc_ids:  int32 postings (chunk index)
+        weights:  float32 per posting — BM25 term weight tf·(k1+1)/(tf+norm), idf excluded
+        idf:      float32[n_terms]
+        size:     Number of chunks
+    """
+
+    def __init__(self, vocab, offsets, doc_ids, weights, idf, size):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.idf = idf
+        self.size = size
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.doc_ids.nbytes + self.weights.nbytes + self.idf.nbytes
+
+    @classmethod
+    def build(cls, chunks: List[Dict]) -> "BM25Index":
+        postings = defaultdict(dict)     # term → {doc: weighted tf}
+        lengths = np.zeros(len(chunks), dtype=np.float32)
+        for doc, chunk in enumerate(chunks):
+            for field, text in _chunk_fields(chunk).items():
+                tokens = tokenize(text)
+                lengths[doc] += FIELD_WEIGHTS[field] * len(tokens)
+                for token in tokens:
+                    postings[token][doc] = postings[token].get(doc, 0.0) + FIELD_WEIGHTS[field]
+
+        n = len(chunks)
+        avg_length = float(lengths.mean()) if n else 1.0
+        norm = K1 * (1.0 - B + B * lengths / max(avg_length, 1e-6))
+
+        vocab = {term: i for i, term in enumerate(sorted(postings))}
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        doc_ids, weights, df = [], [], np.zeros(len(vocab), dtype=np.float32)
+        for term, i in vocab.items():
+            docs = np.fromiter(postings[term].keys(), dtype=np.int32)
+            tf = np.fromiter(postings[term].values(), dtype=np.float32)
+            doc_ids.append(docs)
+            weights.append(tf * (K1 + 1.0) / (tf + norm[docs]))
+            df[i] = len(docs)
+            offsets[i + 1] = offsets[i] + len(docs)
+
+        idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        return cls(
+            vocab,
+            offsets,
+            np.concatenate(doc_ids) if doc_ids else np.empty(0, dtype=np.int32),
+            np.concatenate(weights).astype(np.float32) if weights else np.empty(0, dtype=np.float32),
+            idf,
+            n,
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for `query` (0 where no query term occurs)."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(tokenize(query)):
+            t = self.vocab.get(token)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            scores[self.doc_ids[start:end]] += self.idf[t] * self.weights[start:end]
+        return scores
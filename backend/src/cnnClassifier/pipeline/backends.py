@@ -0,0 +1,374 @@
+"""
+Pluggable inference backends for DiseasePredictor.
+
+Every backend takes an (N, H, W, 3) batch preprocessed like training
+(resize + /255.0 as float32, or raw uint8 pixels for artifacts exported with
+a built-in Rescaling layer — see export_uint8.py) and returns
+(N, num_classes) probabilities, so the result dict contract of
+DiseasePredictor never depends on the runtime underneath.
+
+    keras       .h5 via tf.keras (traced tf.function serving signature, optional XLA)
+    early_exit  .early_exit.h5 with intermediate heads (train_coccidiosis.py --early-exit)
+    tflite      .tflite via the TFLite interpreter (see convert_tflite.py)
+    onnx        .onnx via ONNX Runtime's CPU execution provider (see export_onnx.py)
+"""
+
+import threading
+import numpy as np
+import tensorflow as tf
+
+
+class InferenceBackend:
+    """
+    Base class for inference runtimes.
+
+    Args:
+        model_path:   Path to the model artifact for this runtime
+        image_size:   Tuple (H, W) the model expects
+        input_dtype:  "float32" (pixels / 255.0) or "uint8" (raw pixels, rescaled in-graph)
+    """
+
+    name = "base"
+
+    def __init__(self, model_path: str, image_size: tuple = (224, 224), input_dtype: str = "float32"):
+        self.model_path = model_path
+        self.image_size = image_size
+        self.input_dtype = input_dtype
+
+    @classmethod
+    def is_fork_safe(cls, num_threads: int = None) -> bool:
+        """
+        Whether a loaded instance may be inherited by forked workers
+        (gunicorn --preload). Runtimes that own thread pools are not.
+        """
+        return False
+
+    def load(self):
+        """Load the artifact into memory (called once)."""
+        raise NotImplementedError
+
+    def _check_input_dtype(self, model_dtype: str):
+        """Refuse an artifact whose input type differs from what the predictor will feed it."""
+        if model_dtype != self.input_dtype:
+            raise ValueError(
+                f"{self.model_path} expects {model_dtype} input but the predictor "
+                f"is configured for {self.input_dtype}."
+            )
+
+    def run(self, batch: np.ndarray) -> np.ndarray:
+        """Forward pass over an (N, H, W, 3) batch → (N, num_classes) probabilities."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """Runtime-specific counters for /health (none by default)."""
+        return {}
+
+    def reset_stats(self):
+        """Forget the counters, e.g. after warmup batches."""
+
+
+# ─── Keras ────────────────────────────────────────────────
+
+class KerasBackend(InferenceBackend):
+    """
+    tf.keras model served through a traced tf.function.
+
+    Args:
+        use_compiled:  Serve through a traced tf.function instead of model.predict()
+        jit_compile:   XLA-compile the traced serving function
+    """
+
+    name = "keras"
+
+    def __init__(self, model_path, image_size=(224, 224), input_dtype="float32",
+                 use_compiled: bool = True, jit_compile: bool = False, **_):
+        super().__init__(model_path, image_size, input_dtype)
+        self.use_compiled = use_compiled
+        self.jit_compile = jit_compile
+        self.model = None
+        self._serving_fn = None
+
+    def load(self):
+        print(f"🔄 Loading model from {self.model_path}...")
+        self.model = tf.keras.models.load_model(self.model_path, compile=False)
+        self._check_input_dtype(tf.as_dtype(self.model.inputs[0].dtype).name)
+        if self.use_compiled:
+            self._serving_fn = self._build_serving_fn()
+        print(f"✅ Model loaded: {self.model_path}")
+
+    def _build_serving_fn(self):
+        """
+        Trace a fixed-shape inference function once at load time.
+
+        model.predict() builds a data adapter and step function on every call,
+        which dominates single-image latency on CPU. Only the batch dimension
+        is left dynamic so micro-batches reuse the same trace.
+        """
+        model = self.model
+        height, width = self.image_size
+
+        @tf.function(
+            input_signature=[tf.TensorSpec([None, height, width, 3], self.input_dtype)],
+            jit_compile=self.jit_compile,
+        )
+        def serve(batch):
+            return model(batch, training=False)
+
+        serve.get_concrete_function()   # trace now, not on the first request
+        return serve
+
+    def run(self, batch):
+        if self._serving_fn is not None:
+            return self._serving_fn(tf.convert_to_tensor(batch, dtype=self.input_dtype)).numpy()
+        return self.model.predict(batch)
+
+
+# ─── Early Exit ───────────────────────────────────────────
+
+EXIT_PREFIX = "exit_"
+
+
+def split_early_exit(model) -> list:
+    """
+    Split a multi-output early-exit model into sequential stages.
+
+    The model's extra outputs are named "exit_<cut layer>" (e.g.
+    "exit_block3_pool"); the remaining output is the original classifier.
+    Returns [(trunk, head), ..., (tail, None)] where each trunk runs from the
+    previous cut to the next one and each head maps a cut to probabilities.
+    """
+    outputs = dict(zip(model.output_names, model.outputs))
+    final = [t for name, t in outputs.items() if not name.startswith(EXIT_PREFIX)]
+    if len(final) != 1:
+        raise ValueError(f"Expected one non-exit output, found {len(final)}: {list(outputs)}")
+
+    depth = {layer.name: i for i, layer in enumerate(model.layers)}
+    exits = sorted(
+        (name for name in outputs if name.startswith(EXIT_PREFIX)),
+        key=lambda name: depth[name[len(EXIT_PREFIX):]],
+    )
+
+    stages, previous = [], model.inputs[0]
+    for name in exits:
+        cut = model.get_layer(name[len(EXIT_PREFIX):]).output
+        stages.append((tf.keras.Model(previous, cut), tf.keras.Model(cut, outputs[name])))
+        previous = cut
+    stages.append((tf.keras.Model(previous, final[0]), None))
+    return stages
+
+
+class EarlyExitBackend(InferenceBackend):
+    """
+    VGG16 with intermediate classifier heads: each image stops at the first
+    head whose confidence clears `exit_threshold`; only the rest of the batch
+    continues through the deeper blocks.
+
+    Args:
+        exit_threshold:  Confidence at which an intermediate head's answer is accepted
+    """
+
+    name = "early_exit"
+
+    def __init__(self, model_path, image_size=(224, 224), input_dtype="float32",
+                 exit_threshold: float = 0.9, **_):
+        super().__init__(model_path, image_size, input_dtype)
+        self.exit_threshold = exit_threshold
+        self._stages = []
+        self.exit_counts = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _trace(model, dtype):
+        spec = tf.TensorSpec([None, *model.inputs[0].shape[1:]], dtype)
+
+        @tf.function(input_signature=[spec])
+        def serve(batch):
+            return model(batch, training=False)
+
+        serve.get_concrete_function()
+        return serve
+
+    def load(self):
+        print(f"🔄 Loading early-exit model from {self.model_path} (threshold={self.exit_threshold})...")
+        model = tf.keras.models.load_model(self.model_path, compile=False)
+        self._check_input_dtype(tf.as_dtype(model.inputs[0].dtype).name)
+        stages = split_early_exit(model)
+        self._stages = [
+            (self._trace(trunk, self.input_dtype if i == 0 else trunk.inputs[0].dtype),
+             self._trace(head, head.inputs[0].dtype) if head is not None else None)
+            for i, (trunk, head) in enumerate(stages)
+        ]
+        self.exit_counts = [0] * len(self._stages)
+        print(f"✅ Early-exit model loaded: {len(self._stages) - 1} exits + final head")
+
+    def run(self, batch):
+        features = tf.convert_to_tensor(batch, dtype=self.input_dtype)
+        active = np.arange(len(batch))
+        probs = None
+        for i, (trunk, head) in enumerate(self._stages):
+            features = trunk(features)
+            stage_probs = (features if head is None else head(features)).numpy()
+            if probs is None:
+                probs = np.zeros((len(batch), stage_probs.shape[1]), dtype=np.float32)
+
+            done = np.ones(len(active), bool) if head is None else stage_probs.max(axis=1) >= self.exit_threshold
+            probs[active[done]] = stage_probs[done]
+            with self._lock:
+                self.exit_counts[i] += int(done.sum())
+            if done.all():
+                break
+            active = active[~done]
+            features = tf.gather(features, np.flatnonzero(~done))
+        return probs
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = sum(self.exit_counts)
+            return {
+                "exit_threshold": self.exit_threshold,
+                "exit_counts": list(self.exit_counts),
+                "early_exit_rate": round(1 - self.exit_counts[-1] / total, 4) if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.exit_counts = [0] * len(self._stages)
+
+
+# ─── TFLite ───────────────────────────────────────────────
+
+class TFLiteBackend(InferenceBackend):
+    """
+    TFLite interpreter (float16 or INT8 artifacts from convert_tflite.py).
+
+    Args:
+        num_threads:  CPU threads for the interpreter (None = runtime default)
+    """
+
+    name = "tflite"
+
+    @classmethod
+    def is_fork_safe(cls, num_threads=None):
+        # Single-threaded interpreters own no pthreadpool, only memory
+        return num_threads == 1
+
+    def __init__(self, model_path, image_size=(224, 224), input_dtype="float32",
+                 num_threads: int = None, **_):
+        super().__init__(model_path, image_size, input_dtype)
+        self.num_threads = num_threads
+        self.interpreter = None
+        self._lock = threading.Lock()   # TFLite interpreters are not thread-safe
+
+    def load(self):
+        # Prefer the slim tflite_runtime wheel if installed
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            Interpreter = tf.lite.Interpreter
+
+        print(f"🔄 Loading TFLite model from {self.model_path} (threads={self.num_threads})...")
+        self.interpreter = Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+        self.interpreter.allocate_tensors()
+        inp = self.interpreter.get_input_details()[0]
+        # Quantized integer inputs are fed floats and quantized in run()
+        quantized = inp["dtype"] != np.float32 and inp["quantization"][0]
+        self._check_input_dtype("float32" if quantized else np.dtype(inp["dtype"]).name)
+        print(f"✅ TFLite model loaded: {self.model_path}")
+
+    def run(self, batch):
+        """Invoke the interpreter, (de)quantizing if the model has integer I/O."""
+        with self._lock:
+            interpreter = self.interpreter
+            inp = interpreter.get_input_details()[0]
+            if tuple(inp["shape"]) != batch.shape:
+                interpreter.resize_tensor_input(inp["index"], batch.shape)
+                interpreter.allocate_tensors()
+                inp = interpreter.get_input_details()[0]
+
+            scale, zero_point = inp["quantization"]
+            if inp["dtype"] != np.float32 and scale:
+                batch = np.round(batch / scale + zero_point)
+            interpreter.set_tensor(inp["index"], batch.astype(inp["dtype"]))
+            interpreter.invoke()
+
+            out = interpreter.get_output_details()[0]
+            probs = interpreter.get_tensor(out["index"])
+            scale, zero_point = out["quantization"]
+            if out["dtype"] != np.float32 and scale:
+                probs = (probs.astype(np.float32) - zero_point) * scale
+            return probs
+
+
+# ─── ONNX Runtime ─────────────────────────────────────────
+
+ONNX_DTYPES = {"float": "float32", "double": "float64", "float16": "float16"}
+
+
+class ONNXBackend(InferenceBackend):
+    """
+    ONNX Runtime CPU execution provider (artifacts from export_onnx.py).
+
+    Args:
+        num_threads:  intra-op threads for the session (None = runtime default)
+    """
+
+    name = "onnx"
+
+    @classmethod
+    def is_fork_safe(cls, num_threads=None):
+        # intra_op_num_threads=1 → ORT creates no thread pool
+        return num_threads == 1
+
+    def __init__(self, model_path, image_size=(224, 224), input_dtype="float32",
+                 num_threads: int = None, **_):
+        super().__init__(model_path, image_size, input_dtype)
+        self.num_threads = num_threads
+        self.session = None
+        self._input_name = None
+
+    def load(self):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError(
+                "onnxruntime is not installed — `pip install onnxruntime` "
+                "or switch this model back to the keras/tflite backend."
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+
+        print(f"🔄 Loading ONNX model from {self.model_path} (threads={self.num_threads})...")
+        self.session = ort.InferenceSession(
+            self.model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        # ORT type strings look like "tensor(float)" / "tensor(uint8)"
+        model_dtype = model_input.type[len("tensor("):-1]
+        self._check_input_dtype(ONNX_DTYPES.get(model_dtype, model_dtype))
+        print(f"✅ ONNX model loaded: {self.model_path}")
+
+    def run(self, batch):
+        # InferenceSession.run is thread-safe
+        return self.session.run(None, {self._input_name: batch.astype(self.input_dtype, copy=False)})[0]
+
+
+# ─── Registry ─────────────────────────────────────────────
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    EarlyExitBackend.name: EarlyExitBackend,
+    TFLiteBackend.name: TFLiteBackend,
+    ONNXBackend.name: ONNXBackend,
+}
+
+
+def create_backend(name: str, model_path: str, image_size: tuple = (224, 224), **options) -> InferenceBackend:
+    """Instantiate a backend by name ("keras", "early_exit", "tflite", "onnx")."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_path, image_size=image_size, **options)
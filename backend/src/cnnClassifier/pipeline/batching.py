@@ -0,0 +1,163 @@
+"""
+Dynamic micro-batching for DiseasePredictor inference.
+
+Concurrent requests for the same model (e.g. gunicorn gthread workers) are
+queued, gathered for at most `max_wait_ms` or until `max_batch_size` images
+are waiting, and run through the model as ONE forward pass. Each caller
+still receives its own result dict.
+
+Opt-in — wrap an existing predictor:
+    batched = BatchingPredictor(predictor, max_batch_size=8, max_wait_ms=5)
+    result = batched.predict_bytes(image_bytes)
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+# ─── Metrics ──────────────────────────────────────────────
+
+class Histogram:
+    """
+    Cumulative fixed-bucket histogram (Prometheus-style `le` buckets).
+
+    Thread-safe; `snapshot()` returns plain dicts ready for jsonify().
+    """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)   # last slot = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, n in zip(self.buckets, self._counts):
+                running += n
+                cumulative[f"le_{bound:g}"] = running
+            cumulative["le_inf"] = running + self._counts[-1]
+            return {
+                "buckets": cumulative,
+                "count": self._count,
+                "sum": round(self._sum, 3),
+                "mean": round(self._sum / self._count, 3) if self._count else 0.0,
+            }
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+# ─── Batching Wrapper ─────────────────────────────────────
+
+class BatchingPredictor:
+    """
+    Micro-batching front for a DiseasePredictor.
+
+    Args:
+        predictor:       The wrapped DiseasePredictor
+        max_batch_size:  Upper bound on images per forward pass
+        max_wait_ms:     How long the first queued request may wait for company
+    """
+
+    def __init__(self, predictor, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.predictor = predictor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_hist = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Delegate everything else (load, is_available, model_path, ...) to the predictor
+        return getattr(self.predictor, name)
+
+    def start(self):
+        """Start the batching worker thread (idempotent)."""
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="inference-batcher", daemon=True
+                )
+                self._worker.start()
+
+    # ── Public API (same result contract as DiseasePredictor) ──
+
+    def predict(self, filename: str) -> dict:
+        return self.predict_array(self.predictor.preprocess(filename))
+
+    def predict_bytes(self, image_bytes: bytes) -> dict:
+        # Decode/resize in the caller's thread so the worker only runs the model
+        return self.predictor.cached(
+            image_bytes, lambda: self.predict_array(self.predictor.preprocess_bytes(image_bytes))
+        )
+
+    def predict_array(self, img_array: np.ndarray) -> dict:
+        self.start()
+        future = Future()
+        self._queue.put((img_array, future, time.perf_counter()))
+        return future.result()
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "batch_size": self.batch_size_hist.snapshot(),
+            "queue_wait_ms": self.queue_wait_hist.snapshot(),
+        }
+
+    # ── Worker ──
+
+    def _collect(self) -> list:
+        """Block for the first item, then gather more until the window closes."""
+        items = [self._queue.get()]
+        deadline = items[0][2] + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    items.append(self._queue.get_nowait())
+                else:
+                    items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            started = time.perf_counter()
+            for _, _, enqueued in items:
+                self.queue_wait_hist.observe((started - enqueued) * 1000.0)
+            self.batch_size_hist.observe(len(items))
+
+            try:
+                results = self.predictor.predict_batch([arr for arr, _, _ in items])
+            except Exception as e:
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(items, results):
+                future.set_result(result)
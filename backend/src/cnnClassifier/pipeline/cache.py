@@ -0,0 +1,65 @@
+"""
+Content-hash prediction cache.
+
+Farmers often re-upload the same photo (language switch, flaky retries).
+Results are cached per model under SHA-256(decoded image bytes) + model
+identity + model version, with LRU eviction and a TTL.
+"""
+
+import hashlib
+import threading
+from cachetools import TTLCache
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU + TTL cache of DiseasePredictor result dicts.
+
+    Args:
+        maxsize:  Maximum number of cached results
+        ttl:      Seconds before an entry expires
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(image_bytes: bytes, model_id: str, model_version: str) -> str:
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{model_id}|{model_version}|{digest}"
+
+    def get(self, key: str):
+        with self._lock:
+            result = self._cache.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, key: str, result: dict):
+        with self._lock:
+            self._cache[key] = dict(result)
+
+    def clear(self):
+        """Drop every entry (e.g. the model file changed on disk)."""
+        with self._lock:
+            self._cache.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl_seconds": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
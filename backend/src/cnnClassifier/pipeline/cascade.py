@@ -0,0 +1,177 @@
+"""
+Confidence-gated model cascade.
+
+A small, fast model scores every image first. Only when its confidence lies
+inside the uncertainty band is the image escalated to the full model (the
+VGG16 PredictionPipeline predictor). Each result reports which stage
+decided it.
+
+    cascade = CascadePredictor(fast_predictor, full_predictor, band=(0.0, 0.9))
+    result = cascade.predict_bytes(image_bytes)   # result["stage"] == "fast" | "full"
+
+Both predictors must share input size and dtype so every image is decoded
+and preprocessed once. Use evaluate_cascade.py to pick the band.
+"""
+
+import threading
+
+import numpy as np
+
+from cnnClassifier.pipeline.predict import DiseasePredictor
+
+
+class CascadePredictor:
+    """
+    Two-stage predictor with the same public API as DiseasePredictor.
+
+    Args:
+        fast:  Cheap first-stage DiseasePredictor (e.g. the distilled student)
+        full:  Full-accuracy DiseasePredictor used for escalations
+        band:  (low, high) — fast confidences inside [low, high] escalate to `full`
+    """
+
+    def __init__(self, fast, full, band: tuple = (0.0, 0.9)):
+        if (fast.image_size, fast.input_dtype) != (full.image_size, full.input_dtype):
+            raise ValueError(
+                "Cascade stages must share input size and dtype "
+                f"({fast.image_size}/{fast.input_dtype} vs {full.image_size}/{full.input_dtype})."
+            )
+        self.fast = fast
+        self.full = full
+        self.band = (float(band[0]), float(band[1]))
+        self.decided = {"fast": 0, "full": 0}
+        self._stats_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Shape/labels/cache/etc. come from the full model the cascade stands in for
+        return getattr(self.full, name)
+
+    # ── Lifecycle ──
+
+    @property
+    def is_available(self) -> bool:
+        return self.fast.is_available and self.full.is_available
+
+    @property
+    def model_id(self) -> str:
+        low, high = self.band
+        return f"cascade[{low:g},{high:g}]:{self.fast.model_id}|{self.full.model_id}"
+
+    @property
+    def estimated_memory_mb(self) -> float:
+        return self.fast.estimated_memory_mb + self.full.estimated_memory_mb
+
+    @property
+    def load_seconds(self) -> float:
+        return (self.fast.load_seconds or 0.0) + (self.full.load_seconds or 0.0)
+
+    @property
+    def warmup_seconds(self) -> float:
+        return (self.fast.warmup_seconds or 0.0) + (self.full.warmup_seconds or 0.0)
+
+    def load(self):
+        self.fast.load()
+        self.full.load()
+
+    def unload(self):
+        self.fast.unload()
+        self.full.unload()
+
+    @property
+    def managed(self) -> bool:
+        return self.fast.managed and self.full.managed
+
+    @managed.setter
+    def managed(self, value: bool):
+        self.fast.managed = self.full.managed = value
+
+    def _ensure_loaded(self):
+        self.fast._ensure_loaded()
+        self.full._ensure_loaded()
+
+    def warmup(self, runs: int = 2):
+        self.fast.warmup(runs)
+        self.full.warmup(runs)
+
+    def cache_key(self, image_bytes: bytes) -> str:
+        """Key in the full model's cache, on both stages' versions (None = no cache)."""
+        if self.cache is None:
+            return None
+        self._ensure_loaded()
+        self.fast.reload_if_changed()
+        self.full.reload_if_changed()
+        version = f"{self.fast._loaded_version}|{self.full._loaded_version}"
+        return self.cache.make_key(image_bytes, self.model_id, version)
+
+    def cached(self, image_bytes: bytes, compute) -> dict:
+        """Content-hash cache (the full model's), keyed on both stages' versions."""
+        key = self.cache_key(image_bytes)
+        if key is None:
+            return compute()
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result)
+        return dict(result)
+
+    # ── Inference ──
+
+    def preprocess(self, source) -> np.ndarray:
+        return self.fast.preprocess(source)
+
+    def preprocess_bytes(self, image_bytes: bytes) -> np.ndarray:
+        return self.fast.preprocess_bytes(image_bytes)
+
+    def predict(self, filename: str) -> dict:
+        return self.predict_array(self.preprocess(filename))
+
+    def predict_bytes(self, image_bytes: bytes) -> dict:
+        return self.cached(
+            image_bytes, lambda: self.predict_array(self.preprocess_bytes(image_bytes))
+        )
+
+    def predict_array(self, img_array: np.ndarray) -> dict:
+        return self.predict_batch([img_array])[0]
+
+    def predict_batch(self, img_arrays: list) -> list:
+        """
+        Score the whole batch with the fast model, then send only the
+        in-band images to the full model as one (smaller) batch.
+        """
+        self._ensure_loaded()
+        if len(img_arrays) == 1:
+            batch = np.expand_dims(img_arrays[0], axis=0)
+        else:
+            batch = np.stack(img_arrays, axis=0)
+        fast_probs = self.fast._run_model(batch)
+
+        low, high = self.band
+        confidences = np.max(fast_probs, axis=1)
+        escalate = [i for i, c in enumerate(confidences) if low <= c <= high]
+        escalated = set(escalate)
+
+        results = [None] * len(img_arrays)
+        for i, row in enumerate(fast_probs):
+            if i not in escalated:
+                results[i] = {**self.fast._format_result(row), "stage": "fast"}
+        if escalate:
+            full_results = self.full.predict_batch([img_arrays[i] for i in escalate])
+            for i, result in zip(escalate, full_results):
+                results[i] = {**result, "stage": "full", "fast_confidence": float(confidences[i])}
+
+        with self._stats_lock:
+            self.decided["fast"] += len(img_arrays) - len(escalate)
+            self.decided["full"] += len(escalate)
+        return results
+
+    # Same chunked decode + per-item error contract as DiseasePredictor
+    predict_many = DiseasePredictor.predict_many
+
+    def cascade_stats(self) -> dict:
+        with self._stats_lock:
+            total = self.decided["fast"] + self.decided["full"]
+            return {
+                "band": list(self.band),
+                "decided_by": dict(self.decided),
+                "escalation_rate": round(self.decided["full"] / total, 4) if total else 0.0,
+            }
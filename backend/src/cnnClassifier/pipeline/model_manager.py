@@ -0,0 +1,165 @@
+"""
+Memory-budgeted model manager.
+
+Tracks the resident-memory footprint of every loaded model (disease
+predictors, the RAG embedding model) and, when loading one more would
+exceed the configured RSS budget, unloads the least-recently-used ones
+first. Footprints are measured as the RSS delta around each load, so they
+are approximate; before a model's first load an estimate is used instead.
+
+    manager = ModelManager(budget_mb=1500)
+    manager.register("coccidiosis", load=p.load, unload=p.unload, estimate_mb=80)
+    manager.acquire("coccidiosis")   # loads (evicting others if needed), marks as used
+
+    with manager.pinned("coccidiosis"):   # ...and is never evicted until the block exits
+        predictor.predict_bytes(image_bytes)
+
+Models are only loaded through acquire(); an in-use (pinned) model is skipped
+when making room, so a request never has its model unloaded underneath it.
+"""
+
+import gc
+import time
+import threading
+from contextlib import contextmanager
+
+from cnnClassifier.utils.common import get_rss_mb
+
+
+class _ManagedModel:
+    def __init__(self, name: str, load, unload, estimate_mb: float):
+        self.name = name
+        self.load = load
+        self.unload = unload
+        self.estimate_mb = estimate_mb
+        self.loaded = False
+        self.pins = 0            # requests currently using the model (never evicted while > 0)
+        self.footprint_mb = None
+        self.last_used = 0.0
+        self.loads = 0
+        self.evictions = 0
+
+
+class ModelManager:
+    """
+    LRU model manager with an RSS budget.
+
+    Args:
+        budget_mb:  Memory budget for all managed models (None/0 = unlimited)
+    """
+
+    def __init__(self, budget_mb: float = None):
+        self.budget_mb = budget_mb or None
+        self.loads = 0
+        self.evictions = 0
+        self._models = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, load, unload, estimate_mb: float = 100.0, loaded: bool = False):
+        """Register a model by name with its load/unload callables."""
+        with self._lock:
+            entry = _ManagedModel(name, load, unload, estimate_mb)
+            entry.loaded = loaded
+            self._models[name] = entry
+
+    def reset_lock(self):
+        """Replace the lock in a freshly forked worker (one held at fork time never releases)."""
+        self._lock = threading.RLock()
+
+    @property
+    def used_mb(self) -> float:
+        return sum(
+            e.footprint_mb if e.footprint_mb is not None else e.estimate_mb
+            for e in self._models.values() if e.loaded
+        )
+
+    def acquire(self, name: str, pin: bool = False):
+        """
+        Ensure `name` is loaded (evicting LRU models if over budget) and mark it
+        used. With pin=True it also stays resident until release(name).
+        """
+        with self._lock:
+            entry = self._models[name]
+            entry.last_used = time.monotonic()
+            if entry.loaded:
+                entry.pins += pin
+                return
+
+            needed = entry.footprint_mb if entry.footprint_mb is not None else entry.estimate_mb
+            self._make_room(needed, exclude=name)
+
+            before = get_rss_mb()
+            entry.load()
+            measured = get_rss_mb() - before
+            # RSS may not grow if freed pages get reused — fall back to the estimate
+            entry.footprint_mb = round(measured if measured > 1.0 else needed, 1)
+            entry.loaded = True
+            entry.pins += pin
+            entry.loads += 1
+            self.loads += 1
+            print(f"📦 Loaded '{name}' (~{entry.footprint_mb:.0f} MB, "
+                  f"{self.used_mb:.0f}/{self.budget_mb or '∞'} MB in use)")
+
+    def release(self, name: str):
+        """Unpin a model acquired with pin=True (it becomes evictable again once unused)."""
+        with self._lock:
+            entry = self._models[name]
+            entry.pins = max(0, entry.pins - 1)
+
+    @contextmanager
+    def pinned(self, *names: str):
+        """Acquire and pin `names` (in order) for the duration of the block."""
+        acquired = []
+        try:
+            for name in names:
+                self.acquire(name, pin=True)
+                acquired.append(name)
+            yield
+        finally:
+            for name in acquired:
+                self.release(name)
+
+    def _make_room(self, needed_mb: float, exclude: str):
+        if not self.budget_mb:
+            return
+        while self.used_mb + needed_mb > self.budget_mb:
+            victims = [e for e in self._models.values() if e.loaded and not e.pins and e.name != exclude]
+            if not victims:
+                print(f"⚠️ '{exclude}' exceeds the {self.budget_mb} MB model budget and nothing "
+                      "else is evictable (unloaded or in use) — loading anyway")
+                return
+            self.evict(min(victims, key=lambda e: e.last_used).name)
+
+    def evict(self, name: str) -> bool:
+        """Unload one model and reclaim its memory (not while it is pinned). Returns True if unloaded."""
+        with self._lock:
+            entry = self._models[name]
+            if not entry.loaded or entry.pins:
+                return False
+            entry.unload()
+            entry.loaded = False
+            entry.evictions += 1
+            self.evictions += 1
+            gc.collect()   # once per eviction, not per request
+            print(f"♻️ Evicted '{name}' (LRU) — {self.used_mb:.0f} MB in use")
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb,
+                "used_mb": round(self.used_mb, 1),
+                "rss_mb": round(get_rss_mb(), 1),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "models": {
+                    e.name: {
+                        "loaded": e.loaded,
+                        "pinned": e.pins,
+                        "footprint_mb": e.footprint_mb,
+                        "loads": e.loads,
+                        "evictions": e.evictions,
+                    }
+                    for e in self._models.values()
+                },
+            }
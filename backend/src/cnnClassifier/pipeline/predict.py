@@ -5,11 +5,17 @@ Supports multiple disease models through the DiseasePredictor class.
 Each predictor loads its own model, class names, and recommendations.
 """
 
+import io
+import time
+import warnings
+import threading
 import numpy as np
-import tensorflow as tf
+from PIL import Image
 from tensorflow.keras.preprocessing import image
 import os
 
+from cnnClassifier.pipeline.backends import BACKENDS, create_backend
+
 
 # ─── Recommendations ─────────────────────────────────────
 
@@ -44,6 +50,126 @@ EXTERNAL_LESION_RECOMMENDATIONS = {
 }
 
 
+# ─── Artifacts ────────────────────────────────────────────
+
+def resolution_artifact_path(h5_path: str, resolution: int) -> str:
+    """models/foo.h5 + 160 → models/foo.r160.h5 (training scripts' --img-size); 224 is foo.h5 itself."""
+    if resolution == 224:
+        return h5_path
+    return f"{os.path.splitext(h5_path)[0]}.r{resolution}.h5"
+
+
+def tflite_artifact_path(h5_path: str, variant: str) -> str:
+    """models/foo.h5 + "int8" → models/foo.int8.tflite (written by convert_tflite.py)."""
+    return f"{os.path.splitext(h5_path)[0]}.{variant}.tflite"
+
+
+def uint8_artifact_path(h5_path: str) -> str:
+    """models/foo.h5 → models/foo.uint8.h5 (uint8 input + Rescaling, written by export_uint8.py)."""
+    return f"{os.path.splitext(h5_path)[0]}.uint8.h5"
+
+
+def early_exit_artifact_path(h5_path: str) -> str:
+    """models/foo.h5 → models/foo.early_exit.h5 (train_coccidiosis.py --early-exit)."""
+    return f"{os.path.splitext(h5_path)[0]}.early_exit.h5"
+
+
+def pruned_artifact_path(h5_path: str) -> str:
+    """models/foo.h5 → models/foo.pruned.h5 (structured-pruned + fine-tuned, written by prune_models.py)."""
+    return f"{os.path.splitext(h5_path)[0]}.pruned.h5"
+
+
+def onnx_artifact_path(h5_path: str) -> str:
+    """models/foo.h5 → models/foo.onnx (written by export_onnx.py)."""
+    return f"{os.path.splitext(h5_path)[0]}.onnx"
+
+
+# ─── Image Decoding ───────────────────────────────────────
+
+# Header-declared pixel count above which an upload is refused before decoding
+# (50 MP phone photos pass; crafted 100k×100k "bombs" do not).
+MAX_DECODE_PIXELS = 80_000_000
+
+
+class ImageTooLargeError(ValueError):
+    """The image header declares more pixels than MAX_DECODE_PIXELS."""
+
+
+class ModelNotLoadedError(RuntimeError):
+    """A managed predictor was used while unloaded (reloads go through its ModelManager)."""
+
+
+def decode_image(source, target_size: tuple) -> Image.Image:
+    """
+    Decode `source` (filename or file-like) into an RGB PIL image of `target_size` (H, W).
+
+    JPEGs are decoded with libjpeg's DCT-domain scaling (PIL draft mode) at the
+    smallest 1/1, 1/2, 1/4 or 1/8 scale that is still >= target_size, so a
+    12–50 MP phone photo never materialises at full resolution. The final
+    resize matches load_img() (nearest neighbour), as before.
+    """
+    try:
+        # PIL's own bomb check fires inside open() for headers above ~89 MP
+        # (warning) / ~179 MP (error) — surface both as ImageTooLargeError
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            img = Image.open(source)   # lazy: only the header has been read
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ImageTooLargeError(
+            f"Image is too large to decode ({e}); the limit is {MAX_DECODE_PIXELS / 1e6:.0f} MP."
+        ) from e
+    width, height = img.size
+    if width * height > MAX_DECODE_PIXELS:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height / 1e6:.0f} MP); "
+            f"the limit is {MAX_DECODE_PIXELS / 1e6:.0f} MP."
+        )
+
+    target_hw = (target_size[1], target_size[0])
+    if img.format == "JPEG":
+        img.draft("RGB", target_hw)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if img.size != target_hw:
+        img = img.resize(target_hw, Image.NEAREST)
+    return img
+
+
+# ─── Test-Time Augmentation ───────────────────────────────
+
+def _center_crop(img_array: np.ndarray, fraction: float) -> np.ndarray:
+    """Central crop resized back to the input size (nearest neighbour)."""
+    h, w = img_array.shape[:2]
+    dh, dw = int(h * (1 - fraction) / 2), int(w * (1 - fraction) / 2)
+    rows = np.linspace(dh, h - dh - 1, h).round().astype(int)
+    cols = np.linspace(dw, w - dw - 1, w).round().astype(int)
+    return img_array[rows][:, cols]
+
+
+def _shift_brightness(img_array: np.ndarray, delta: float) -> np.ndarray:
+    """Add `delta` (on the 0–1 scale) to every pixel, for float or uint8 arrays."""
+    if img_array.dtype == np.uint8:
+        return np.clip(img_array.astype(np.int16) + round(delta * 255), 0, 255).astype(np.uint8)
+    return np.clip(img_array + delta, 0.0, 1.0)
+
+
+# Applied in this order; tta_variants=N uses the first N
+TTA_AUGMENTATIONS = (
+    lambda x: x[:, ::-1],                          # horizontal flip
+    lambda x: _center_crop(x, 0.9),
+    lambda x: _shift_brightness(x, 0.1),           # brighter
+    lambda x: _shift_brightness(x, -0.1),          # darker
+    lambda x: _center_crop(x, 0.9)[:, ::-1],
+    lambda x: _center_crop(x, 0.8),
+    lambda x: x[::-1],                             # vertical flip
+)
+
+
+def augment_variants(img_array: np.ndarray, n: int) -> np.ndarray:
+    """Stack the first `n` TTA variants of one preprocessed (H, W, 3) array."""
+    return np.stack([aug(img_array) for aug in TTA_AUGMENTATIONS[:n]], axis=0)
+
+
 # ─── Generic Predictor ────────────────────────────────────
 
 class DiseasePredictor:
@@ -56,6 +182,16 @@ class DiseasePredictor:
         recommendations:  Dict mapping class name → recommendation string
         image_size:       Tuple (H, W) for input resizing
         confidence_threshold: Below this, return "Inconclusive"
+        use_compiled:     Serve through a traced tf.function instead of model.predict()
+        jit_compile:      XLA-compile the traced serving function
+        backend:          "keras" (.h5), "early_exit", "tflite" or "onnx" — model_path points at the matching artifact
+        num_threads:      CPU threads for the TFLite / ONNX Runtime backends (None = runtime default)
+        cache:            Optional PredictionCache for repeated uploads of the same image
+        tta_variants:     When a prediction is below confidence_threshold, re-run it on this many
+                          augmented variants (one batch) and average the probabilities (0 = off)
+        input_dtype:      "float32" (preprocess to pixels / 255.0) or "uint8" (raw pixels for
+                          artifacts with a built-in Rescaling layer, see export_uint8.py)
+        exit_threshold:   Confidence that ends inference at an intermediate head (early_exit backend)
     """
 
     def __init__(
@@ -65,32 +201,175 @@ class DiseasePredictor:
         recommendations: dict,
         image_size: tuple = (224, 224),
         confidence_threshold: float = 0.6,
+        use_compiled: bool = True,
+        jit_compile: bool = False,
+        backend: str = "keras",
+        num_threads: int = None,
+        cache=None,
+        tta_variants: int = 0,
+        input_dtype: str = "float32",
+        exit_threshold: float = 0.9,
     ):
         self.model_path = model_path
         self.class_names = class_names
         self.recommendations = recommendations
         self.image_size = image_size
         self.confidence_threshold = confidence_threshold
-        self._model = None
+        self.use_compiled = use_compiled
+        self.jit_compile = jit_compile
+        self.backend = backend
+        self.num_threads = num_threads
+        self.cache = cache
+        self.tta_variants = max(0, min(int(tta_variants), len(TTA_AUGMENTATIONS)))
+        self.input_dtype = input_dtype
+        self.exit_threshold = exit_threshold
+        # Set when a ModelManager owns load/unload: use then never reloads behind its back
+        self.managed = False
+        self._backend = None
+        self._loaded_version = None
+        self._reload_lock = threading.Lock()
+        self.load_seconds = None
+        self.warmup_seconds = None
 
     @property
     def is_available(self) -> bool:
         """Check if the model file exists."""
         return os.path.isfile(self.model_path)
 
+    @property
+    def model_id(self) -> str:
+        """Identity of the served model (artifact + runtime + input size)."""
+        return f"{self.model_path}:{self.backend}:{self.image_size[0]}x{self.image_size[1]}"
+
+    @property
+    def model_version(self) -> str:
+        """Version of the artifact on disk (mtime + size — changes when the file is replaced)."""
+        stat = os.stat(self.model_path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    @property
+    def fork_safe(self) -> bool:
+        """Can this predictor be loaded in a gunicorn master and shared by forked workers?"""
+        return self.backend in BACKENDS and BACKENDS[self.backend].is_fork_safe(self.num_threads)
+
     def load(self):
         """Load model into memory (lazy, called once)."""
-        if self._model is None:
-            if not self.is_available:
-                raise FileNotFoundError(
-                    f"Model not found at {self.model_path}. "
-                    "Please train the model first."
-                )
-            print(f"🔄 Loading model from {self.model_path}...")
-            self._model = tf.keras.models.load_model(
-                self.model_path, compile=False
+        if self._backend is None:
+            self._backend = self._create_backend()
+
+    def unload(self):
+        """Drop the loaded runtime so its memory can be reclaimed (next load() reloads)."""
+        self._backend = None
+        self._loaded_version = None
+
+    def _ensure_loaded(self):
+        """Lazy load on first use — unless a model manager decides when this model is resident."""
+        if self._backend is not None:
+            return
+        if self.managed:
+            raise ModelNotLoadedError(
+                f"{self.model_path} is not loaded — acquire it through the model manager first."
             )
-            print(f"✅ Model loaded: {self.model_path}")
+        self.load()
+
+    @property
+    def estimated_memory_mb(self) -> float:
+        """Rough resident footprint before the first load (weights + runtime overhead)."""
+        size_mb = os.path.getsize(self.model_path) / (1024 * 1024) if self.is_available else 0.0
+        return size_mb * 1.5 + 20.0
+
+    def _create_backend(self):
+        if not self.is_available:
+            raise FileNotFoundError(
+                f"Model not found at {self.model_path}. "
+                "Please train the model first."
+            )
+        start = time.perf_counter()
+        version = self.model_version
+        backend = create_backend(
+            self.backend,
+            self.model_path,
+            image_size=self.image_size,
+            input_dtype=self.input_dtype,
+            use_compiled=self.use_compiled,
+            jit_compile=self.jit_compile,
+            num_threads=self.num_threads,
+            exit_threshold=self.exit_threshold,
+        )
+        backend.load()
+        self._loaded_version = version
+        self.load_seconds = time.perf_counter() - start
+        return backend
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the model (and invalidate the cache) if its file changed on disk,
+        e.g. after /train. The new backend is swapped in atomically.
+        """
+        if self._backend is None or self.model_version == self._loaded_version:
+            return False
+        with self._reload_lock:
+            if self.model_version == self._loaded_version:
+                return False
+            print(f"🔁 Model file changed — reloading {self.model_path}")
+            self._backend = self._create_backend()
+            if self.cache is not None:
+                self.cache.clear()
+            return True
+
+    def cache_key(self, image_bytes: bytes) -> str:
+        """Content-hash cache key for these bytes under the current model version (None = no cache)."""
+        if self.cache is None:
+            return None
+        self._ensure_loaded()
+        self.reload_if_changed()
+        return self.cache.make_key(image_bytes, self.model_id, self._loaded_version)
+
+    def cached(self, image_bytes: bytes, compute) -> dict:
+        """Serve `compute()` through the content-hash cache (if one is configured)."""
+        key = self.cache_key(image_bytes)
+        if key is None:
+            return compute()
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result)
+        return dict(result)
+
+    def warmup(self, runs: int = 2):
+        """Run dummy inferences so tracing/allocation happens before real traffic."""
+        self._ensure_loaded()
+        start = time.perf_counter()
+        dummy = np.zeros((1, *self.image_size, 3), dtype=self.input_dtype)
+        for _ in range(runs):
+            self._run_model(dummy)
+        # Synthetic inputs must not show up in the runtime's counters (e.g. early-exit rate)
+        self._backend.reset_stats()
+        self.warmup_seconds = time.perf_counter() - start
+
+    def backend_stats(self) -> dict:
+        """Counters of the loaded runtime (e.g. early-exit rate); empty if not loaded."""
+        backend = self._backend
+        return backend.stats() if backend is not None else {}
+
+    def preprocess(self, source) -> np.ndarray:
+        """
+        Load and preprocess one image into a (H, W, 3) array.
+
+        `source` may be a filename or a file-like object (e.g. io.BytesIO).
+        For uint8 models this is the decoded pixel buffer itself (4x smaller,
+        no float copies) and the /255.0 runs inside the model graph.
+        """
+        # Preprocess — MUST match training: resize + /255.0
+        img = decode_image(source, self.image_size)
+        if self.input_dtype == "uint8":
+            return np.asarray(img)
+        img_array = image.img_to_array(img)
+        return img_array / 255.0
+
+    def preprocess_bytes(self, image_bytes: bytes) -> np.ndarray:
+        """Preprocess an encoded JPEG/PNG held in memory."""
+        return self.preprocess(io.BytesIO(image_bytes))
 
     def predict(self, filename: str) -> dict:
         """
@@ -104,18 +383,92 @@ class DiseasePredictor:
                 "class": str,          # backward compat
             }
         """
-        self.load()
+        self._ensure_loaded()
+        return self.predict_array(self.preprocess(filename))
 
-        # Preprocess — MUST match training: resize + /255.0
-        img = image.load_img(filename, target_size=self.image_size)
-        img_array = image.img_to_array(img)
-        img_array = img_array / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
+    def predict_bytes(self, image_bytes: bytes) -> dict:
+        """Run inference on encoded image bytes without touching the disk."""
+        self._ensure_loaded()
+        return self.cached(
+            image_bytes, lambda: self.predict_array(self.preprocess_bytes(image_bytes))
+        )
+
+    def predict_array(self, img_array: np.ndarray) -> dict:
+        """Run inference on a single preprocessed (H, W, 3) array."""
+        self._ensure_loaded()
+        return self.predict_batch([img_array])[0]
+
+    def predict_batch(self, img_arrays: list) -> list:
+        """Run one forward pass over several preprocessed arrays (one result per input)."""
+        self._ensure_loaded()
+        if len(img_arrays) == 1:
+            batch = np.expand_dims(img_arrays[0], axis=0)   # view, no copy
+        else:
+            batch = np.stack(img_arrays, axis=0)
+        predictions = self._run_model(batch)
+        predictions, augmented = self._apply_tta(img_arrays, predictions)
+        results = [self._format_result(row) for row in predictions]
+        for i in augmented:
+            results[i]["tta_variants"] = self.tta_variants
+        return results
+
+    def _apply_tta(self, img_arrays: list, predictions: np.ndarray):
+        """
+        Average in augmented-variant probabilities for the uncertain rows only,
+        so confident predictions keep single-pass latency. All variants of all
+        uncertain rows go through the model as one batch.
+
+        Returns (predictions, indices of the rows that were augmented).
+        """
+        if not self.tta_variants:
+            return predictions, []
+        uncertain = [i for i, row in enumerate(predictions) if np.max(row) < self.confidence_threshold]
+        if not uncertain:
+            return predictions, []
+
+        n = self.tta_variants
+        variants = np.concatenate([augment_variants(img_arrays[i], n) for i in uncertain], axis=0)
+        variant_probs = self._run_model(variants).reshape(len(uncertain), n, -1)
 
-        # Predict
-        predictions = self._model.predict(img_array)
-        class_index = int(np.argmax(predictions, axis=1)[0])
-        confidence = float(np.max(predictions))
+        predictions = np.array(predictions, dtype=np.float32, copy=True)
+        for row, i in zip(variant_probs, uncertain):
+            predictions[i] = (predictions[i] + row.sum(axis=0)) / (n + 1)
+        return predictions, uncertain
+
+    def predict_many(self, images: list, chunk_size: int = 16) -> list:
+        """
+        Predict a list of encoded images in vectorized chunks.
+
+        Returns one dict per input, in order. Images that fail to decode get
+        {"error": str} instead of a prediction, so one bad file never fails the batch.
+        """
+        self._ensure_loaded()
+        results = [None] * len(images)
+        for start in range(0, len(images), chunk_size):
+            arrays, indices = [], []
+            for i in range(start, min(start + chunk_size, len(images))):
+                try:
+                    arrays.append(self.preprocess_bytes(images[i]))
+                    indices.append(i)
+                except ImageTooLargeError as e:
+                    results[i] = {"error": str(e)}
+                except Exception as e:
+                    print(f"⚠️ Skipping undecodable image #{i}: {e}")
+                    results[i] = {"error": "Could not decode image."}
+            if arrays:
+                for i, result in zip(indices, self.predict_batch(arrays)):
+                    results[i] = result
+        return results
+
+    def _run_model(self, batch: np.ndarray) -> np.ndarray:
+        """Forward pass over an (N, H, W, 3) batch → (N, num_classes) probabilities."""
+        self._ensure_loaded()
+        return self._backend.run(batch)
+
+    def _format_result(self, probs: np.ndarray) -> dict:
+        """Turn one row of class probabilities into the API result dict."""
+        class_index = int(np.argmax(probs))
+        confidence = float(np.max(probs))
 
         # Low-confidence handling
         if confidence < self.confidence_threshold:
@@ -153,17 +506,27 @@ class PredictionPipeline:
 
     _predictor = None
 
-    def __init__(self, filename):
+    def __init__(self, filename, **predictor_kwargs):
         self.filename = filename
         if PredictionPipeline._predictor is None:
-            model_path = os.path.join("artifacts", "training", "model.h5")
+            model_path = predictor_kwargs.pop(
+                "model_path", os.path.join("artifacts", "training", "model.h5")
+            )
             PredictionPipeline._predictor = DiseasePredictor(
                 model_path=model_path,
                 class_names=["Coccidiosis", "Healthy"],
                 recommendations=COCCIDIOSIS_RECOMMENDATIONS,
-                image_size=(224, 224),
+                image_size=predictor_kwargs.pop("image_size", (224, 224)),
                 confidence_threshold=0.6,
+                **predictor_kwargs,
             )
 
+    @property
+    def predictor(self) -> DiseasePredictor:
+        return PredictionPipeline._predictor
+
     def predict(self):
         return PredictionPipeline._predictor.predict(self.filename)
+
+    def predict_bytes(self, image_bytes: bytes) -> dict:
+        return PredictionPipeline._predictor.predict_bytes(image_bytes)
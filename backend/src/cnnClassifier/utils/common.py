@@ -58,8 +58,24 @@ def get_size(path: Path) -> str:
     return f"~ {size_in_kb} KB"
 
 
+def get_rss_mb() -> float:
+    """Current resident set size of this process in MB (Linux /proc, else peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def decode_base64_image(imgstring) -> bytes:
+    """Decode a base64 image payload into raw bytes (no filesystem access)."""
+    return base64.b64decode(imgstring)
+
+
 def decodeImage(imgstring, fileName):
-    imgdata = base64.b64decode(imgstring)
+    imgdata = decode_base64_image(imgstring)
     with open(fileName, "wb") as f:
         f.write(imgdata)
 
@@ -0,0 +1,66 @@
+import io
+import base64
+import importlib
+
+import pytest
+
+from PIL import Image
+
+from conftest import png_header
+from cnnClassifier.pipeline.predict import DiseasePredictor
+
+
+def _tiny_model(path, num_classes: int):
+    import tensorflow as tf
+    model = tf.keras.Sequential([
+        tf.keras.Input((224, 224, 3)),
+        tf.keras.layers.Conv2D(2, 3, strides=8),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(num_classes, activation="softmax"),
+    ])
+    model.save(path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    models = tmp_path_factory.mktemp("models")
+    patch = pytest.MonkeyPatch()
+    patch.setenv("COCCIDIOSIS_MODEL", _tiny_model(models / "coccidiosis.h5", 2))
+    patch.setenv("EXTERNAL_LESION_MODEL", _tiny_model(models / "external_lesion.h5", 3))
+    app = importlib.import_module("app")
+    app.limiter.enabled = False
+    yield app.app.test_client()
+    patch.undo()
+
+
+BOMB = png_header(100_000, 100_000)
+
+
+@pytest.mark.parametrize("route", ["/predict", "/predict/external-lesion", "/diagnose"])
+def test_decode_bomb_returns_413(client, route):
+    response = client.post(route, data=BOMB, content_type="image/png")
+    assert response.status_code == 413
+    assert "too large" in response.get_json()["error"]
+
+
+def test_decode_bomb_in_batch_is_a_per_item_error(client):
+    response = client.post("/predict/batch", json={"images": [base64.b64encode(BOMB).decode()]})
+    assert response.status_code == 200
+    assert "too large" in response.get_json()["results"][0]["error"]
+
+
+def test_diagnose_cache_hit_skips_preprocessing(client, monkeypatch):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (120, 90, 60)).save(buffer, format="PNG")
+    calls = []
+    preprocess_bytes = DiseasePredictor.preprocess_bytes
+    monkeypatch.setattr(DiseasePredictor, "preprocess_bytes",
+                        lambda self, data: calls.append(data) or preprocess_bytes(self, data))
+
+    first = client.post("/diagnose", data=buffer.getvalue(), content_type="image/png").get_json()
+    assert len(calls) == 1  # shared by both models (same resolution)
+    second = client.post("/diagnose", data=buffer.getvalue(), content_type="image/png").get_json()
+    assert len(calls) == 1
+    for name in ("coccidiosis", "external_lesion"):
+        assert second[name]["disease"] == first[name]["disease"]
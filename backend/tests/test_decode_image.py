@@ -0,0 +1,26 @@
+import io
+
+import pytest
+from PIL import Image
+
+from cnnClassifier.pipeline.predict import MAX_DECODE_PIXELS, ImageTooLargeError, decode_image
+from conftest import png_header
+
+
+@pytest.mark.parametrize("width, height", [
+    (100_000, 100_000),   # above PIL's DecompressionBombError limit
+    (10_000, 9_500),      # between PIL's warning and error limits
+    (9_000, 9_000),       # below PIL's limits, above MAX_DECODE_PIXELS
+])
+def test_oversized_header_is_rejected_before_decoding(width, height):
+    assert width * height > MAX_DECODE_PIXELS
+    with pytest.raises(ImageTooLargeError):
+        decode_image(io.BytesIO(png_header(width, height)), (224, 224))
+
+
+def test_normal_image_is_resized_to_target():
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), (10, 20, 30)).save(buf, "JPEG")
+    buf.seek(0)
+    img = decode_image(buf, (160, 192))
+    assert img.size == (192, 160) and img.mode == "RGB"
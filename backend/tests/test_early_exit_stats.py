@@ -0,0 +1,33 @@
+import numpy as np
+
+from cnnClassifier.pipeline.predict import DiseasePredictor
+
+
+def _early_exit_model(path):
+    import tensorflow as tf
+    inputs = tf.keras.Input((32, 32, 3))
+    pooled = tf.keras.layers.GlobalAveragePooling2D(name="pool")(inputs)
+    exit_head = tf.keras.layers.Dense(2, activation="softmax", name="exit_pool")(pooled)
+    final = tf.keras.layers.Dense(2, activation="softmax", name="classifier")(
+        tf.keras.layers.Dense(4, name="hidden")(pooled)
+    )
+    tf.keras.Model(inputs, [final, exit_head]).save(path)
+    return str(path)
+
+
+def test_warmup_does_not_count_towards_exit_stats(tmp_path):
+    predictor = DiseasePredictor(
+        model_path=_early_exit_model(tmp_path / "model.early_exit.h5"),
+        class_names=["a", "b"],
+        recommendations={},
+        image_size=(32, 32),
+        backend="early_exit",
+        exit_threshold=0.0,   # every image leaves at the first head
+    )
+    predictor.warmup(runs=3)
+    assert predictor.backend_stats()["exit_counts"] == [0, 0]
+
+    predictor.predict_array(np.zeros((32, 32, 3), np.float32))
+    stats = predictor.backend_stats()
+    assert stats["exit_counts"] == [1, 0]
+    assert stats["early_exit_rate"] == 1.0
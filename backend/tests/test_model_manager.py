@@ -0,0 +1,76 @@
+import pytest
+
+from cnnClassifier.pipeline import model_manager
+from cnnClassifier.pipeline.model_manager import ModelManager
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def manager(monkeypatch, events):
+    # Fake loads allocate nothing: footprints fall back to the estimates
+    monkeypatch.setattr(model_manager, "get_rss_mb", lambda: 500.0)
+    manager = ModelManager(budget_mb=250)
+    for name in ("a", "b", "c"):
+        manager.register(
+            name,
+            load=lambda name=name: events.append(("load", name)),
+            unload=lambda name=name: events.append(("unload", name)),
+            estimate_mb=100,
+        )
+    return manager
+
+
+def loaded(manager) -> set:
+    return {name for name, m in manager.stats()["models"].items() if m["loaded"]}
+
+
+def test_least_recently_used_is_evicted(manager, events):
+    manager.acquire("a")
+    manager.acquire("b")
+    manager.acquire("a")          # a is now the most recently used
+    manager.acquire("c")
+    assert loaded(manager) == {"a", "c"}
+    assert events[-2:] == [("unload", "b"), ("load", "c")]
+    assert manager.stats()["evictions"] == 1
+
+
+def test_pinned_model_is_never_evicted(manager):
+    manager.acquire("a", pin=True)
+    manager.acquire("b")
+    manager.acquire("c")
+    assert loaded(manager) == {"a", "c"}
+    assert manager.evict("a") is False
+
+    manager.release("a")
+    assert manager.evict("a") is True
+    assert loaded(manager) == {"c"}
+
+
+def test_over_budget_when_everything_is_pinned(manager):
+    manager.acquire("a", pin=True)
+    manager.acquire("b", pin=True)
+    manager.acquire("c")
+    assert loaded(manager) == {"a", "b", "c"}
+    assert manager.used_mb == 300
+
+
+def test_pinned_block_releases_on_error(manager):
+    with pytest.raises(RuntimeError):
+        with manager.pinned("a", "b"):
+            assert manager.stats()["models"]["a"]["pinned"] == 1
+            raise RuntimeError
+    assert manager.stats()["models"]["a"]["pinned"] == 0
+    assert manager.evict("a") is True
+
+
+def test_unlimited_budget_never_evicts(monkeypatch):
+    monkeypatch.setattr(model_manager, "get_rss_mb", lambda: 500.0)
+    manager = ModelManager(budget_mb=0)
+    for name in ("a", "b", "c"):
+        manager.register(name, load=lambda: None, unload=lambda: None, estimate_mb=1000)
+        manager.acquire(name)
+    assert manager.stats()["evictions"] == 0
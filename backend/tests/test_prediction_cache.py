@@ -0,0 +1,72 @@
+import os
+import time
+
+from cnnClassifier.pipeline.cache import PredictionCache
+from cnnClassifier.pipeline.predict import DiseasePredictor
+
+
+def test_key_covers_image_model_and_version():
+    key = PredictionCache.make_key(b"image", "coccidiosis.h5:keras:224x224", "1:100")
+    assert key == PredictionCache.make_key(b"image", "coccidiosis.h5:keras:224x224", "1:100")
+    assert key != PredictionCache.make_key(b"other", "coccidiosis.h5:keras:224x224", "1:100")
+    assert key != PredictionCache.make_key(b"image", "coccidiosis.h5:tflite:224x224", "1:100")
+    assert key != PredictionCache.make_key(b"image", "coccidiosis.h5:keras:224x224", "2:100")
+
+
+def test_hits_misses_and_stored_copy():
+    cache = PredictionCache()
+    result = {"disease": "Healthy"}
+    assert cache.get("k") is None
+    cache.put("k", result)
+    result["disease"] = "mutated"
+    assert cache.get("k") == {"disease": "Healthy"}
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_lru_and_ttl_eviction():
+    cache = PredictionCache(maxsize=2, ttl=0.05)
+    cache.put("a", {})
+    cache.put("b", {})
+    cache.get("a")
+    cache.put("c", {})
+    assert cache.get("b") is None   # least recently used
+    assert cache.get("a") == {}
+    time.sleep(0.1)
+    assert cache.get("a") is None and cache.get("c") is None
+
+
+def _tiny_model(path):
+    import tensorflow as tf
+    model = tf.keras.Sequential([
+        tf.keras.Input((32, 32, 3)),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(2, activation="softmax"),
+    ])
+    model.save(path)
+    return str(path)
+
+
+def test_model_file_change_invalidates(tmp_path):
+    predictor = DiseasePredictor(
+        model_path=_tiny_model(tmp_path / "model.h5"),
+        class_names=["a", "b"],
+        recommendations={},
+        image_size=(32, 32),
+        cache=PredictionCache(),
+    )
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"disease": "a"}
+
+    predictor.cached(b"image", compute)
+    predictor.cached(b"image", compute)
+    assert len(calls) == 1
+
+    # A retrained model replaces the file: its version changes and the cache is dropped
+    stat = os.stat(predictor.model_path)
+    os.utime(predictor.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    predictor.cached(b"image", compute)
+    assert len(calls) == 2
+    assert predictor.cache.stats()["invalidations"] == 1
@@ -17,7 +17,8 @@ Key improvements over the original DVC pipeline:
 
 Usage:
     cd backend
-    python train_coccidiosis.py
+    python train_coccidiosis.py [--early-exit] [--img-size 160|192|224]
+    python train_coccidiosis.py --exits-only      # add exit heads to the existing model.h5
 
 Dataset expected at:
     backend/Coccidiosis/
@@ -28,11 +29,18 @@ Output:
     artifacts/training/model.h5          (replaces existing model)
     models/coccidiosis_metrics.json      (per-class metrics)
     models/coccidiosis_confusion_matrix.png
+    artifacts/training/model.early_exit.h5      (--early-exit / --exits-only)
+    models/coccidiosis_early_exit_metrics.json  (per-exit accuracy, FLOPs saved)
+
+    --img-size 160/192 writes artifacts/training/model.r160.h5 and
+    models/coccidiosis_r160_metrics.json instead (see benchmark_resolution.py).
 """
 
 import os
+import sys
 import json
 import shutil
+import argparse
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
@@ -48,8 +56,14 @@ from tensorflow.keras.callbacks import (
 from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.utils.class_weight import compute_class_weight
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.backends import EXIT_PREFIX, split_early_exit
+from cnnClassifier.pipeline.predict import early_exit_artifact_path, resolution_artifact_path
+
 # ─── Config ───────────────────────────────────────────────
 IMG_SIZE        = (224, 224)
+RESOLUTIONS     = [160, 192, 224]   # --img-size variants; 224 is the production model.h5
 BATCH_SIZE      = 16
 EPOCHS_PHASE1   = 20       # Frozen backbone
 EPOCHS_PHASE2   = 25       # Fine-tune top 4 conv blocks
@@ -64,11 +78,28 @@ OUTPUT_DIR      = os.path.join(os.path.dirname(__file__), "models")
 ARTIFACTS_DIR   = os.path.join(os.path.dirname(__file__), "artifacts", "training")
 MODEL_PATH      = os.path.join(ARTIFACTS_DIR, "model.h5")
 BACKUP_PATH     = os.path.join(ARTIFACTS_DIR, "model.h5.backup")
+METRICS_NAME    = "coccidiosis"
+
+# Early exit (--early-exit): lightweight heads after intermediate VGG16 blocks
+EARLY_EXIT_CUTS = ["block3_pool", "block4_pool"]
+EPOCHS_EXITS    = 10
+EXIT_THRESHOLDS = [0.8, 0.9, 0.95, 0.99]
+EARLY_EXIT_PATH = os.path.join(ARTIFACTS_DIR, "model.early_exit.h5")
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(ARTIFACTS_DIR, exist_ok=True)
 
 
+def configure_resolution(size):
+    """Point IMG_SIZE and every output path at the --img-size variant."""
+    global IMG_SIZE, MODEL_PATH, BACKUP_PATH, METRICS_NAME, EARLY_EXIT_PATH
+    IMG_SIZE = (size, size)
+    MODEL_PATH = resolution_artifact_path(os.path.join(ARTIFACTS_DIR, "model.h5"), size)
+    BACKUP_PATH = f"{MODEL_PATH}.backup"
+    METRICS_NAME = "coccidiosis" if size == 224 else f"coccidiosis_r{size}"
+    EARLY_EXIT_PATH = early_exit_artifact_path(MODEL_PATH)
+
+
 # ─── Data Generators ─────────────────────────────────────
 def create_generators():
     """
@@ -189,8 +220,12 @@ def unfreeze_layers(model, num_layers):
 
 
 # ─── Evaluation ───────────────────────────────────────────
-def evaluate_model(model, val_gen):
-    """Generate confusion matrix, precision, recall, F1."""
+def evaluate_model(model, val_gen, output_name="coccidiosis",
+                   title="Coccidiosis Detection — Confusion Matrix (v2)"):
+    """
+    Generate confusion matrix, precision, recall, F1.
+    Writes models/<output_name>_metrics.json and models/<output_name>_confusion_matrix.png.
+    """
     print("\n[EVAL] Evaluating on validation set...")
 
     val_gen.reset()
@@ -229,7 +264,7 @@ def evaluate_model(model, val_gen):
         },
         "confusion_matrix": cm.tolist(),
     }
-    metrics_path = os.path.join(OUTPUT_DIR, "coccidiosis_metrics.json")
+    metrics_path = os.path.join(OUTPUT_DIR, f"{output_name}_metrics.json")
     with open(metrics_path, "w") as f:
         json.dump(metrics, f, indent=2)
     print(f"[OK] Metrics saved to {metrics_path}")
@@ -248,8 +283,8 @@ def evaluate_model(model, val_gen):
         )
         ax.set_xlabel("Predicted")
         ax.set_ylabel("True")
-        ax.set_title("Coccidiosis Detection — Confusion Matrix (v2)")
-        fig_path = os.path.join(OUTPUT_DIR, "coccidiosis_confusion_matrix.png")
+        ax.set_title(title)
+        fig_path = os.path.join(OUTPUT_DIR, f"{output_name}_confusion_matrix.png")
         fig.savefig(fig_path, dpi=150, bbox_inches="tight")
         plt.close(fig)
         print(f"[OK] Confusion matrix plot saved to {fig_path}")
@@ -259,6 +294,132 @@ def evaluate_model(model, val_gen):
     return metrics
 
 
+# ─── Early Exit ──────────────────────────────────────────
+def attach_exit_heads(model):
+    """
+    Freeze the trained model and add a GAP + softmax head after each cut in
+    EARLY_EXIT_CUTS. The final output is unchanged; serve with the
+    early_exit backend (COCCIDIOSIS_BACKEND=early_exit).
+    """
+    for layer in model.layers:
+        layer.trainable = False
+
+    heads = []
+    for cut in EARLY_EXIT_CUTS:
+        x = GlobalAveragePooling2D(name=f"{EXIT_PREFIX}{cut}_gap")(model.get_layer(cut).output)
+        x = Dropout(0.2, name=f"{EXIT_PREFIX}{cut}_dropout")(x)
+        heads.append(Dense(len(CLASS_NAMES), activation="softmax", name=f"{EXIT_PREFIX}{cut}")(x))
+    return Model(inputs=model.input, outputs=[*heads, model.output])
+
+
+def _repeat_targets(generator, n):
+    """Feed the same labels to every output of the multi-exit model."""
+    while True:
+        x, y = next(generator)
+        yield x, tuple([y] * n)
+
+
+def train_exit_heads(ee_model, train_gen, val_gen):
+    """Train only the exit heads (backbone and final head stay frozen)."""
+    n = len(ee_model.outputs)
+    ee_model.compile(
+        optimizer=Adam(learning_rate=LEARNING_RATE * 10),
+        loss=[tf.keras.losses.CategoricalCrossentropy(label_smoothing=0.1)] * n,
+        loss_weights=[1.0] * (n - 1) + [0.0],
+        metrics=[["accuracy"] for _ in range(n)],
+    )
+    ee_model.fit(
+        _repeat_targets(train_gen, n),
+        steps_per_epoch=len(train_gen),
+        epochs=EPOCHS_EXITS,
+        validation_data=_repeat_targets(val_gen, n),
+        validation_steps=len(val_gen),
+        callbacks=[
+            EarlyStopping(
+                monitor="val_loss", patience=3,
+                restore_best_weights=True, verbose=1
+            ),
+        ],
+    )
+
+
+def layer_flops(layer) -> int:
+    """Multiply-adds ×2 of one Conv2D/Dense layer (other layers are negligible)."""
+    if isinstance(layer, tf.keras.layers.Conv2D):
+        _, h, w, c_out = layer.output.shape
+        kh, kw = layer.kernel_size
+        return 2 * h * w * c_out * kh * kw * layer.input.shape[-1]
+    if isinstance(layer, Dense):
+        return 2 * layer.input.shape[-1] * layer.units
+    return 0
+
+
+def evaluate_early_exit(ee_model, val_gen):
+    """Per-exit accuracy and, per threshold, exit distribution and average FLOPs saved."""
+    print("\n[EVAL] Evaluating early exits on validation set...")
+    flops = {layer.name: layer_flops(layer) for layer in ee_model.layers}
+    full_flops = sum(f for name, f in flops.items() if not name.startswith(EXIT_PREFIX))
+
+    # Cumulative cost of stopping at each stage: trunks so far + every head evaluated so far
+    stage_cost, cumulative = [], 0
+    for trunk, head in split_early_exit(ee_model):
+        cumulative += sum(flops.get(layer.name, 0) for layer in trunk.layers)
+        if head is not None:
+            cumulative += sum(flops.get(layer.name, 0) for layer in head.layers)
+        stage_cost.append(cumulative)
+
+    val_gen.reset()
+    outputs = ee_model.predict(val_gen, steps=len(val_gen))
+    y_true = val_gen.classes[:len(outputs[0])]
+    names = list(ee_model.output_names)
+    per_exit = {
+        name: round(float(np.mean(np.argmax(probs, axis=1) == y_true)), 4)
+        for name, probs in zip(names, outputs)
+    }
+
+    sweeps = []
+    confident = [np.max(probs, axis=1) for probs in outputs[:-1]]
+    for threshold in EXIT_THRESHOLDS:
+        exit_at = np.full(len(y_true), len(outputs) - 1)
+        for k in reversed(range(len(outputs) - 1)):
+            exit_at[confident[k] >= threshold] = k
+        preds = np.array([np.argmax(outputs[k][i]) for i, k in enumerate(exit_at)])
+        avg_flops = float(np.mean([stage_cost[k] for k in exit_at]))
+        sweeps.append({
+            "threshold": threshold,
+            "accuracy": round(float(np.mean(preds == y_true)), 4),
+            "exit_distribution": {names[k]: int(np.sum(exit_at == k)) for k in range(len(outputs))},
+            "avg_gflops": round(avg_flops / 1e9, 3),
+            "flops_saved": round(1 - avg_flops / full_flops, 4),
+        })
+        print(f"   threshold {threshold:.2f}: accuracy {sweeps[-1]['accuracy']:.4f}  "
+              f"FLOPs saved {sweeps[-1]['flops_saved']:.1%}  exits {sweeps[-1]['exit_distribution']}")
+
+    metrics = {
+        "per_exit_accuracy": per_exit,
+        "full_gflops": round(full_flops / 1e9, 3),
+        "stage_cumulative_gflops": [round(c / 1e9, 3) for c in stage_cost],
+        "thresholds": sweeps,
+    }
+    metrics_path = os.path.join(OUTPUT_DIR, "coccidiosis_early_exit_metrics.json")
+    with open(metrics_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    print(f"[OK] Early-exit metrics saved to {metrics_path}")
+    return metrics
+
+
+def build_early_exit(model, train_gen, val_gen):
+    print(f"\n{'='*60}")
+    print(f"[EARLY EXIT] Training exit heads after {', '.join(EARLY_EXIT_CUTS)}")
+    print(f"             Epochs: {EPOCHS_EXITS}")
+    print(f"{'='*60}")
+    ee_model = attach_exit_heads(model)
+    train_exit_heads(ee_model, train_gen, val_gen)
+    ee_model.save(EARLY_EXIT_PATH)
+    print(f"[OK] Early-exit model saved to {EARLY_EXIT_PATH}")
+    return evaluate_early_exit(ee_model, val_gen)
+
+
 # ─── Backup Existing Model ───────────────────────────────
 def backup_existing_model():
     """Create backup of existing model before overwriting."""
@@ -272,12 +433,28 @@ def backup_existing_model():
 
 # ─── Main ─────────────────────────────────────────────────
 def main():
+    parser = argparse.ArgumentParser(description="Coccidiosis VGG16 training")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="After training, attach and train intermediate exit heads")
+    parser.add_argument("--exits-only", action="store_true",
+                        help="Skip backbone training; add exit heads to the existing model.h5")
+    parser.add_argument("--img-size", type=int, choices=RESOLUTIONS, default=224,
+                        help="Input resolution; 160/192 train a model.r<size>.h5 variant")
+    args = parser.parse_args()
+    configure_resolution(args.img_size)
+
+    if args.exits_only:
+        train_gen, val_gen = create_generators()
+        build_early_exit(tf.keras.models.load_model(MODEL_PATH, compile=False), train_gen, val_gen)
+        return
+
     print("=" * 60)
     print("[TRAIN v2] Coccidiosis Detection — Improved Retraining")
     print("=" * 60)
     print(f"   Dataset:  {DATASET_ROOT}")
     print(f"   Output:   {MODEL_PATH}")
     print(f"   Classes:  {CLASS_NAMES}")
+    print(f"   Input:    {IMG_SIZE[0]}x{IMG_SIZE[1]}")
     print()
 
     # 0. Safety backup
@@ -390,7 +567,7 @@ def main():
     print(f"\n[OK] Model saved to {MODEL_PATH}")
 
     # Evaluate
-    metrics = evaluate_model(model, val_gen)
+    metrics = evaluate_model(model, val_gen, output_name=METRICS_NAME)
 
     print(f"\n{'='*60}")
     print(f"[DONE] Coccidiosis v2 Training Complete!")
@@ -401,6 +578,9 @@ def main():
     print(f"       If the new model is worse, restore: copy {BACKUP_PATH} → {MODEL_PATH}")
     print(f"{'='*60}")
 
+    if args.early_exit:
+        build_early_exit(model, train_gen, val_gen)
+
 
 if __name__ == "__main__":
     main()
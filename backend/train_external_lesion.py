@@ -11,7 +11,7 @@ Key improvements over v1:
 
 Usage:
     cd backend
-    python train_external_lesion.py
+    python train_external_lesion.py [--img-size 160|192|224]
 
 Dataset expected at:
     backend/Poultry Disease Detection.v9i.folder/
@@ -23,10 +23,15 @@ Output:
     models/external_lesion_model.h5
     models/external_lesion_metrics.json
     models/external_lesion_confusion_matrix.png
+
+    --img-size 160/192 writes models/external_lesion_model.r160.h5 and
+    models/external_lesion_r160_metrics.json instead (see benchmark_resolution.py).
 """
 
 import os
+import sys
 import json
+import argparse
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
@@ -44,8 +49,13 @@ from sklearn.metrics import (
 )
 from sklearn.utils.class_weight import compute_class_weight
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from cnnClassifier.pipeline.predict import resolution_artifact_path
+
 # ─── Config ───────────────────────────────────────────────
 IMG_SIZE        = (224, 224)
+RESOLUTIONS     = [160, 192, 224]   # --img-size variants; 224 is the production model
 BATCH_SIZE      = 16          # Smaller batch = more gradient updates per epoch
 EPOCHS_PHASE1   = 20          # Frozen backbone
 EPOCHS_PHASE2   = 25          # Fine-tune top layers
@@ -58,10 +68,19 @@ DATASET_ROOT    = os.path.join(
 )
 OUTPUT_DIR      = os.path.join(os.path.dirname(__file__), "models")
 MODEL_PATH      = os.path.join(OUTPUT_DIR, "external_lesion_model.h5")
+METRICS_NAME    = "external_lesion"
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
+def configure_resolution(size):
+    """Point IMG_SIZE and the output paths at the --img-size variant."""
+    global IMG_SIZE, MODEL_PATH, METRICS_NAME
+    IMG_SIZE = (size, size)
+    MODEL_PATH = resolution_artifact_path(os.path.join(OUTPUT_DIR, "external_lesion_model.h5"), size)
+    METRICS_NAME = "external_lesion" if size == 224 else f"external_lesion_r{size}"
+
+
 # ─── Data Generators ─────────────────────────────────────
 def create_generators():
     """Create train/valid/test generators with HEAVY augmentation."""
@@ -179,7 +198,7 @@ def unfreeze_layers(model, num_layers):
 
 
 # ─── Evaluation ───────────────────────────────────────────
-def evaluate_model(model, test_gen):
+def evaluate_model(model, test_gen, output_name="external_lesion"):
     """Generate confusion matrix, precision, recall, F1."""
     print("\n[EVAL] Evaluating on test set...")
 
@@ -215,7 +234,7 @@ def evaluate_model(model, test_gen):
         },
         "confusion_matrix": cm.tolist(),
     }
-    metrics_path = os.path.join(OUTPUT_DIR, "external_lesion_metrics.json")
+    metrics_path = os.path.join(OUTPUT_DIR, f"{output_name}_metrics.json")
     with open(metrics_path, "w") as f:
         json.dump(metrics, f, indent=2)
     print(f"[OK] Metrics saved to {metrics_path}")
@@ -235,7 +254,7 @@ def evaluate_model(model, test_gen):
         ax.set_xlabel("Predicted")
         ax.set_ylabel("True")
         ax.set_title("External Lesion Detection — Confusion Matrix (v2)")
-        fig_path = os.path.join(OUTPUT_DIR, "external_lesion_confusion_matrix.png")
+        fig_path = os.path.join(OUTPUT_DIR, f"{output_name}_confusion_matrix.png")
         fig.savefig(fig_path, dpi=150, bbox_inches="tight")
         plt.close(fig)
         print(f"[OK] Confusion matrix plot saved to {fig_path}")
@@ -247,10 +266,17 @@ def evaluate_model(model, test_gen):
 
 # ─── Main ─────────────────────────────────────────────────
 def main():
+    parser = argparse.ArgumentParser(description="External lesion MobileNetV2 training")
+    parser.add_argument("--img-size", type=int, choices=RESOLUTIONS, default=224,
+                        help="Input resolution; 160/192 train an external_lesion_model.r<size>.h5 variant")
+    args = parser.parse_args()
+    configure_resolution(args.img_size)
+
     print("[TRAIN v2] External Lesion Detection — Improved Training Pipeline")
     print(f"   Dataset:  {DATASET_ROOT}")
     print(f"   Output:   {MODEL_PATH}")
     print(f"   Classes:  {CLASS_NAMES}")
+    print(f"   Input:    {IMG_SIZE[0]}x{IMG_SIZE[1]}")
     print()
 
     # 1. Create data generators
@@ -349,7 +375,7 @@ def main():
     print(f"\n[OK] Model saved to {MODEL_PATH}")
 
     # 8. Evaluate
-    metrics = evaluate_model(model, test_gen)
+    metrics = evaluate_model(model, test_gen, output_name=METRICS_NAME)
 
     print("\n[DONE] Training v2 complete!")
     print(f"       Overall Accuracy: {metrics['accuracy']:.4f}")